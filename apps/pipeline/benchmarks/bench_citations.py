@@ -0,0 +1,104 @@
+import os
+import time
+import argparse
+import threading
+
+import src.fetcher as fetcher
+import src.citations as citations
+from src.paper_store import PaperStore
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.bench_send_loop import install
+from benchmarks.mock_semantic_scholar import serve_mock_semantic_scholar
+
+
+def point_at(server, rps: float) -> None:
+    """Send Semantic Scholar traffic to the mock under a fresh shared limiter."""
+    url = f"http://127.0.0.1:{server.server_address[1]}/graph/v1"
+    fetcher.SEMANTIC_SCHOLAR_API = url
+    citations.SEMANTIC_SCHOLAR_API = url
+    fetcher.SEMANTIC_SCHOLAR_RPS = rps
+    fetcher._limiter = None
+
+
+def measure(server, run):
+    """(result, requests, KB received, seconds) for one run against the mock."""
+    requests, received = server.requests, server.bytes_served
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    return (
+        result,
+        server.requests - requests,
+        (server.bytes_served - received) / 1e3,
+        elapsed,
+    )
+
+
+def main():
+    """Benchmark refreshing citation counts: re-searching vs /paper/batch"""
+    parser = argparse.ArgumentParser(description="Citation refresh benchmark")
+    parser.add_argument("--papers-per-field", type=int, nargs="+", default=[200, 2000])
+    parser.add_argument(
+        "--rps", type=float, default=10, help="Semantic Scholar requests per second"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Simulated API round trip"
+    )
+    parser.add_argument(
+        "--db-latency", type=float, default=0.005, help="Simulated DB round trip"
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("SUPABASE_URL", "http://fake")
+    os.environ.setdefault("SUPABASE_ANON_KEY", "fake")
+
+    print(
+        f"{'per field':>9} {'path':>10} {'papers':>7} {'requests':>9} "
+        f"{'KB':>8} {'changed':>8} {'time':>8}"
+    )
+    for n in args.papers_per_field:
+        server = serve_mock_semantic_scholar(
+            port=0, papers_per_field=n, latency=args.latency
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        point_at(server, args.rps)
+
+        # Yesterday's run: the window is in the store and in the DB
+        store = PaperStore()
+        fetcher.fetch_incremental(store, 7, n, sources=["semantic_scholar"])
+        fake = FakeSupabase(latency=args.db_latency)
+        install(fake)
+        fetcher.save_papers_to_db(store.recent(days=7))
+        citations.refresh_citations_in_db(days=7)
+        server.citation_growth = 3
+
+        rows = []
+        # What keeping counts current took before: searching the window again
+        papers, *cost = measure(
+            server,
+            lambda: list(fetcher.stream_all_fields(7, n, sources=["semantic_scholar"])),
+        )
+        rows.append(("re-search", len(papers), len(papers), *cost))
+
+        stored = store.recent(days=7)
+        changed, *cost = measure(server, lambda: citations.refresh_papers(stored))
+        rows.append(("batch", len(stored), len(changed), *cost))
+
+        fake.requests = 0
+        server.citation_growth = 5
+        report, *cost = measure(
+            server, lambda: citations.refresh_citations_in_db(days=7)
+        )
+        rows.append(("batch + db", report["scanned"], report["rescored"], *cost))
+
+        for name, papers, changed, requests, received, elapsed in rows:
+            print(
+                f"{n:>9} {name:>10} {papers:>7} {requests:>9} "
+                f"{received:>8.0f} {changed:>8} {elapsed:>7.2f}s"
+            )
+        print(f"{'':>9} DB job: {fake.requests} DB requests")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+import time
+import random
+import argparse
+
+from src.fetcher import save_papers_to_db, paper_to_row
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.bench_send_loop import install
+from benchmarks.mock_semantic_scholar import FIELDS, synthetic_paper
+
+
+def make_papers(n: int, bad_rate: float, seed: int = 0):
+    """n distinct papers; `bad_rate` of them lack the NOT NULL title."""
+    rng = random.Random(seed)
+    papers = []
+    for i in range(n):
+        paper = synthetic_paper(FIELDS[i % len(FIELDS)], i // len(FIELDS) * 10)
+        paper = {**paper, "paperId": f"p{i}"}
+        if rng.random() < bad_rate:
+            paper["title"] = None
+        papers.append(paper)
+    return papers
+
+
+def per_row(papers, fake):
+    """The original writer: one upsert round trip per paper."""
+    install(fake)
+    saved = 0
+    for paper in papers:
+        try:
+            fake.table("papers").upsert(
+                paper_to_row(paper), on_conflict="source,external_id"
+            ).execute()
+            saved += 1
+        except Exception:
+            pass
+    return {"written": saved, "failed": len(papers) - saved}
+
+
+def bulk(papers, fake, chunk_size):
+    """Chunked multi-row upserts with retry and bisection."""
+    install(fake)
+    return save_papers_to_db(papers, chunk_size=chunk_size)
+
+
+def main():
+    """Benchmark persisting papers: per-row upserts vs bulk_upsert"""
+    parser = argparse.ArgumentParser(description="Paper write benchmark")
+    parser.add_argument("--papers", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument(
+        "--bad-rate", type=float, default=0.001, help="Share of rows the DB rejects"
+    )
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.02, help="Transient request failures"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.005, help="Simulated DB round trip"
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("SUPABASE_URL", "http://fake")
+    os.environ.setdefault("SUPABASE_ANON_KEY", "fake")
+
+    print(
+        f"{'papers':>7} {'path':>8} {'requests':>9} {'written':>8} "
+        f"{'failed':>7} {'rows in DB':>11} {'time':>8}"
+    )
+    for n in args.papers:
+        papers = make_papers(n, args.bad_rate)
+        bad = sum(1 for p in papers if p["title"] is None)
+        for name, run in (
+            ("per-row", lambda fake: per_row(papers, fake)),
+            ("bulk", lambda fake: bulk(papers, fake, args.chunk_size)),
+        ):
+            fake = FakeSupabase(
+                latency=args.latency, failure_rate=args.failure_rate, seed=n
+            )
+            start = time.perf_counter()
+            report = run(fake)
+            elapsed = time.perf_counter() - start
+            stored = len(fake.tables.get("papers", []))
+            print(
+                f"{n:>7} {name:>8} {fake.requests:>9} {report['written']:>8} "
+                f"{report['failed']:>7} {stored:>11} {elapsed:>7.2f}s"
+            )
+        print(f"{'':>7} {bad} rows are invalid")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import json
+import time
+import random
+import argparse
+
+from src.email_sender import format_email_html, EmailRenderer
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture_papers():
+    with open(os.path.join(FIXTURES, "email_papers.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_deliveries(n_subscribers: int, pool_size: int, seed: int = 0):
+    """(recipient, papers) pairs drawn from a small pool of paper sets."""
+    rng = random.Random(seed)
+    fixture = load_fixture_papers()
+    pool = [
+        {**fixture[i % len(fixture)], "paperId": f"p{i}", "title": f"Paper {i}"}
+        for i in range(pool_size)
+    ]
+    return [
+        (f"user{i}@example.com", rng.sample(pool[:6], 3)) for i in range(n_subscribers)
+    ]
+
+
+def main():
+    """Benchmark per-recipient email rendering"""
+    parser = argparse.ArgumentParser(description="Email rendering benchmark")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--pool", type=int, default=12)
+    args = parser.parse_args()
+
+    print(f"{'subscribers':>11} {'per-recipient':>14} {'render-once':>12}  identical")
+    for n in args.subscribers:
+        deliveries = make_deliveries(n, args.pool)
+
+        start = time.perf_counter()
+        expected = [format_email_html(papers, email) for email, papers in deliveries]
+        naive_time = time.perf_counter() - start
+
+        renderer = EmailRenderer()
+        start = time.perf_counter()
+        actual = [renderer.render(papers, email) for email, papers in deliveries]
+        cached_time = time.perf_counter() - start
+
+        print(
+            f"{n:>11} {naive_time:>13.3f}s {cached_time:>11.3f}s  {expected == actual}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import time
+import asyncio
+import argparse
+import threading
+
+import resend
+
+from src.email_sender import send_digest_email, send_digest_emails_async, EmailRenderer
+from benchmarks.bench_email_render import make_deliveries
+from benchmarks.mock_resend import serve_mock_resend
+
+
+def per_message(deliveries, renderer):
+    """The original path: one Emails.send call per subscriber."""
+    sent = 0
+    for email, papers in deliveries:
+        sent += send_digest_email([email], papers, renderer=renderer)["sent"]
+    return sent
+
+
+def batched(deliveries, renderer, rps, concurrency):
+    """Resend batch API, batches sent concurrently under the rate limit."""
+    result = asyncio.run(
+        send_digest_emails_async(
+            deliveries, renderer=renderer, rps=rps, concurrency=concurrency
+        )
+    )
+    return result["sent"]
+
+
+def main():
+    """Benchmark email delivery against a local mock Resend API"""
+    parser = argparse.ArgumentParser(description="Email delivery benchmark")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Mock seconds per request"
+    )
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8902)
+    parser.add_argument(
+        "--skip-serial", action="store_true", help="Only run the batched path"
+    )
+    args = parser.parse_args()
+
+    server = serve_mock_resend(args.port, args.latency, args.rate_limit_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.setdefault("RESEND_API_KEY", "re_mock")
+    resend.api_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"{'subscribers':>11} {'path':>12} {'requests':>9} {'sent':>6} {'time':>8}")
+    for n in args.subscribers:
+        deliveries = make_deliveries(n, 12)
+        paths = {
+            "per-message": lambda: per_message(deliveries, EmailRenderer()),
+            "batched": lambda: batched(
+                deliveries, EmailRenderer(), args.rps, args.concurrency
+            ),
+        }
+        if args.skip_serial:
+            del paths["per-message"]
+        for name, run in paths.items():
+            server.requests = 0
+            server.messages.clear()
+            start = time.perf_counter()
+            sent = run()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{n:>11} {name:>12} {server.requests:>9} {sent:>6} {elapsed:>7.2f}s"
+            )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
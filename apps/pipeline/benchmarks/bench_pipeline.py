@@ -0,0 +1,407 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
+
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.mock_resend import serve_mock_resend
+from benchmarks.mock_telegram import serve_mock_telegram
+from benchmarks.mock_sources import serve_mock_sources
+from benchmarks.mock_semantic_scholar import (
+    FIELDS,
+    serve_mock_semantic_scholar,
+    synthetic_paper,
+)
+from src.llm import serve_stub
+
+SIZES = [100, 1000, 10000, 100000]
+RESULTS_PATH = ".cache/bench_pipeline.jsonl"
+
+# Telegram chat ids are CHAT_ID_BASE + subscriber index
+CHAT_ID_BASE = 10_000_000
+
+# Provider limits raised far enough that the run measures the pipeline,
+# not the quotas; --provider-limits uses the production defaults instead
+FAST_LIMITS = {
+    "SEMANTIC_SCHOLAR_RPS": "20",
+    "ARXIV_RPS": "20",
+    "PUBMED_RPS": "20",
+    "GROQ_RPM": "6000",
+    "GROQ_TPM": "10000000",
+    "RESEND_RPS": "50",
+    "TELEGRAM_GLOBAL_RPS": "1000",
+}
+PROVIDER_LIMITS = {
+    "SEMANTIC_SCHOLAR_RPS": "1",
+    "ARXIV_RPS": "0.33",
+    "PUBMED_RPS": "3",
+    "GROQ_RPM": "30",
+    "GROQ_TPM": "12000",
+    "RESEND_RPS": "2",
+    "TELEGRAM_GLOBAL_RPS": "30",
+}
+
+
+def subscriber_email(index: int) -> str:
+    return f"user{index:06d}@bench.test"
+
+
+def seed_database(
+    fake: FakeSupabase,
+    subscribers: int,
+    papers_per_field: int,
+    history: int = 6,
+    telegram_share: float = 0.5,
+    seed: int = 0,
+) -> None:
+    """
+    N subscribers with random preferred_fields (none = all fields), about
+    `telegram_share` of them on Telegram and 2% inactive, plus up to
+    `history` recently sent papers each, drawn from the top of their
+    fields so the exclusions actually bite.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    rows = []
+    sent = []
+    for i in range(subscribers):
+        fields = rng.sample(FIELDS, rng.choice([0, 1, 1, 2, 3]))
+        rows.append(
+            fake.with_defaults(
+                "subscribers",
+                {
+                    "email": subscriber_email(i),
+                    "telegram_chat_id": str(CHAT_ID_BASE + i)
+                    if rng.random() < telegram_share
+                    else None,
+                    "preferred_fields": fields,
+                    "is_active": rng.random() >= 0.02,
+                },
+            )
+        )
+        for _ in range(rng.randint(0, history)):
+            field = rng.choice(fields or FIELDS)
+            index = rng.randrange(min(papers_per_field, 20))
+            sent.append(
+                fake.with_defaults(
+                    "sent_papers",
+                    {
+                        "paper_id": synthetic_paper(field, index)["paperId"],
+                        "subscriber_email": subscriber_email(i),
+                        "sent_at": (
+                            now - timedelta(hours=rng.randint(1, 6 * 24))
+                        ).isoformat(),
+                    },
+                )
+            )
+    fake.tables["subscribers"] = rows
+    fake.tables["sent_papers"] = sent
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_child(args) -> None:
+    """
+    One pipeline run in this (fresh) process: seed the fake database,
+    run main.main() and write timings, round trips and memory to
+    args.result. Provider URLs and limits come from the environment.
+    """
+    import src.db as db
+
+    fake = FakeSupabase(latency=args.db_latency, max_rows=1000)
+    seed_database(
+        fake,
+        args.child,
+        args.papers_per_field,
+        args.history,
+        args.telegram_share,
+        args.seed,
+    )
+    db.create_client = lambda url, key: fake
+    db.reset_supabase_clients()
+
+    from src import main as pipeline
+
+    rss_before = max_rss_mb()
+    sys.argv = ["main", "--report", args.report]
+    if args.profile:
+        sys.argv += ["--profile", os.path.join(args.profile, str(args.child))]
+    started = time.time()
+    exit_code = pipeline.main()
+    finished = time.time()
+
+    with open(args.result, "w") as f:
+        json.dump(
+            {
+                "exit_code": exit_code,
+                "started": started,
+                "wall_time": finished - started,
+                "rss_before_mb": rss_before,
+                "rss_peak_mb": max_rss_mb(),
+                "db_requests": fake.requests,
+                "db_requests_by_table": fake.requests_by_table,
+            },
+            f,
+        )
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def delivery_latencies(started: float, resend, telegram) -> Dict[int, float]:
+    """Seconds from run start to each subscriber's last delivered message."""
+    latest: Dict[int, float] = {}
+    for message, at in zip(resend.messages, resend.received_at):
+        index = int(message["to"][len("user") :].split("@")[0])
+        latest[index] = max(latest.get(index, 0.0), at - started)
+    for (chat_id, _), at in zip(telegram.messages, telegram.received_at):
+        index = int(chat_id) - CHAT_ID_BASE
+        latest[index] = max(latest.get(index, 0.0), at - started)
+    return latest
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(
+    subscribers: int, args, servers: Dict[str, Any], workdir: str
+) -> Optional[Dict[str, Any]]:
+    """Run the pipeline for one size in a child process; None if it crashed."""
+    s2, sources, llm, resend, telegram = (
+        servers["s2"],
+        servers["sources"],
+        servers["llm"],
+        servers["resend"],
+        servers["telegram"],
+    )
+    for server in (s2, resend, telegram):
+        server.requests = 0
+    sources.requests.clear()
+    resend.messages.clear()
+    resend.received_at.clear()
+    resend.idempotent.clear()
+    telegram.messages.clear()
+    telegram.received_at.clear()
+    telegram.rate_limited = 0
+
+    env = {
+        **os.environ,
+        **(PROVIDER_LIMITS if args.provider_limits else FAST_LIMITS),
+        "PYTHONPATH": os.getcwd(),
+        "SUPABASE_URL": "http://supabase.bench",
+        "SUPABASE_ANON_KEY": "bench",
+        "SEMANTIC_SCHOLAR_API_URL": f"http://127.0.0.1:{s2.server_address[1]}/graph/v1",
+        "PAPERS_PER_FIELD": str(args.papers_per_field),
+        "PAPER_SOURCES": "semantic_scholar,arxiv,pubmed",
+        "ARXIV_API_URL": f"http://127.0.0.1:{sources.server_address[1]}/api/query",
+        "PUBMED_API_URL": f"http://127.0.0.1:{sources.server_address[1]}/eutils",
+        "LLM_BACKEND": "openai",
+        "LLM_BASE_URL": f"http://127.0.0.1:{llm.server_address[1]}/v1",
+        "SUMMARY_CACHE_BACKEND": "none",
+        # A fresh paper store per size, so every run is a cold full fetch
+        "PAPER_STORE_PATH": os.path.join(workdir, f"papers-{subscribers}.sqlite3"),
+        "RESEND_API_KEY": "re_bench",
+        "RESEND_API_URL": f"http://127.0.0.1:{resend.server_address[1]}",
+        "TELEGRAM_BOT_TOKEN": "1:bench",
+        "TELEGRAM_BASE_URL": f"http://127.0.0.1:{telegram.server_address[1]}/bot",
+    }
+    env.pop("SEMANTIC_SCHOLAR_API_KEY", None)
+    env.pop("NCBI_API_KEY", None)
+    result_path = os.path.join(workdir, f"result-{subscribers}.json")
+    report_path = os.path.join(workdir, f"report-{subscribers}.json")
+    log_path = os.path.join(workdir, f"run-{subscribers}.log")
+    command = [
+        sys.executable,
+        "-m",
+        "benchmarks.bench_pipeline",
+        "--child",
+        str(subscribers),
+        "--result",
+        result_path,
+        "--report",
+        report_path,
+        "--papers-per-field",
+        str(args.papers_per_field),
+        "--history",
+        str(args.history),
+        "--telegram-share",
+        str(args.telegram_share),
+        "--db-latency",
+        str(args.db_latency),
+        "--seed",
+        str(args.seed),
+    ]
+    if args.profile:
+        command += ["--profile", args.profile]
+    with open(log_path, "w") as log:
+        process = subprocess.run(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+    if process.returncode != 0:
+        with open(log_path) as f:
+            tail = f.readlines()[-20:]
+        print(f"Run with {subscribers} subscribers crashed:\n{''.join(tail)}")
+        return None
+
+    with open(result_path) as f:
+        result = json.load(f)
+    with open(report_path) as f:
+        report = json.load(f)
+
+    latencies = list(delivery_latencies(result["started"], resend, telegram).values())
+    llm_requests = report["timers"].get("llm.complete", {}).get("count", 0)
+    requests = {
+        "semantic_scholar": s2.requests,
+        "arxiv": sources.requests.get("arxiv", 0),
+        "pubmed": sources.requests.get("pubmed", 0),
+        "supabase": result["db_requests"],
+        "llm": llm_requests,
+        "resend": resend.requests,
+        "telegram": telegram.requests,
+    }
+    return {
+        "subscribers": subscribers,
+        "exit_code": result["exit_code"],
+        "wall_time": round(result["wall_time"], 3),
+        "stages": {s["stage"]: s["duration"] for s in report.get("stages", [])},
+        "requests": requests,
+        "supabase_by_table": result["db_requests_by_table"],
+        "telegram_rate_limited": telegram.rate_limited,
+        "emails": len(resend.messages),
+        "telegram_messages": len(telegram.messages),
+        "delivered": len(latencies),
+        "rss_before_mb": round(result["rss_before_mb"], 1),
+        "rss_peak_mb": round(result["rss_peak_mb"], 1),
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_max": max(latencies) if latencies else None,
+    }
+
+
+def start_servers(args) -> Dict[str, Any]:
+    servers = {
+        "s2": serve_mock_semantic_scholar(
+            0, args.papers_per_field, args.latency, args.seed
+        ),
+        "sources": serve_mock_sources(0, args.latency),
+        "llm": serve_stub(0, args.llm_latency),
+        "resend": serve_mock_resend(0, args.latency, keep_html=False),
+        "telegram": serve_mock_telegram(
+            0,
+            args.latency,
+            float((PROVIDER_LIMITS if args.provider_limits else FAST_LIMITS)[
+                "TELEGRAM_GLOBAL_RPS"
+            ]),
+            keep_text=False,
+        ),
+    }
+    for server in servers.values():
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+
+def main():
+    """End-to-end pipeline benchmark against local stand-ins for every service"""
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--papers-per-field", type=int, default=50)
+    parser.add_argument(
+        "--history", type=int, default=6, help="Max recently sent papers per subscriber"
+    )
+    parser.add_argument("--telegram-share", type=float, default=0.5)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Mock API seconds per request"
+    )
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument(
+        "--db-latency", type=float, default=0.02, help="Fake Supabase round trip"
+    )
+    parser.add_argument(
+        "--provider-limits",
+        action="store_true",
+        help="Use production rate limits instead of raised ones",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Profile each run (cProfile + tracemalloc) into DIR/<subscribers>",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", default=RESULTS_PATH, help="JSON lines file results are appended to"
+    )
+    # Internal: run one size in this process
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    parser.add_argument("--report", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        run_child(args)
+        return
+
+    servers = start_servers(args)
+    revision = git_revision()
+    print(
+        f"{'subscribers':>11} {'wall':>8} {'S2':>4} {'db':>5} {'llm':>4} "
+        f"{'resend':>6} {'tg':>6} {'peak RSS':>9} {'p50':>7} {'p95':>7} {'max':>7}"
+    )
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.subscribers:
+            row = run_size(n, args, servers, workdir)
+            if row is None:
+                continue
+            requests = row["requests"]
+            print(
+                f"{n:>11} {row['wall_time']:>7.2f}s {requests['semantic_scholar']:>4} "
+                f"{requests['supabase']:>5} {requests['llm']:>4} "
+                f"{requests['resend']:>6} {requests['telegram']:>6} "
+                f"{row['rss_peak_mb']:>7.0f}MB "
+                f"{row['latency_p50'] or 0:>6.2f}s {row['latency_p95'] or 0:>6.2f}s "
+                f"{row['latency_max'] or 0:>6.2f}s"
+            )
+            if row["exit_code"]:
+                print(f"  run failed, exit code {row['exit_code']}")
+
+            row.update(
+                {
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "revision": revision,
+                    "provider_limits": args.provider_limits,
+                    "papers_per_field": args.papers_per_field,
+                }
+            )
+            directory = os.path.dirname(args.output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(args.output, "a") as f:
+                f.write(json.dumps(row) + "\n")
+
+    for server in servers.values():
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import List, Dict, Any
+
+from src.scorer import calculate_score, score_papers
+
+
+def make_papers(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Synthetic Semantic Scholar papers with a long-tailed citation count."""
+    rng = random.Random(seed)
+    today = datetime.now().date()
+    papers = []
+    for i in range(n):
+        citations = int(rng.paretovariate(1.2)) - 1
+        pub_date = (today - timedelta(days=rng.randint(-2, 400))).isoformat()
+        roll = rng.random()
+        if roll < 0.02:
+            pub_date = None
+        elif roll < 0.03:
+            pub_date = "not-a-date"
+        elif roll < 0.05:
+            pub_date += "T08:30:00Z"
+        papers.append(
+            {
+                "paperId": f"p{i}",
+                "citationCount": citations if rng.random() > 0.01 else None,
+                "influentialCitationCount": rng.randint(0, max(0, citations // 5)),
+                "publicationDate": pub_date,
+            }
+        )
+    return papers
+
+
+def reference_score_papers(
+    papers: List[Dict[str, Any]], now: datetime
+) -> List[Dict[str, Any]]:
+    """The original per-dict scoring loop followed by a full sort."""
+    for paper in papers:
+        paper["score"] = calculate_score(paper, now)
+    return sorted(papers, key=lambda x: x["score"], reverse=True)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Benchmark the vectorized scorer against the per-paper loop"""
+    parser = argparse.ArgumentParser(description="Scorer benchmark")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 500000]
+    )
+    parser.add_argument("--top", type=int, default=50)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    print(f"{'papers':>9} {'loop+sort':>10} {'vectorized':>11} {'top-k':>8}  identical")
+    for n in args.sizes:
+        papers = make_papers(n)
+
+        expected, loop_time = timed(reference_score_papers, [dict(p) for p in papers], now)
+        actual, vector_time = timed(score_papers, [dict(p) for p in papers], now=now)
+        top, top_time = timed(score_papers, iter([dict(p) for p in papers]), args.top, now)
+
+        identical = [(p["paperId"], p["score"]) for p in expected] == [
+            (p["paperId"], p["score"]) for p in actual
+        ] and [p["paperId"] for p in top] == [
+            p["paperId"] for p in expected[: args.top]
+        ]
+        print(
+            f"{n:>9} {loop_time:>9.3f}s {vector_time:>10.3f}s {top_time:>7.3f}s  {identical}"
+        )
+
+
+if __name__ == "__main__":
+    main()
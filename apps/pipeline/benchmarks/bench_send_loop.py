@@ -0,0 +1,97 @@
+import os
+import time
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import src.db as db
+from benchmarks.fake_supabase import FakeSupabase
+
+
+def make_fake(n_subscribers: int, history_per_subscriber: int, latency: float):
+    fake = FakeSupabase(latency=latency)
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    fake.tables["sent_papers"] = [
+        fake.with_defaults(
+            "sent_papers",
+            {
+                "subscriber_email": f"user{i}@example.com",
+                "paper_id": f"p{rng.randint(0, 200)}",
+                "sent_at": (now - timedelta(days=rng.uniform(0, 10))).isoformat(),
+            },
+        )
+        for i in range(n_subscribers)
+        for _ in range(history_per_subscriber)
+    ]
+    return fake
+
+
+def install(fake: FakeSupabase) -> dict:
+    """Route db.create_client to the fake and count constructions."""
+    counter = {"clients": 0}
+
+    def create_client(url, key):
+        counter["clients"] += 1
+        return fake
+
+    db.create_client = create_client
+    db.reset_supabase_clients()
+    return counter
+
+
+def per_subscriber_loop(emails, fake):
+    """The original send loop: one read and one write per subscriber."""
+    counter = install(fake)
+    for email in emails:
+        sent = db.get_recently_sent_paper_ids(email)
+        db.save_sent_papers([f"new{len(sent)}", "new-b", "new-c"], email)
+    return counter
+
+
+def batched_loop(emails, fake):
+    """Bulk prefetch plus the buffered writer."""
+    counter = install(fake)
+    supabase = db.get_supabase_client()
+    sent_map = db.get_recently_sent_map(emails, supabase=supabase)
+    with db.SentPapersWriter(supabase) as writer:
+        for email in emails:
+            sent = sent_map[email]
+            writer.add([f"new{len(sent)}", "new-b", "new-c"], email)
+    return counter
+
+
+def main():
+    """Benchmark sent_papers round trips in the send loop"""
+    parser = argparse.ArgumentParser(description="Send loop DB benchmark")
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--history", type=int, default=6)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Simulated seconds per round trip"
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("SUPABASE_URL", "http://fake")
+    os.environ.setdefault("SUPABASE_ANON_KEY", "fake")
+
+    print(
+        f"{'subscribers':>11} {'path':>15} {'clients':>8} {'round trips':>12} {'time':>8}"
+    )
+    for n in args.subscribers:
+        emails = [f"user{i}@example.com" for i in range(n)]
+        for name, loop in (
+            ("per-subscriber", per_subscriber_loop),
+            ("batched", batched_loop),
+        ):
+            fake = make_fake(n, args.history, args.latency)
+            start = time.perf_counter()
+            counter = loop(emails, fake)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{n:>11} {name:>15} {counter['clients']:>8} "
+                f"{fake.requests:>12} {elapsed:>7.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
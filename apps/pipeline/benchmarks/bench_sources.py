@@ -0,0 +1,76 @@
+import time
+import argparse
+import threading
+from datetime import datetime
+
+import src.fetcher as fetcher
+import src.sources as sources
+from src.dedup import PaperDeduplicator
+from benchmarks.mock_semantic_scholar import serve_mock_semantic_scholar
+from benchmarks.mock_sources import serve_mock_sources, FIXTURE_WINDOW_START
+
+SOURCE_SETS = [
+    ["semantic_scholar"],
+    ["arxiv"],
+    ["pubmed"],
+    ["semantic_scholar", "arxiv", "pubmed"],
+]
+
+
+def start(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    """Benchmark fetching from Semantic Scholar, arXiv and PubMed side by side"""
+    parser = argparse.ArgumentParser(description="Paper sources benchmark")
+    parser.add_argument("--papers-per-field", type=int, default=200)
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="Simulated API round trip"
+    )
+    parser.add_argument("--s2-rps", type=float, default=fetcher.SEMANTIC_SCHOLAR_RPS)
+    parser.add_argument("--arxiv-rps", type=float, default=sources.ARXIV_RPS)
+    parser.add_argument("--pubmed-rps", type=float, default=sources.PUBMED_RPS)
+    args = parser.parse_args()
+
+    s2 = serve_mock_semantic_scholar(
+        port=0, papers_per_field=args.papers_per_field, latency=args.latency
+    )
+    others = serve_mock_sources(port=0, latency=args.latency)
+    fetcher.SEMANTIC_SCHOLAR_API = f"{start(s2)}/graph/v1"
+    base = start(others)
+    sources.ARXIV_API = f"{base}/api/query"
+    sources.PUBMED_API = f"{base}/eutils"
+    sources.ArxivSource.rate = args.arxiv_rps
+    sources.PubMedSource.rate = args.pubmed_rps
+    fetcher.SEMANTIC_SCHOLAR_RPS = args.s2_rps
+
+    # Reach back to the recorded fixtures' window
+    window_start = datetime.strptime(FIXTURE_WINDOW_START, "%Y-%m-%d")
+    days = max(7, (datetime.now() - window_start).days)
+
+    print(f"{'sources':<32} {'fetched':>8} {'unique':>7} {'time':>8}  duplicates")
+    single = 0.0
+    for names in SOURCE_SETS:
+        fetcher._limiter = None
+        dedup = PaperDeduplicator()
+        started = time.perf_counter()
+        papers = list(
+            fetcher.stream_all_fields(days, args.papers_per_field, sources=names)
+        )
+        elapsed = time.perf_counter() - started
+        unique = list(dedup.dedupe(papers))
+        if len(names) == 1:
+            single += elapsed
+        print(
+            f"{','.join(names):<32} {len(papers):>8} {len(unique):>7} "
+            f"{elapsed:>7.2f}s  {dedup.summary()}"
+        )
+    print(f"{'single sources back to back':<32} {'':>8} {'':>7} {single:>7.2f}s")
+    s2.shutdown()
+    others.shutdown()
+
+
+if __name__ == "__main__":
+    main()
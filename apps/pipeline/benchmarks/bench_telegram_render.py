@@ -0,0 +1,36 @@
+import time
+import argparse
+
+from src.telegram_sender import (
+    TelegramDigestRenderer,
+    format_digest_text,
+    split_message,
+)
+from benchmarks.bench_email_render import make_deliveries
+
+
+def main():
+    """Benchmark splitting digests per chat vs the render cache"""
+    parser = argparse.ArgumentParser(description="Telegram render benchmark")
+    parser.add_argument("--chats", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'chats':>7} {'per-chat':>9} {'cached':>8}")
+    for n in args.chats:
+        deliveries = make_deliveries(n, 12)
+
+        start = time.perf_counter()
+        for _, papers in deliveries:
+            split_message(format_digest_text(papers))
+        naive_time = time.perf_counter() - start
+
+        renderer = TelegramDigestRenderer()
+        start = time.perf_counter()
+        for _, papers in deliveries:
+            renderer.render(papers)
+        cached_time = time.perf_counter() - start
+        print(f"{n:>7} {naive_time:>8.3f}s {cached_time:>7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
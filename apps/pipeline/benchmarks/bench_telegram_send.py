@@ -0,0 +1,77 @@
+import os
+import time
+import asyncio
+import argparse
+import threading
+
+import src.telegram_sender as telegram_sender
+from src.telegram_sender import TelegramDispatcher, send_telegram_digest
+from benchmarks.bench_email_render import make_deliveries
+from benchmarks.mock_telegram import serve_mock_telegram
+
+
+def per_chat(deliveries):
+    """One send_telegram_digest call (event loop + Bot) per chat, as main used to."""
+    sent = 0
+    for chat_id, papers in deliveries:
+        sent += send_telegram_digest([chat_id], papers)["sent"]
+    return sent
+
+
+async def dispatched(deliveries, global_rps):
+    """One dispatcher, all chats concurrently."""
+    async with TelegramDispatcher(global_rps=global_rps) as dispatcher:
+        result = await dispatcher.send_digests(deliveries)
+    return result["sent"], dispatcher.flood_waits
+
+
+def main():
+    """Benchmark Telegram fan-out against a local mock Bot API"""
+    parser = argparse.ArgumentParser(description="Telegram delivery benchmark")
+    parser.add_argument("--chats", type=int, nargs="+", default=[100, 600])
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="Mock seconds per request"
+    )
+    parser.add_argument("--global-rps", type=float, default=30.0)
+    parser.add_argument("--port", type=int, default=8903)
+    parser.add_argument(
+        "--skip-serial", action="store_true", help="Only run the dispatcher"
+    )
+    args = parser.parse_args()
+
+    server = serve_mock_telegram(args.port, args.latency, args.global_rps)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123:mock")
+    telegram_sender.TELEGRAM_BASE_URL = f"http://127.0.0.1:{args.port}/bot"
+
+    print(
+        f"{'chats':>7} {'path':>11} {'requests':>9} {'429s':>5} {'sent':>6} {'time':>8}"
+    )
+    for n in args.chats:
+        deliveries = [
+            (str(100000 + i), papers)
+            for i, (_, papers) in enumerate(make_deliveries(n, 12))
+        ]
+        paths = {
+            "per-chat": lambda: per_chat(deliveries),
+            "dispatcher": lambda: asyncio.run(
+                dispatched(deliveries, args.global_rps)
+            )[0],
+        }
+        if args.skip_serial:
+            del paths["per-chat"]
+        for name, run in paths.items():
+            server.requests = server.rate_limited = 0
+            start = time.perf_counter()
+            sent = run()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{n:>7} {name:>11} {server.requests:>9} {server.rate_limited:>5} "
+                f"{sent:>6} {elapsed:>7.2f}s"
+            )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
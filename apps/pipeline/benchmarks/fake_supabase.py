@@ -0,0 +1,263 @@
+import time
+import uuid
+import bisect
+import random
+import threading
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Callable, Optional
+
+from postgrest.exceptions import APIError
+
+# NOT NULL columns without defaults, from supabase/schema.sql
+NOT_NULL = {
+    "papers": ("source", "external_id", "title"),
+    "sent_papers": ("subscriber_email", "paper_id"),
+    "summary_cache": ("cache_key", "summary"),
+}
+
+
+class FakeResult:
+    def __init__(self, data: List[Dict[str, Any]]):
+        self.data = data
+
+
+class FakeQuery:
+    """
+    The subset of the postgrest query builder the pipeline uses,
+    evaluated against in-memory rows. Every execute() is one round trip.
+    """
+
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.op = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self.order_key: Optional[str] = None
+        self.descending = False
+        self.row_limit: Optional[int] = None
+        self.row_range: Optional[tuple] = None
+        # Lower bound of a keyset page, so ordered selects can seek
+        self.after: Optional[tuple] = None
+
+    def select(self, columns: str = "*") -> "FakeQuery":
+        self.op, self.columns = "select", columns
+        return self
+
+    def insert(self, rows) -> "FakeQuery":
+        self.op, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: Optional[str] = None) -> "FakeQuery":
+        self.op, self.payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, values: Dict[str, Any]) -> "FakeQuery":
+        self.op, self.payload = "update", values
+        return self
+
+    def delete(self) -> "FakeQuery":
+        self.op = "delete"
+        return self
+
+    def eq(self, key, value) -> "FakeQuery":
+        self.filters.append(lambda r: r.get(key) == value)
+        return self
+
+    def gt(self, key, value) -> "FakeQuery":
+        self.after = (key, value)
+        self.filters.append(lambda r: r.get(key) is not None and r[key] > value)
+        return self
+
+    def gte(self, key, value) -> "FakeQuery":
+        self.filters.append(lambda r: r.get(key) is not None and r[key] >= value)
+        return self
+
+    def lt(self, key, value) -> "FakeQuery":
+        self.filters.append(lambda r: r.get(key) is not None and r[key] < value)
+        return self
+
+    def in_(self, key, values) -> "FakeQuery":
+        values = set(values)
+        self.filters.append(lambda r: r.get(key) in values)
+        return self
+
+    def order(self, key: str, desc: bool = False) -> "FakeQuery":
+        self.order_key, self.descending = key, desc
+        return self
+
+    def limit(self, n: int) -> "FakeQuery":
+        self.row_limit = n
+        return self
+
+    def range(self, start: int, end: int) -> "FakeQuery":
+        self.row_range = (start, end)
+        return self
+
+    def _matches(self, row: Dict[str, Any]) -> bool:
+        return all(f(row) for f in self.filters)
+
+    def execute(self) -> FakeResult:
+        if self.db.latency:
+            # Simulated network round trip
+            time.sleep(self.db.latency)
+        with self.db.lock:
+            self.db.requests += 1
+            self.db.requests_by_table[self.table] = (
+                self.db.requests_by_table.get(self.table, 0) + 1
+            )
+            if self.db.failure_rate and self.db.random.random() < self.db.failure_rate:
+                raise ConnectionError("Simulated transient failure")
+            if self.op in ("insert", "upsert"):
+                self._check_not_null()
+            rows = self.db.tables.setdefault(self.table, [])
+            if self.op != "select":
+                self.db.versions[self.table] = self.db.versions.get(self.table, 0) + 1
+            return getattr(self, f"_{self.op}")(rows)
+
+    def _seek(self, rows) -> List[Dict[str, Any]]:
+        """Ascending keyset page read off a cached sorted index."""
+        keys, ordered = self.db.sorted_index(self.table, self.order_key, rows)
+        start = 0
+        if self.after is not None and self.after[0] == self.order_key:
+            start = bisect.bisect_right(keys, self.after[1])
+        out = []
+        for row in ordered[start:]:
+            if self._matches(row):
+                out.append(row)
+                if len(out) >= self.row_limit:
+                    break
+        return out
+
+    def _check_not_null(self) -> None:
+        # Like Postgres, one bad row fails the whole statement
+        for row in self.payload:
+            for column in NOT_NULL.get(self.table, ()):
+                if row.get(column) is None:
+                    raise APIError(
+                        {
+                            "code": "23502",
+                            "message": f'null value in column "{column}" of '
+                            f'relation "{self.table}" violates not-null constraint',
+                        }
+                    )
+
+    def _select(self, rows):
+        if (
+            self.order_key
+            and not self.descending
+            and self.row_limit is not None
+            and self.row_range is None
+        ):
+            out = self._seek(rows)
+        else:
+            out = [r for r in rows if self._matches(r)]
+            if self.order_key:
+                out.sort(key=lambda r: r.get(self.order_key), reverse=self.descending)
+            if self.row_range:
+                out = out[self.row_range[0] : self.row_range[1] + 1]
+            if self.row_limit is not None:
+                out = out[: self.row_limit]
+        if self.db.max_rows is not None:
+            out = out[: self.db.max_rows]
+        if self.columns == "*":
+            return FakeResult([dict(r) for r in out])
+        columns = [c.strip() for c in self.columns.split(",")]
+        return FakeResult([{c: r.get(c) for c in columns} for r in out])
+
+    def _insert(self, rows):
+        inserted = []
+        for row in self.payload:
+            row = self.db.with_defaults(self.table, row)
+            rows.append(row)
+            inserted.append(row)
+        return FakeResult(inserted)
+
+    def _upsert(self, rows):
+        keys = (self.on_conflict or "id").split(",")
+        index = {tuple(r.get(k) for k in keys): r for r in rows}
+        written = []
+        for row in self.payload:
+            existing = index.get(tuple(row.get(k) for k in keys))
+            if existing is not None:
+                existing.update(row)
+                written.append(existing)
+            else:
+                row = self.db.with_defaults(self.table, row)
+                rows.append(row)
+                index[tuple(row.get(k) for k in keys)] = row
+                written.append(row)
+        return FakeResult(written)
+
+    def _update(self, rows):
+        updated = [r for r in rows if self._matches(r)]
+        for row in updated:
+            row.update(self.payload)
+        return FakeResult(updated)
+
+    def _delete(self, rows):
+        kept = [r for r in rows if not self._matches(r)]
+        removed = len(rows) - len(kept)
+        rows[:] = kept
+        return FakeResult([{}] * removed)
+
+
+class FakeSupabase:
+    """
+    In-memory stand-in for the supabase Client used by benchmarks.
+    Counts round trips so N+1 patterns show up as numbers. `max_rows`
+    caps every select like PostgREST's max-rows setting (1000 on hosted
+    Supabase), so unpaginated reads come back truncated as they would
+    in production. Writes are checked against the schema's NOT NULL
+    columns, and `failure_rate` makes that share of requests fail with a
+    connection error.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        max_rows: Optional[int] = None,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.max_rows = max_rows
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.versions: Dict[str, int] = {}
+        self._indexes: Dict[tuple, tuple] = {}
+        self.requests = 0
+        self.requests_by_table: Dict[str, int] = {}
+        self.latency = latency
+        self.lock = threading.Lock()
+
+    def with_defaults(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Column defaults from supabase/schema.sql (id, timestamps)."""
+        now = datetime.now(timezone.utc).isoformat()
+        defaults = {"id": str(uuid.uuid4())}
+        if table == "sent_papers":
+            defaults["sent_at"] = now
+        elif table == "subscribers":
+            defaults.update({"subscribed_at": now, "is_active": True})
+        elif table == "papers":
+            defaults["fetched_at"] = now
+        return {**defaults, **row}
+
+    def sorted_index(self, table: str, key: str, rows: List[Dict[str, Any]]):
+        """(keys, rows) of `table` sorted by `key`, rebuilt after writes."""
+        # Rows seeded by assigning `tables` directly don't bump the version
+        version = (self.versions.get(table, 0), id(rows), len(rows))
+        cached = self._indexes.get((table, key))
+        if cached is None or cached[0] != version:
+            ordered = sorted(
+                (r for r in rows if r.get(key) is not None), key=lambda r: r[key]
+            )
+            cached = (version, [r[key] for r in ordered], ordered)
+            self._indexes[(table, key)] = cached
+        return cached[1], cached[2]
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
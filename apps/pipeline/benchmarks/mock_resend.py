@@ -0,0 +1,133 @@
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Largest batch the real API accepts
+MAX_BATCH = 100
+
+
+def serve_mock_resend(
+    port: int = 8902,
+    latency: float = 0.2,
+    rate_limit_rate: float = 0.0,
+    seed: int = 0,
+    keep_html: bool = True,
+) -> ThreadingHTTPServer:
+    """
+    Local stand-in for the Resend API (POST /emails and /emails/batch).
+    Point RESEND_API_URL (or resend.api_url) at it. Accepted messages are
+    kept in `server.messages` (without their html unless `keep_html`),
+    with the wall-clock time each arrived in `server.received_at`; HTTP
+    calls are counted in `server.requests`. A `to` without "@" fails
+    validation: the whole batch is rejected unless the request asks for
+    `x-batch-validation: permissive`, which rejects just that message.
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body, headers: dict = None) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _accept(self, messages) -> None:
+            # Caller holds the lock
+            if not keep_html:
+                messages = [
+                    {k: v for k, v in m.items() if k != "html"} for m in messages
+                ]
+            server.messages.extend(messages)
+            server.received_at.extend([time.time()] * len(messages))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+            with lock:
+                server.requests += 1
+                limited = rng.random() < rate_limit_rate
+
+            if limited:
+                self._reply(
+                    429,
+                    {"statusCode": 429, "name": "rate_limit_exceeded"},
+                    {"retry-after": "1"},
+                )
+                return
+
+            path = self.path.rstrip("/")
+            if path == "/emails/batch":
+                if not isinstance(body, list) or len(body) > MAX_BATCH:
+                    self._reply(
+                        422, {"statusCode": 422, "name": "validation_error"}
+                    )
+                    return
+                errors = [
+                    {"index": i, "message": "Invalid `to` field."}
+                    for i, message in enumerate(body)
+                    if "@" not in str(message.get("to", ""))
+                ]
+                permissive = self.headers.get("x-batch-validation") == "permissive"
+                if errors and not permissive:
+                    self._reply(
+                        422, {"statusCode": 422, "name": "validation_error"}
+                    )
+                    return
+                key = self.headers.get("Idempotency-Key")
+                with lock:
+                    if key and key in server.idempotent:
+                        # Replayed request: same ids, nothing sent again
+                        self._reply(200, server.idempotent[key])
+                        return
+                    invalid = {error["index"] for error in errors}
+                    valid = [m for i, m in enumerate(body) if i not in invalid]
+                    reply = {"data": [{"id": str(uuid.uuid4())} for _ in valid]}
+                    if permissive:
+                        reply["errors"] = errors
+                    self._accept(valid)
+                    if key:
+                        server.idempotent[key] = reply
+                self._reply(200, reply)
+            elif path == "/emails":
+                with lock:
+                    self._accept([body])
+                self._reply(200, {"id": str(uuid.uuid4())})
+            else:
+                self._reply(404, {"statusCode": 404, "name": "not_found"})
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.messages = []
+    server.received_at = []
+    server.requests = 0
+    server.idempotent = {}
+    return server
+
+
+def main():
+    """Run the local mock Resend API"""
+    parser = argparse.ArgumentParser(description="Local mock Resend API")
+    parser.add_argument("--port", type=int, default=8902)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = serve_mock_resend(args.port, args.latency, args.rate_limit_rate)
+    print(f"Mock Resend listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
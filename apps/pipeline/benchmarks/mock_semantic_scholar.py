@@ -0,0 +1,223 @@
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Same names the fetcher sends as `query`
+FIELD_QUERIES = {
+    "Computer Science": "cs",
+    "Physics": "physics",
+    "Biology": "bio",
+    "Mathematics": "math",
+}
+FIELDS = list(FIELD_QUERIES.values())
+
+# Limits of the real /paper/search endpoint
+SEARCH_PAGE_SIZE = 100
+SEARCH_MAX_RESULTS = 1000
+BULK_PAGE_SIZE = 1000
+BATCH_MAX_IDS = 500
+
+WORDS = (
+    "adaptive quantum neural sparse protein lattice graph stochastic "
+    "topological genome transformer manifold catalytic entropy kernel "
+    "diffusion spectral cellular bayesian tensor"
+).split()
+
+
+def synthetic_paper(field: str, index: int, seed: int = 0) -> dict:
+    """
+    Deterministic paper `index` of `field`. Every tenth paper is the
+    previous field's paper `index - 1` (same paperId and DOI), so
+    cross-field dedup has work to do.
+    """
+    owner = field
+    if index % 10 == 9:
+        owner = FIELDS[(FIELDS.index(field) - 1) % len(FIELDS)]
+        index -= 1
+    rng = random.Random(f"{seed}:{owner}:{index}")
+    title = " ".join(rng.choice(WORDS) for _ in range(8)).capitalize()
+    published = datetime.now() - timedelta(days=rng.randint(0, 6))
+    paper_id = f"{owner}{index:07d}"
+    return {
+        "paperId": paper_id,
+        "externalIds": {"DOI": f"10.5555/{paper_id}"},
+        "title": f"{title} ({owner} {index})",
+        "abstract": " ".join(rng.choice(WORDS) for _ in range(120)),
+        "authors": [
+            {"authorId": str(rng.randint(1, 10**6)), "name": f"Author {rng.randint(1, 999)}"}
+            for _ in range(rng.randint(1, 6))
+        ],
+        "citationCount": int(rng.paretovariate(1.2)) - 1,
+        "influentialCitationCount": rng.randint(0, 3),
+        "publicationDate": published.strftime("%Y-%m-%d"),
+        "url": f"https://www.semanticscholar.org/paper/{paper_id}",
+        "fieldsOfStudy": [owner],
+    }
+
+
+def serve_mock_semantic_scholar(
+    port: int = 8904,
+    papers_per_field: int = 200,
+    latency: float = 0.05,
+    seed: int = 0,
+) -> ThreadingHTTPServer:
+    """
+    Local stand-in for the Semantic Scholar Graph API (/paper/search with
+    offset paging, /paper/search/bulk with continuation tokens, POST
+    /paper/batch), serving `papers_per_field` synthetic papers per field,
+    filtered by the `publicationDateOrYear` start date. Point
+    SEMANTIC_SCHOLAR_API_URL at http://127.0.0.1:<port>/graph/v1.
+    `server.papers_served` counts papers returned and `server.bytes_served`
+    response bytes; raising
+    `server.citation_growth` adds that many citations to every paper, as if
+    time had passed.
+    """
+    lock = threading.Lock()
+    matches_cache = {}
+    by_id = {}
+
+    def lookup(paper_id: str):
+        if not by_id:
+            for field in FIELDS:
+                for i in range(papers_per_field):
+                    paper = synthetic_paper(field, i, seed)
+                    by_id[paper["paperId"]] = paper
+        return by_id.get(paper_id)
+
+    def current(papers: list) -> list:
+        growth = server.citation_growth
+        if not growth:
+            return papers
+        return [
+            {**p, "citationCount": p["citationCount"] + growth} if p else p
+            for p in papers
+        ]
+
+    def matches(field: str, since: str) -> list:
+        key = (field, since)
+        if key not in matches_cache:
+            papers = (synthetic_paper(field, i, seed) for i in range(papers_per_field))
+            matches_cache[key] = [p for p in papers if p["publicationDate"] >= since]
+        return matches_cache[key]
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            with lock:
+                server.bytes_served += len(payload)
+
+        def _served(self, count: int) -> None:
+            with lock:
+                server.papers_served += count
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            time.sleep(latency)
+            with lock:
+                server.requests += 1
+
+            field = FIELD_QUERIES.get(query.get("query", [""])[0])
+            if field is None:
+                self._reply(200, {"total": 0, "offset": 0, "data": []})
+                return
+
+            since = query.get("publicationDateOrYear", [""])[0].split(":")[0]
+            with lock:
+                papers = matches(field, since)
+            path = url.path.rstrip("/")
+            if path.endswith("/paper/search/bulk"):
+                start = int(query.get("token", ["0"])[0])
+                end = min(start + BULK_PAGE_SIZE, len(papers))
+                body = {"total": len(papers), "data": current(papers[start:end])}
+                if end < len(papers):
+                    body["token"] = str(end)
+                self._served(end - start)
+                self._reply(200, body)
+            elif path.endswith("/paper/search"):
+                offset = int(query.get("offset", ["0"])[0])
+                limit = int(query.get("limit", ["100"])[0])
+                if limit > SEARCH_PAGE_SIZE or offset + limit > SEARCH_MAX_RESULTS:
+                    self._reply(400, {"error": "Requested data exceeds search limits"})
+                    return
+                total = min(len(papers), SEARCH_MAX_RESULTS)
+                end = min(offset + limit, total)
+                body = {
+                    "total": len(papers),
+                    "offset": offset,
+                    "data": current(papers[offset:end]),
+                }
+                if end < total:
+                    body["next"] = end
+                self._served(max(0, end - offset))
+                self._reply(200, body)
+            else:
+                self._reply(404, {"error": "Not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+            with lock:
+                server.requests += 1
+
+            if not url.path.rstrip("/").endswith("/paper/batch"):
+                self._reply(404, {"error": "Not found"})
+                return
+            ids = body.get("ids") or []
+            if len(ids) > BATCH_MAX_IDS:
+                self._reply(400, {"error": "Cannot process more than 500 ids"})
+                return
+
+            fields = query.get("fields", [""])[0].split(",")
+            with lock:
+                papers = current([lookup(pid) for pid in ids])
+            data = [
+                {"paperId": p["paperId"], **{f: p.get(f) for f in fields if f}}
+                if p
+                else None
+                for p in papers
+            ]
+            self._served(sum(1 for p in data if p))
+            self._reply(200, data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.requests = 0
+    server.papers_served = 0
+    server.bytes_served = 0
+    server.citation_growth = 0
+    return server
+
+
+def main():
+    """Run the local mock Semantic Scholar API"""
+    parser = argparse.ArgumentParser(description="Local mock Semantic Scholar API")
+    parser.add_argument("--port", type=int, default=8904)
+    parser.add_argument("--papers-per-field", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = serve_mock_semantic_scholar(
+        args.port, args.papers_per_field, args.latency
+    )
+    print(f"Mock Semantic Scholar listening on http://127.0.0.1:{args.port}/graph/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
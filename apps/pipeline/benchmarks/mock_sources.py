@@ -0,0 +1,102 @@
+import os
+import time
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Recorded arXiv feeds by the category prefix in search_query
+ARXIV_FIXTURES = {"cat:cs.": "arxiv_cs.xml", "cat:q-bio.": "arxiv_bio.xml"}
+
+# Start of the window the fixtures were recorded for (submittedDate/pdat);
+# one arXiv entry predates it, so the adapter's cutoff has work to do
+FIXTURE_WINDOW_START = "2026-10-11"
+
+EMPTY_FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <opensearch:totalResults xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">0</opensearch:totalResults>
+</feed>
+"""
+
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def serve_mock_sources(
+    port: int = 8905, latency: float = 0.05
+) -> ThreadingHTTPServer:
+    """
+    Local stand-in for the arXiv API (/api/query) and PubMed E-utilities
+    (/eutils/esearch.fcgi, /eutils/efetch.fcgi), replaying the recorded
+    responses in benchmarks/fixtures. Point ARXIV_API_URL at
+    http://127.0.0.1:<port>/api/query and PUBMED_API_URL at
+    http://127.0.0.1:<port>/eutils. Fixtures are one page each, so later
+    arXiv pages are empty. `server.requests` counts requests per API.
+    """
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _count(self, api: str) -> None:
+            with lock:
+                server.requests[api] = server.requests.get(api, 0) + 1
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            path = url.path.rstrip("/")
+            time.sleep(latency)
+
+            if path.endswith("/api/query"):
+                self._count("arxiv")
+                search = query.get("search_query", [""])[0]
+                start = int(query.get("start", ["0"])[0])
+                body = EMPTY_FEED.encode("utf-8")
+                for prefix, name in ARXIV_FIXTURES.items():
+                    if prefix in search and start == 0:
+                        body = read_fixture(name)
+                        break
+                self._reply(200, body, "application/atom+xml; charset=utf-8")
+            elif path.endswith("/esearch.fcgi"):
+                self._count("pubmed")
+                body = read_fixture("pubmed_esearch.json")
+                self._reply(200, body, "application/json")
+            elif path.endswith("/efetch.fcgi"):
+                self._count("pubmed")
+                self._reply(200, read_fixture("pubmed_efetch.xml"), "text/xml")
+            else:
+                self._reply(404, b"Not found", "text/plain")
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.requests = {}
+    return server
+
+
+def main():
+    """Run the local mock arXiv and PubMed APIs"""
+    parser = argparse.ArgumentParser(description="Local mock arXiv and PubMed APIs")
+    parser.add_argument("--port", type=int, default=8905)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = serve_mock_sources(args.port, args.latency)
+    print(f"Mock arXiv listening on http://127.0.0.1:{args.port}/api/query")
+    print(f"Mock PubMed listening on http://127.0.0.1:{args.port}/eutils")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
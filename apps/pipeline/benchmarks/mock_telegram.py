@@ -0,0 +1,161 @@
+import json
+import time
+import argparse
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Telegram rejects longer message texts
+MAX_MESSAGE_LENGTH = 4096
+
+
+def serve_mock_telegram(
+    port: int = 8903,
+    latency: float = 0.1,
+    global_rps: float = 30.0,
+    per_chat_interval: float = 1.0,
+    retry_after: int = 1,
+    keep_text: bool = True,
+) -> ThreadingHTTPServer:
+    """
+    Local stand-in for the Bot API (getMe, sendMessage). Point
+    TELEGRAM_BASE_URL at http://127.0.0.1:<port>/bot. Enforces the global
+    and per-chat limits with 429 + retry_after like the real flood control,
+    and rejects texts over 4096 characters.
+    Delivered texts are kept in `server.messages` as (chat_id, text), the
+    text left empty unless `keep_text`, and the wall-clock time each
+    arrived in `server.received_at`.
+    """
+    lock = threading.Lock()
+    # Global budget as a token bucket allowing bursts of one second's worth
+    bucket = {"tokens": global_rps, "updated": time.monotonic()}
+    last_by_chat = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _params(self) -> dict:
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length).decode("utf-8")
+            if "json" in (self.headers.get("Content-Type") or ""):
+                return json.loads(raw or "{}")
+            return {k: v[0] for k, v in parse_qs(raw).items()}
+
+        def _flood(self) -> None:
+            self._reply(
+                429,
+                {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                },
+            )
+
+        def do_POST(self):
+            params = self._params()
+            method = self.path.rstrip("/").rsplit("/", 1)[-1]
+            time.sleep(latency)
+
+            if method == "getMe":
+                self._reply(
+                    200,
+                    {
+                        "ok": True,
+                        "result": {
+                            "id": 1,
+                            "is_bot": True,
+                            "first_name": "everymorning",
+                            "username": "everymorning_bot",
+                        },
+                    },
+                )
+                return
+            if method != "sendMessage":
+                self._reply(
+                    404, {"ok": False, "error_code": 404, "description": "Not Found"}
+                )
+                return
+
+            chat_id = str(params.get("chat_id"))
+            text = params.get("text") or ""
+            now = time.monotonic()
+            with lock:
+                server.requests += 1
+                bucket["tokens"] = min(
+                    global_rps,
+                    bucket["tokens"] + (now - bucket["updated"]) * global_rps,
+                )
+                bucket["updated"] = now
+                if bucket["tokens"] < 1 or (
+                    now - last_by_chat.get(chat_id, -1e9) < per_chat_interval * 0.9
+                ):
+                    server.rate_limited += 1
+                    flooded = True
+                else:
+                    flooded = False
+                    bucket["tokens"] -= 1
+                    last_by_chat[chat_id] = now
+                    if len(text) <= MAX_MESSAGE_LENGTH:
+                        server.messages.append((chat_id, text if keep_text else ""))
+                        server.received_at.append(time.time())
+                        message_id = len(server.messages)
+
+            if flooded:
+                self._flood()
+                return
+            if len(text) > MAX_MESSAGE_LENGTH:
+                self._reply(
+                    400,
+                    {
+                        "ok": False,
+                        "error_code": 400,
+                        "description": "Bad Request: message is too long",
+                    },
+                )
+                return
+            self._reply(
+                200,
+                {
+                    "ok": True,
+                    "result": {
+                        "message_id": message_id,
+                        "date": int(time.time()),
+                        "chat": {"id": int(chat_id), "type": "private"},
+                        "text": text,
+                    },
+                },
+            )
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.messages = []
+    server.received_at = []
+    server.requests = 0
+    server.rate_limited = 0
+    return server
+
+
+def main():
+    """Run the local mock Telegram Bot API"""
+    parser = argparse.ArgumentParser(description="Local mock Telegram Bot API")
+    parser.add_argument("--port", type=int, default=8903)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--global-rps", type=float, default=30.0)
+    args = parser.parse_args()
+
+    server = serve_mock_telegram(args.port, args.latency, args.global_rps)
+    print(f"Mock Telegram listening on http://127.0.0.1:{args.port}/bot")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Optional
+
+from src.db import (
+    get_supabase_client,
+    iter_table_pages,
+    bulk_upsert,
+    DB_PAGE_SIZE,
+    DB_CHUNK_SIZE,
+)
+from src.fetcher import (
+    SEMANTIC_SCHOLAR_API,
+    get_semantic_scholar_limiter,
+    semantic_scholar_headers,
+)
+from src.http_client import HttpClient
+from src.rate_limiter import TokenBucket
+from src.metrics import timed, increment
+from src.scorer import rescore_rows, SCORE_COLUMNS
+
+CITATION_FIELDS = "citationCount,influentialCitationCount"
+
+# POST /paper/batch accepts at most 500 ids per request
+BATCH_MAX_IDS = 500
+
+# Semantic Scholar id -> {"citationCount": ..., "influentialCitationCount": ...}
+CitationCounts = Dict[str, Dict[str, int]]
+
+# How /paper/batch accepts ids of papers fetched from other sources
+ID_PREFIXES = {"arxiv": "ARXIV:", "pubmed": "PMID:"}
+
+
+def semantic_scholar_id(source: str, external_id: Optional[str]) -> Optional[str]:
+    """The id to look a stored paper up by on Semantic Scholar."""
+    if not external_id:
+        return None
+    return ID_PREFIXES.get(source, "") + external_id
+
+
+def paper_lookup_id(paper: Dict[str, Any]) -> Optional[str]:
+    source = paper.get("source", "semantic_scholar")
+    return semantic_scholar_id(source, paper.get("sourceId") or paper.get("paperId"))
+
+
+async def fetch_citation_counts_async(
+    paper_ids: Iterable[str],
+    client: Optional[HttpClient] = None,
+    limiter: Optional[TokenBucket] = None,
+    batch_size: int = BATCH_MAX_IDS,
+    max_retries: int = 3,
+) -> CitationCounts:
+    """
+    Current citation counts for `paper_ids` from POST /paper/batch.
+    Ids go out in batches of up to 500, sent concurrently; every request
+    takes a token from the shared Semantic Scholar limiter. A batch that
+    still fails after retries is skipped, and ids Semantic Scholar doesn't
+    know are left out, so callers keep the counts they have.
+    """
+    if limiter is None:
+        limiter = get_semantic_scholar_limiter()
+    if client is None:
+        async with HttpClient(backoff_base=5.0) as own_client:
+            return await fetch_citation_counts_async(
+                paper_ids, own_client, limiter, batch_size, max_retries
+            )
+
+    ids = list(dict.fromkeys(pid for pid in paper_ids if pid))
+    batches = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+    url = f"{SEMANTIC_SCHOLAR_API}/paper/batch"
+    headers = semantic_scholar_headers()
+
+    async def fetch_batch(batch: List[str]) -> CitationCounts:
+        try:
+            response = await client.post(
+                url,
+                params={"fields": CITATION_FIELDS},
+                json={"ids": batch},
+                headers=headers,
+                limiter=limiter,
+                max_retries=max_retries,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            increment("citations.failed_batches")
+            print(f"Citation batch of {len(batch)} ids failed: {e}")
+            return {}
+
+        increment("citations.batches")
+        # Results line up with the ids sent; unknown ids come back as null
+        counts = {}
+        for paper_id, paper in zip(batch, data):
+            if paper:
+                counts[paper_id] = {
+                    "citationCount": paper.get("citationCount") or 0,
+                    "influentialCitationCount": paper.get("influentialCitationCount")
+                    or 0,
+                }
+        return counts
+
+    counts: CitationCounts = {}
+    for result in await asyncio.gather(*(fetch_batch(b) for b in batches)):
+        counts.update(result)
+    return counts
+
+
+@timed("citations.fetch")
+def fetch_citation_counts(
+    paper_ids: Iterable[str], batch_size: int = BATCH_MAX_IDS
+) -> CitationCounts:
+    """
+    Fetch current citation counts (sync wrapper)
+    """
+    return asyncio.run(fetch_citation_counts_async(paper_ids, batch_size=batch_size))
+
+
+def apply_citation_counts(
+    papers: Iterable[Dict[str, Any]], counts: CitationCounts
+) -> List[Dict[str, Any]]:
+    """
+    Write fresh counts into fetched paper dicts in place.
+    Returns the papers whose counts changed.
+    """
+    changed = []
+    for paper in papers:
+        fresh = counts.get(paper_lookup_id(paper))
+        if fresh is None:
+            continue
+        if (paper.get("citationCount") or 0) == fresh["citationCount"] and (
+            paper.get("influentialCitationCount") or 0
+        ) == fresh["influentialCitationCount"]:
+            continue
+        paper.update(fresh)
+        changed.append(paper)
+    increment("citations.changed", len(changed))
+    return changed
+
+
+def refresh_papers(papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Refresh citation counts of already fetched papers, e.g. the paper
+    store's window, without searching again. arXiv and PubMed papers are
+    looked up by their arXiv id and PMID. Returns the changed papers.
+    """
+    counts = fetch_citation_counts(paper_lookup_id(p) for p in papers)
+    return apply_citation_counts(papers, counts)
+
+
+@timed("citations.refresh_db")
+def refresh_citations_in_db(
+    days: int = 7,
+    page_size: int = DB_PAGE_SIZE,
+    chunk_size: int = DB_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """
+    Refresh citation counts of the papers published in the last `days`
+    days, from every source, and rescore them incrementally: one upsert
+    carries the new counts together with the score, and only rows whose
+    score signature changed are written.
+    """
+    supabase = get_supabase_client()
+    now = datetime.now()
+    cutoff = (now - timedelta(days=days)).date().isoformat()
+
+    def apply_filters(query):
+        return query.gte("published_at", cutoff)
+
+    rows = []
+    for page in iter_table_pages(
+        supabase,
+        "papers",
+        SCORE_COLUMNS,
+        page_size=page_size,
+        apply_filters=apply_filters,
+    ):
+        rows.extend(page)
+
+    lookup_ids = [
+        semantic_scholar_id(row["source"], row["external_id"]) for row in rows
+    ]
+    counts = fetch_citation_counts(lookup_ids)
+    refreshed = 0
+    for row, lookup_id in zip(rows, lookup_ids):
+        fresh = counts.get(lookup_id)
+        if fresh is None:
+            continue
+        if (
+            row.get("citation_count") != fresh["citationCount"]
+            or row.get("influential_citation_count")
+            != fresh["influentialCitationCount"]
+        ):
+            row["citation_count"] = fresh["citationCount"]
+            row["influential_citation_count"] = fresh["influentialCitationCount"]
+            refreshed += 1
+
+    # Stale signatures include every row whose counts just changed
+    changed = rescore_rows(rows, now)
+    by_id = {row["id"]: row for row in rows}
+    for update in changed:
+        row = by_id[update["id"]]
+        update["citation_count"] = row["citation_count"]
+        update["influential_citation_count"] = row["influential_citation_count"]
+
+    report = bulk_upsert(
+        supabase, "papers", changed, on_conflict="id", chunk_size=chunk_size
+    )
+    print(
+        f"Refreshed citations for {refreshed} of {len(rows)} papers, "
+        f"rescored {report['written']} ({report['failed']} failed)"
+    )
+    return {
+        "scanned": len(rows),
+        "found": len(counts),
+        "refreshed": refreshed,
+        "rescored": report["written"],
+        "failed": report["failed"],
+    }
+
+
+def main():
+    """
+    Main: Refresh citation counts and scores of this week's papers
+    """
+    refresh_citations_in_db(days=7)
+
+
+if __name__ == "__main__":
+    main()
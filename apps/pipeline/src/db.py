@@ -1,18 +1,106 @@
 import os
+import time
+import asyncio
+import threading
+import weakref
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Dict, Any, Iterable, Iterator, Callable, Optional, Set, Tuple
 
-from supabase import create_client, Client
+from postgrest.exceptions import APIError
+from supabase import create_client, acreate_client, Client, AsyncClient
 
+from src.metrics import timed, timer, increment
 
-def get_supabase_client() -> Client:
+# Rows per read page / per multi-row write request
+DB_PAGE_SIZE = 1000
+DB_CHUNK_SIZE = int(os.environ.get("DB_CHUNK_SIZE", "500"))
+
+# Retries of a write chunk after a transient error; rejected row data and
+# schema errors fail the same way every time, so they are never retried
+DB_WRITE_RETRIES = int(os.environ.get("DB_WRITE_RETRIES", "2"))
+
+# Process-wide client registry, keyed by (url, key). A Client keeps its own
+# HTTP connection pool, so reusing it makes every call after the first one
+# pure query time.
+_clients: Dict[Tuple[str, str], Client] = {}
+_clients_lock = threading.Lock()
+
+# Async clients are bound to the event loop they were created on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], AsyncClient]]" = weakref.WeakKeyDictionary()
+_async_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def _get_credentials() -> Tuple[str, str]:
     url = os.environ.get("SUPABASE_URL")
     key = os.environ.get("SUPABASE_ANON_KEY")
     if not url or not key:
         raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set")
-    return create_client(url, key)
+    return url, key
+
+
+def get_supabase_client() -> Client:
+    """
+    Shared sync client, created on first use. Thread-safe.
+    """
+    credentials = _get_credentials()
+    client = _clients.get(credentials)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(credentials)
+        if client is None:
+            client = create_client(*credentials)
+            _clients[credentials] = client
+        return client
+
+
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Shared async client for the running event loop (e.g. the Telegram bot),
+    created on first use. Safe for concurrent coroutines.
+    """
+    credentials = _get_credentials()
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(credentials)
+    if client is not None:
+        return client
+    lock = _async_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        client = clients.get(credentials)
+        if client is None:
+            client = await acreate_client(*credentials)
+            clients[credentials] = client
+        return client
+
+
+def check_supabase_health(supabase: Optional[Client] = None) -> bool:
+    """
+    Cheap round trip to confirm the shared client still works.
+    A failing client is dropped from the registry so the next
+    get_supabase_client() builds a fresh one.
+    """
+    try:
+        supabase = supabase or get_supabase_client()
+        supabase.table("subscribers").select("id").limit(1).execute()
+        return True
+    except Exception as e:
+        print(f"Supabase health check failed: {e}")
+        with _clients_lock:
+            for credentials, client in list(_clients.items()):
+                if client is supabase:
+                    del _clients[credentials]
+        return False
 
 
+def reset_supabase_clients() -> None:
+    """Forget all shared clients (e.g. after rotating credentials)."""
+    with _clients_lock:
+        _clients.clear()
+    _async_clients.clear()
+
+
+@timed("db.get_recently_sent_paper_ids")
 def get_recently_sent_paper_ids(subscriber_email: str, days: int = 7) -> List[str]:
     supabase = get_supabase_client()
     cutoff = (datetime.now() - timedelta(days=days)).isoformat()
@@ -29,6 +117,85 @@ def get_recently_sent_paper_ids(subscriber_email: str, days: int = 7) -> List[st
         return []
 
 
+@timed("db.get_recently_sent_map")
+def get_recently_sent_map(
+    emails: Iterable[str], days: int = 7, supabase: Optional[Client] = None
+) -> Dict[str, Set[str]]:
+    """
+    Prefetch recently sent paper ids for many subscribers at once.
+    One paginated scan of the `sent_papers` window replaces a query per
+    subscriber; returns email -> set of paper ids (empty set if none).
+    """
+    supabase = supabase or get_supabase_client()
+    sent: Dict[str, Set[str]] = {email: set() for email in emails}
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+    try:
+        for rows in iter_table_pages(
+            supabase,
+            "sent_papers",
+            "id,subscriber_email,paper_id",
+            apply_filters=lambda query: query.gte("sent_at", cutoff),
+        ):
+            for row in rows:
+                ids = sent.get(row["subscriber_email"])
+                if ids is not None:
+                    ids.add(row["paper_id"])
+    except Exception as e:
+        print(f"Error fetching sent papers: {e}")
+    return sent
+
+
+class SentPapersWriter:
+    """
+    Buffered writer for `sent_papers`: rows are queued per send and
+    inserted in batches every `flush_every` rows and on flush()/exit.
+    Safe to share between delivery threads.
+    """
+
+    def __init__(
+        self, supabase: Optional[Client] = None, flush_every: int = DB_CHUNK_SIZE
+    ):
+        self.supabase = supabase or get_supabase_client()
+        self.flush_every = flush_every
+        self.rows: List[Dict[str, Any]] = []
+        self.written = 0
+        self._lock = threading.Lock()
+
+    def add(self, paper_ids: List[str], subscriber_email: str) -> None:
+        with self._lock:
+            self.rows.extend(
+                {"paper_id": pid, "subscriber_email": subscriber_email}
+                for pid in paper_ids
+            )
+            if len(self.rows) < self.flush_every:
+                return
+            rows, self.rows = self.rows, []
+        self._insert(rows)
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self.rows = self.rows, []
+        self._insert(rows)
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        for start in range(0, len(rows), self.flush_every):
+            chunk = rows[start : start + self.flush_every]
+            try:
+                with timer("db.sent_papers_insert"):
+                    self.supabase.table("sent_papers").insert(chunk).execute()
+                with self._lock:
+                    self.written += len(chunk)
+            except Exception as e:
+                print(f"Error saving sent papers: {e}")
+
+    def __enter__(self) -> "SentPapersWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
+
+
+@timed("db.save_sent_papers")
 def save_sent_papers(paper_ids: List[str], subscriber_email: str) -> None:
     supabase = get_supabase_client()
     rows = [
@@ -38,3 +205,147 @@ def save_sent_papers(paper_ids: List[str], subscriber_email: str) -> None:
         supabase.table("sent_papers").insert(rows).execute()
     except Exception as e:
         print(f"Error saving sent papers: {e}")
+
+
+def iter_table_pages(
+    supabase: Client,
+    table: str,
+    columns: str,
+    page_size: int = DB_PAGE_SIZE,
+    key: str = "id",
+    apply_filters: Optional[Callable] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Read a table page by page with keyset pagination on `key`.
+    Only `columns` are fetched; `apply_filters` can narrow the query.
+    """
+    last_key = None
+    while True:
+        query = supabase.table(table).select(columns).order(key).limit(page_size)
+        if apply_filters is not None:
+            query = apply_filters(query)
+        if last_key is not None:
+            query = query.gt(key, last_key)
+        with timer(f"db.{table}.page"):
+            rows = query.execute().data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_key = rows[-1][key]
+
+
+def sqlstate_class(error: Exception) -> str:
+    """First two characters of a PostgREST error's SQLSTATE, else ''."""
+    if not isinstance(error, APIError):
+        return ""
+    return str(error.code or "")[:2]
+
+
+def is_row_error(error: Exception) -> bool:
+    """
+    Whether the database rejected the statement because of the data in
+    some row (SQLSTATE class 22, data exception, or 23, integrity
+    constraint violation), as opposed to a transient or schema error.
+    """
+    return sqlstate_class(error) in ("22", "23")
+
+
+def is_schema_error(error: Exception) -> bool:
+    """
+    Whether the statement itself is invalid (SQLSTATE class 42, e.g. an
+    unknown column or a missing permission), whatever rows it carries.
+    """
+    return sqlstate_class(error) == "42"
+
+
+def bulk_upsert(
+    supabase: Client,
+    table: str,
+    rows: List[Dict[str, Any]],
+    on_conflict: str,
+    chunk_size: int = DB_CHUNK_SIZE,
+    retries: int = DB_WRITE_RETRIES,
+    backoff: float = 0.5,
+) -> Dict[str, Any]:
+    """
+    Upsert rows with one multi-row request per chunk.
+    Transient failures are retried `retries` times with exponential
+    backoff; row data and schema errors are not. When the database
+    rejects a chunk over a row's data, the chunk is split in half and
+    each half written on its own, recursively, until the offending rows
+    are isolated; everything else gets written.
+    Returns a report: rows written and failed, requests made, the failed
+    rows and the first few error messages.
+    """
+    report: Dict[str, Any] = {
+        "written": 0,
+        "failed": 0,
+        "requests": 0,
+        "failed_rows": [],
+        "errors": [],
+    }
+
+    def attempt(chunk: List[Dict[str, Any]]) -> Optional[Exception]:
+        for attempt_no in range(retries + 1):
+            if attempt_no:
+                increment(f"db.{table}.upsert_retries")
+                time.sleep(backoff * 2 ** (attempt_no - 1))
+            report["requests"] += 1
+            try:
+                with timer(f"db.{table}.upsert"):
+                    supabase.table(table).upsert(
+                        chunk, on_conflict=on_conflict
+                    ).execute()
+                return None
+            except Exception as e:
+                error = e
+                # Resending the same statement would be rejected the same way
+                if is_row_error(e) or is_schema_error(e):
+                    break
+        return error
+
+    def fail(chunk: List[Dict[str, Any]], error: Exception) -> None:
+        report["failed"] += len(chunk)
+        report["failed_rows"].extend(chunk)
+        if len(report["errors"]) < 10:
+            report["errors"].append(f"{len(chunk)} rows: {error}")
+
+    def write(chunk: List[Dict[str, Any]]) -> None:
+        error = attempt(chunk)
+        if error is None:
+            report["written"] += len(chunk)
+        elif len(chunk) > 1 and is_row_error(error):
+            # Postgres fails the whole statement for one bad row
+            increment(f"db.{table}.bisections")
+            middle = len(chunk) // 2
+            write(chunk[:middle])
+            write(chunk[middle:])
+        else:
+            fail(chunk, error)
+
+    for start in range(0, len(rows), chunk_size):
+        write(rows[start : start + chunk_size])
+
+    if report["failed"]:
+        increment(f"db.{table}.failed_rows", report["failed"])
+        print(
+            f"Failed to upsert {report['failed']} of {len(rows)} rows into "
+            f"{table}: {report['errors'][0]}"
+        )
+    return report
+
+
+def upsert_in_chunks(
+    supabase: Client,
+    table: str,
+    rows: List[Dict[str, Any]],
+    on_conflict: str,
+    chunk_size: int = DB_CHUNK_SIZE,
+) -> int:
+    """
+    Upsert rows with one multi-row request per chunk (see bulk_upsert).
+    Returns the number of rows written.
+    """
+    return bulk_upsert(supabase, table, rows, on_conflict, chunk_size)["written"]
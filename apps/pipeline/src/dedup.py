@@ -0,0 +1,113 @@
+import re
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    if not title:
+        return ""
+    words = re.sub(r"[^\w\s]", " ", title.lower()).split()
+    return " ".join(words)
+
+
+def get_doi(paper: Dict[str, Any]) -> Optional[str]:
+    external_ids = paper.get("externalIds") or {}
+    doi = external_ids.get("DOI") or paper.get("doi")
+    return doi.strip().lower() if doi else None
+
+
+class PaperDeduplicator:
+    """
+    Streaming dedup index keyed on paperId, then DOI, arXiv and PubMed ids,
+    then normalized title, so copies of a paper from different sources
+    collapse too. A title match only counts when the papers' ids don't
+    conflict, so two different papers called "Editorial" are both kept.
+
+    The first copy of a paper is passed through; later copies are dropped
+    and their `field` is merged into the first copy's `fields` list. Since
+    the first copy has already been handed downstream, consumers see the
+    merged tags once the stream is exhausted.
+    """
+
+    def __init__(self):
+        self._index: Dict[tuple, Dict[str, Any]] = {}
+        self.removed: Counter = Counter()
+
+    @property
+    def duplicates(self) -> int:
+        return sum(self.removed.values())
+
+    def _ids(self, paper: Dict[str, Any]) -> Dict[str, str]:
+        """Identifiers by kind; paperIds only compare within one source."""
+        ids = {}
+        if paper.get("paperId"):
+            source = paper.get("source", "semantic_scholar")
+            ids[f"paperId:{source}"] = paper["paperId"]
+        doi = get_doi(paper)
+        if doi:
+            ids["doi"] = doi
+        external_ids = paper.get("externalIds") or {}
+        for name in ("ArXiv", "PubMed"):
+            if external_ids.get(name):
+                ids[name.lower()] = str(external_ids[name]).strip().lower()
+        return ids
+
+    def _conflicts(self, paper: Dict[str, Any], other: Dict[str, Any]) -> bool:
+        """True if both papers carry an id of the same kind and they differ."""
+        other_ids = self._ids(other)
+        return any(
+            other_ids.get(kind, value) != value
+            for kind, value in self._ids(paper).items()
+        )
+
+    def _keys(self, paper: Dict[str, Any]) -> List[tuple]:
+        keys = [
+            (kind.split(":")[0], value) for kind, value in self._ids(paper).items()
+        ]
+        title = normalize_title(paper.get("title"))
+        if title:
+            keys.append(("title", title))
+        return keys
+
+    def add(self, paper: Dict[str, Any]) -> bool:
+        """Index a paper. Returns False if it duplicates one already seen."""
+        keys = self._keys(paper)
+
+        for key in keys:
+            original = self._index.get(key)
+            if original is None:
+                continue
+            if key[0] == "title" and self._conflicts(paper, original):
+                continue
+            field = paper.get("field")
+            if field and field not in original["fields"]:
+                original["fields"].append(field)
+            # Remember the other identifiers so later copies match too
+            for other in keys:
+                self._index.setdefault(other, original)
+            self.removed[key[0]] += 1
+            return False
+
+        paper["fields"] = [paper["field"]] if paper.get("field") else []
+        for key in keys:
+            self._index.setdefault(key, paper)
+        return True
+
+    def dedupe(self, papers: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        for paper in papers:
+            if self.add(paper):
+                yield paper
+
+    def summary(self) -> str:
+        if not self.removed:
+            return "0 duplicates removed"
+        by_key = ", ".join(f"{key}: {count}" for key, count in self.removed.items())
+        return f"{self.duplicates} duplicates removed ({by_key})"
+
+
+def dedupe_papers(papers: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Remove duplicate papers, merging their field tags
+    """
+    return list(PaperDeduplicator().dedupe(papers))
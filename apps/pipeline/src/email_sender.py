@@ -1,9 +1,22 @@
 import os
 import html
-from typing import List, Dict, Any, Optional
+import json
+import asyncio
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
 from urllib.parse import quote
 import resend
 
+from src.http_client import HttpClient
+from src.rate_limiter import TokenBucket
+from src.metrics import timed, increment
+
+# Resend accepts up to 100 messages per batch request
+RESEND_BATCH_SIZE = int(os.environ.get("RESEND_BATCH_SIZE", "100"))
+# Resend's default API rate limit is 2 requests per second
+RESEND_RPS = float(os.environ.get("RESEND_RPS", "2"))
+RESEND_CONCURRENCY = int(os.environ.get("RESEND_CONCURRENCY", "4"))
+
 
 FIELD_MAPPING = {
     "cs": "Computer Science",
@@ -68,30 +81,27 @@ def convert_bullets_to_html(text: str) -> str:
     return html.escape(text)
 
 
-def format_email_html(
-    papers: List[Dict[str, Any]], recipient_email: Optional[str] = None
-) -> str:
-    papers_html = ""
-    for idx, paper in enumerate(papers, 1):
-        title = html.escape(paper.get("title", "Unknown"))
-        raw_summary = paper.get("summary", "No summary available")
-        summary_html = convert_bullets_to_html(raw_summary)
-        selection_reason = html.escape(paper.get("selection_reason", ""))
-        raw_url = paper.get("url", "#")
-        url = html.escape(raw_url) if raw_url else "#"
-        field = paper.get("field", "")
-
-        paper_number = f"0{idx}" if idx < 10 else str(idx)
-
-        ai_prompt = generate_ai_prompt(
-            paper.get("title", ""),
-            field,
-            paper.get("summary", ""),
-            paper.get("url", ""),
-        )
-        escaped_prompt = html.escape(ai_prompt)
+def render_paper_card(paper: Dict[str, Any], idx: int) -> str:
+    """HTML card for one paper at position idx (1-based)."""
+    title = html.escape(paper.get("title", "Unknown"))
+    raw_summary = paper.get("summary", "No summary available")
+    summary_html = convert_bullets_to_html(raw_summary)
+    selection_reason = html.escape(paper.get("selection_reason", ""))
+    raw_url = paper.get("url", "#")
+    url = html.escape(raw_url) if raw_url else "#"
+    field = paper.get("field", "")
 
-        papers_html += f'''
+    paper_number = f"0{idx}" if idx < 10 else str(idx)
+
+    ai_prompt = generate_ai_prompt(
+        paper.get("title", ""),
+        field,
+        paper.get("summary", ""),
+        paper.get("url", ""),
+    )
+    escaped_prompt = html.escape(ai_prompt)
+
+    return f'''
           <tr>
             <td style="padding: 0 0 20px 0;">
               <table width="100%" cellpadding="0" cellspacing="0" style="background: #f9f9fb; border: 1px solid #e2e2e8; border-radius: 8px;">
@@ -128,14 +138,17 @@ def format_email_html(
           </tr>
         '''
 
-    unsubscribe_link = ""
+
+def render_unsubscribe_link(recipient_email: Optional[str] = None) -> str:
     if recipient_email:
         encoded_email = quote(recipient_email)
-        unsubscribe_link = f'<a href="https://stemem.info/unsubscribe?email={encoded_email}" style="color: #6366f1; text-decoration: none;">Unsubscribe</a>'
-    else:
-        unsubscribe_link = "Unsubscribe"
+        return f'<a href="https://stemem.info/unsubscribe?email={encoded_email}" style="color: #6366f1; text-decoration: none;">Unsubscribe</a>'
+    return "Unsubscribe"
 
-    email_html = f"""<!DOCTYPE html>
+
+def render_document(papers_html: str, unsubscribe_link: str) -> str:
+    """Wrap rendered paper cards in the full email document."""
+    return f"""<!DOCTYPE html>
 <html>
 <head>
   <meta charset="utf-8">
@@ -237,17 +250,73 @@ def format_email_html(
   <![endif]-->
 </body>
 </html>"""
-    return email_html
 
 
+def format_email_html(
+    papers: List[Dict[str, Any]], recipient_email: Optional[str] = None
+) -> str:
+    papers_html = "".join(
+        render_paper_card(paper, idx) for idx, paper in enumerate(papers, 1)
+    )
+    return render_document(papers_html, render_unsubscribe_link(recipient_email))
+
+
+class EmailRenderer:
+    """
+    Render-once templating for a send run.
+    Each paper card is rendered once per position and each distinct paper
+    list is assembled once; a recipient only costs splicing in their
+    unsubscribe link. Output is identical to format_email_html.
+    Papers are assumed not to change during the run.
+    """
+
+    # Stands in for the unsubscribe link while the document is cached
+    _SLOT = "\x00unsubscribe\x00"
+
+    def __init__(self):
+        self._cards: Dict[tuple, str] = {}
+        self._documents: Dict[tuple, tuple] = {}
+
+    @staticmethod
+    def _paper_key(paper: Dict[str, Any]):
+        return paper.get("paperId") or id(paper)
+
+    def _card(self, paper: Dict[str, Any], idx: int) -> str:
+        key = (self._paper_key(paper), idx)
+        card = self._cards.get(key)
+        if card is None:
+            card = self._cards[key] = render_paper_card(paper, idx)
+        return card
+
+    def render(
+        self, papers: List[Dict[str, Any]], recipient_email: Optional[str] = None
+    ) -> str:
+        key = tuple(self._paper_key(p) for p in papers)
+        parts = self._documents.get(key)
+        if parts is None:
+            papers_html = "".join(
+                self._card(paper, idx) for idx, paper in enumerate(papers, 1)
+            )
+            # The link comes after every card, so the last slot is the real one
+            head, _, tail = render_document(papers_html, self._SLOT).rpartition(
+                self._SLOT
+            )
+            parts = self._documents[key] = (head, tail)
+        head, tail = parts
+        return "".join((head, render_unsubscribe_link(recipient_email), tail))
+
+
+@timed("email.send_digest_email")
 def send_digest_email(
     to_emails: List[str],
     papers: List[Dict[str, Any]],
     from_email: Optional[str] = None,
     recipient_email: Optional[str] = None,
+    renderer: Optional[EmailRenderer] = None,
 ) -> Dict[str, Any]:
     """Send digest email to subscribers."""
     get_resend_client()
+    renderer = renderer or EmailRenderer()
 
     if from_email is None:
         from_email = os.environ.get(
@@ -257,7 +326,7 @@ def send_digest_email(
     results = []
     for email in to_emails:
         masked = mask_email(email)
-        html_content = format_email_html(papers, recipient_email=email)
+        html_content = renderer.render(papers, recipient_email=email)
         try:
             result = resend.Emails.send(
                 {
@@ -280,6 +349,144 @@ def send_digest_email(
     }
 
 
+def build_email_message(
+    email: str,
+    papers: List[Dict[str, Any]],
+    from_email: str,
+    renderer: EmailRenderer,
+) -> Dict[str, Any]:
+    return {
+        "from": from_email,
+        "to": email,
+        "subject": "Top3 Fresh STEM Papers",
+        "html": renderer.render(papers, recipient_email=email),
+    }
+
+
+@timed("email.batch")
+async def send_email_batch_async(
+    client: HttpClient,
+    limiter: TokenBucket,
+    messages: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Send up to RESEND_BATCH_SIZE messages in one POST /emails/batch.
+    Permissive validation: Resend sends the valid messages and reports the
+    rejected ones by index, so one bad address only fails itself.
+    Returns one result per message, in order.
+    """
+    emails = [m["to"] for m in messages]
+    # Same payload, same key: a retried batch is never delivered twice
+    idempotency_key = hashlib.sha256(
+        json.dumps(messages, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    try:
+        response = await client.post(
+            f"{resend.api_url}/emails/batch",
+            limiter=limiter,
+            json=messages,
+            headers={
+                "Authorization": f"Bearer {resend.api_key}",
+                "Idempotency-Key": idempotency_key,
+                "x-batch-validation": "permissive",
+            },
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        body = response.json()
+        data = body.get("data") or []
+        rejected = {
+            error.get("index"): error.get("message")
+            for error in body.get("errors") or []
+        }
+        # `data` lists only the accepted messages, in order
+        if len(data) + len(rejected) != len(messages):
+            raise RuntimeError(f"{len(data)} results for {len(messages)} messages")
+    except Exception as e:
+        print(f"Failed to send batch of {len(messages)} emails: {e}")
+        increment("email.failed", len(messages))
+        return [
+            {"email": email, "status": "failed", "error": "Send error"}
+            for email in emails
+        ]
+
+    accepted = iter(data)
+    results = []
+    for index, email in enumerate(emails):
+        if index in rejected:
+            print(f"Email to {mask_email(email)} rejected: {rejected[index]}")
+            results.append({"email": email, "status": "failed", "error": "Rejected"})
+        else:
+            item = next(accepted)
+            results.append({"email": email, "status": "sent", "id": item.get("id")})
+
+    print(f"Batch of {len(messages)} emails sent ({len(rejected)} rejected)")
+    increment("email.sent", len(messages) - len(rejected))
+    increment("email.failed", len(rejected))
+    return results
+
+
+async def send_digest_emails_async(
+    deliveries: List[Tuple[str, List[Dict[str, Any]]]],
+    from_email: Optional[str] = None,
+    renderer: Optional[EmailRenderer] = None,
+    batch_size: int = RESEND_BATCH_SIZE,
+    rps: float = RESEND_RPS,
+    concurrency: int = RESEND_CONCURRENCY,
+) -> Dict[str, Any]:
+    """
+    Send personalized digests, one (email, papers) pair per subscriber,
+    through the Resend batch API. Batches go out concurrently under the
+    rate limit; results come back in delivery order. Each batch's messages
+    are rendered when it is sent, so at most `concurrency` batches of HTML
+    are held at once.
+    """
+    get_resend_client()
+    renderer = renderer or EmailRenderer()
+
+    if from_email is None:
+        from_email = os.environ.get(
+            "RESEND_FROM_EMAIL", "everymorning <fresh@stemem.info>"
+        )
+
+    limiter = TokenBucket(rps)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_batch(
+        client: HttpClient, batch: List[Tuple[str, List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        async with semaphore:
+            messages = [
+                build_email_message(email, papers, from_email, renderer)
+                for email, papers in batch
+            ]
+            return await send_email_batch_async(client, limiter, messages)
+
+    async with HttpClient(per_host_limit=concurrency) as client:
+        batch_results = await asyncio.gather(
+            *(
+                send_batch(client, deliveries[start : start + batch_size])
+                for start in range(0, len(deliveries), batch_size)
+            )
+        )
+
+    results = [result for batch in batch_results for result in batch]
+    return {
+        "results": results,
+        "total": len(deliveries),
+        "sent": sum(1 for r in results if r["status"] == "sent"),
+    }
+
+
+def send_digest_emails(
+    deliveries: List[Tuple[str, List[Dict[str, Any]]]],
+    from_email: Optional[str] = None,
+    renderer: Optional[EmailRenderer] = None,
+) -> Dict[str, Any]:
+    """Send personalized digests in batches (sync wrapper)."""
+    return asyncio.run(send_digest_emails_async(deliveries, from_email, renderer))
+
+
 def main():
     test_papers = [
         {
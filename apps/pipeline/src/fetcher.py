@@ -1,11 +1,42 @@
 import os
-import time
-import requests
+import queue
+import asyncio
+import threading
+from contextlib import aclosing
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from src.db import get_supabase_client
+from typing import List, Dict, Any, Optional, Iterable, Iterator, AsyncIterator
+from src.db import get_supabase_client, bulk_upsert, DB_CHUNK_SIZE
+from src.http_client import HttpClient
+from src.rate_limiter import TokenBucket
+from src.metrics import timed, increment
+from src.paper_store import PaperStore, get_paper_store, watermark_key
+from src.sources import PaperSource, SOURCES
 
-SEMANTIC_SCHOLAR_API = "https://api.semanticscholar.org/graph/v1"
+SEMANTIC_SCHOLAR_API = os.environ.get(
+    "SEMANTIC_SCHOLAR_API_URL", "https://api.semanticscholar.org/graph/v1"
+)
+
+# Requests per second allowed for our API key (shared by all fields)
+SEMANTIC_SCHOLAR_RPS = float(os.environ.get("SEMANTIC_SCHOLAR_RPS", "1"))
+
+PAPER_FIELDS = "paperId,externalIds,title,abstract,authors,citationCount,influentialCitationCount,publicationDate,url,fieldsOfStudy"
+
+# /paper/search pages hold at most 100 results and stop at offset 1000;
+# anything larger goes through /paper/search/bulk instead
+SEARCH_PAGE_SIZE = 100
+SEARCH_MAX_RESULTS = 1000
+
+# Candidates fetched per field in the daily run
+PAPERS_PER_FIELD = int(os.environ.get("PAPERS_PER_FIELD", "50"))
+
+# Paper sources fetched side by side: semantic_scholar, arxiv, pubmed
+PAPER_SOURCES = [
+    name.strip()
+    for name in os.environ.get(
+        "PAPER_SOURCES", "semantic_scholar,arxiv,pubmed"
+    ).split(",")
+    if name.strip()
+]
 
 # STEM field mapping
 FIELD_MAPPING = {
@@ -15,113 +46,476 @@ FIELD_MAPPING = {
     "math": "Mathematics",
 }
 
+_limiter: Optional[TokenBucket] = None
+_limiter_lock = threading.Lock()
 
-def fetch_papers_by_field(
-    field: str, days: int = 7, limit: int = 50, max_retries: int = 3
-) -> List[Dict[str, Any]]:
+
+def get_semantic_scholar_limiter() -> TokenBucket:
     """
-    Fetch recent papers from Semantic Scholar API by field
-    Rate limit: 1 request per second with exponential backoff on 429
+    Process-wide token bucket for Semantic Scholar. Searches and citation
+    refreshes running side by side draw from it, so together they stay
+    within SEMANTIC_SCHOLAR_RPS.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = TokenBucket(SEMANTIC_SCHOLAR_RPS)
+        return _limiter
+
+
+def semantic_scholar_headers() -> Dict[str, str]:
+    """Request headers, with the API key when one is configured."""
+    headers = {}
+    api_key = os.environ.get("SEMANTIC_SCHOLAR_API_KEY")
+    if api_key:
+        headers["x-api-key"] = api_key
+    return headers
+
+
+async def iter_papers_by_field(
+    client: HttpClient,
+    limiter: TokenBucket,
+    field: str,
+    days: int = 7,
+    max_results: int = 50,
+    max_retries: int = 3,
+    since: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield recent papers for a field page by page, published in the last
+    `days` days or, when given, on or after `since` (YYYY-MM-DD).
+
+    Up to 1000 results the relevance-ranked /paper/search endpoint is used,
+    following its `next` offset; beyond that /paper/search/bulk is used,
+    following its continuation `token`. Each page is released once its papers
+    have been yielded. Every request takes a token from the shared limiter;
+    429s are retried by the client, honoring Retry-After.
     """
-    url = f"{SEMANTIC_SCHOLAR_API}/paper/search"
+    bulk = max_results > SEARCH_MAX_RESULTS
+    if bulk:
+        url = f"{SEMANTIC_SCHOLAR_API}/paper/search/bulk"
+    else:
+        url = f"{SEMANTIC_SCHOLAR_API}/paper/search"
 
     # Papers from last N days
-    date_from = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    date_from = since or (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
 
     params = {
         "query": FIELD_MAPPING.get(field, field),
-        "fields": "paperId,title,abstract,authors,citationCount,influentialCitationCount,publicationDate,url,fieldsOfStudy",
-        "limit": limit,
+        "fields": PAPER_FIELDS,
         "publicationDateOrYear": f"{date_from}:",
     }
+    if not bulk:
+        params["limit"] = min(max_results, SEARCH_PAGE_SIZE)
 
-    headers = {}
-    api_key = os.environ.get("SEMANTIC_SCHOLAR_API_KEY")
-    if api_key:
-        headers["x-api-key"] = api_key
-
-    for attempt in range(max_retries):
-        # Rate limit: wait before request
-        time.sleep(1.5)
+    headers = semantic_scholar_headers()
 
-        response = requests.get(url, params=params, headers=headers)
+    yielded = 0
+    while yielded < max_results:
+        response = await client.get(
+            url,
+            params=params,
+            headers=headers,
+            limiter=limiter,
+            max_retries=max_retries,
+        )
 
         if response.status_code == 429:
-            # Rate limited - exponential backoff
-            wait_time = (2**attempt) * 5  # 5s, 10s, 20s
-            print(f"Rate limited (429), waiting {wait_time}s before retry...")
-            time.sleep(wait_time)
-            continue
+            # All retries exhausted - graceful degradation
+            print(f"Failed to fetch {field} papers after {max_retries} retries")
+            return
 
         response.raise_for_status()
         data = response.json()
-        return data.get("data", [])
+        increment("fetch.pages")
 
-    # All retries exhausted - graceful degradation
-    print(f"Failed to fetch {field} papers after {max_retries} retries")
-    return []
+        for paper in data.get("data") or []:
+            increment("fetch.papers")
+            yield paper
+            yielded += 1
+            if yielded >= max_results:
+                return
 
+        if bulk:
+            if not data.get("token"):
+                return
+            params["token"] = data["token"]
+        else:
+            next_offset = data.get("next")
+            if next_offset is None:
+                return
+            params["offset"] = next_offset
+            params["limit"] = min(
+                SEARCH_PAGE_SIZE,
+                max_results - yielded,
+                SEARCH_MAX_RESULTS - next_offset,
+            )
+            if params["limit"] <= 0:
+                return
 
-def fetch_all_fields(days: int = 7, limit_per_field: int = 50) -> List[Dict[str, Any]]:
+
+class SemanticScholarSource(PaperSource):
     """
-    Fetch papers from all STEM fields
+    Semantic Scholar search, the primary source: the only one with citation
+    counts, and its failures fail the fetch.
     """
-    all_papers = []
 
-    for field in FIELD_MAPPING.keys():
-        print(f"Fetching {field} papers...")
-        papers = fetch_papers_by_field(field, days, limit_per_field)
+    name = "semantic_scholar"
+    required = True
+    fields = FIELD_MAPPING
+    rate = SEMANTIC_SCHOLAR_RPS
+
+    async def fetch(
+        self, field: str, since: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async for paper in iter_papers_by_field(
+            self.client, self.limiter, field, self.days, self.max_results, since=since
+        ):
+            yield paper
+
+
+def build_sources(
+    names: Iterable[str],
+    client: HttpClient,
+    limiter: TokenBucket,
+    days: int = 7,
+    max_per_field: int = 50,
+) -> List[PaperSource]:
+    """
+    Instantiate the named paper sources around one HTTP client.
+    Semantic Scholar gets the shared limiter; the others bring their own.
+    """
+    sources = []
+    for name in names:
+        if name == SemanticScholarSource.name:
+            sources.append(
+                SemanticScholarSource(client, max_per_field, days, limiter)
+            )
+        elif name in SOURCES:
+            sources.append(SOURCES[name](client, max_per_field, days))
+        else:
+            print(f"Unknown paper source {name!r}, skipping")
+    return sources
+
+
+@timed("fetch.field")
+async def fetch_papers_by_field_async(
+    client: HttpClient,
+    limiter: TokenBucket,
+    field: str,
+    days: int = 7,
+    limit: int = 50,
+    max_retries: int = 3,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch recent papers from Semantic Scholar API by field
+    """
+    return [
+        paper
+        async for paper in iter_papers_by_field(
+            client, limiter, field, days, limit, max_retries
+        )
+    ]
+
+
+@timed("fetch.field_sync")
+def fetch_papers_by_field(
+    field: str, days: int = 7, limit: int = 50, max_retries: int = 3
+) -> List[Dict[str, Any]]:
+    """
+    Fetch recent papers for a single field (sync wrapper)
+    """
 
+    async def run() -> List[Dict[str, Any]]:
+        limiter = get_semantic_scholar_limiter()
+        async with HttpClient(backoff_base=5.0) as client:
+            return await fetch_papers_by_field_async(
+                client, limiter, field, days, limit, max_retries
+            )
+
+    return asyncio.run(run())
+
+
+async def iter_all_fields(
+    days: int = 7,
+    max_per_field: int = 50,
+    limiter: Optional[TokenBucket] = None,
+    client: Optional[HttpClient] = None,
+    since: Optional[Dict[str, str]] = None,
+    sources: Optional[Iterable[str]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield papers from all STEM fields as pages arrive.
+    Every (source, field) pair is paginated concurrently, Semantic Scholar
+    fields under one token bucket, so papers come out in arrival order,
+    interleaved across fields and sources, each tagged with `field`.
+    `sources` names the paper sources (PAPER_SOURCES by default); `since`
+    maps watermark keys (paper_store.watermark_key) to the publication date
+    to fetch from.
+    """
+    if limiter is None:
+        limiter = get_semantic_scholar_limiter()
+    if client is None:
+        async with HttpClient(backoff_base=5.0) as own_client, aclosing(
+            iter_all_fields(days, max_per_field, limiter, own_client, since, sources)
+        ) as papers:
+            async for paper in papers:
+                yield paper
+        return
+
+    arrivals: asyncio.Queue = asyncio.Queue(maxsize=SEARCH_PAGE_SIZE)
+    done = object()
+
+    async def pump(source: PaperSource, field: str) -> None:
+        print(f"Fetching {field} papers from {source.name}...")
+        try:
+            async for paper in source.fetch(
+                field, (since or {}).get(watermark_key(source.name, field))
+            ):
+                paper["field"] = field
+                await arrivals.put(paper)
+        except Exception as e:
+            if source.required:
+                await arrivals.put(done)
+                raise
+            # An extra source being down only shrinks the candidate pool
+            increment(f"fetch.{source.name}.errors")
+            print(f"Failed to fetch {field} papers from {source.name}: {e}")
+        # Not when cancelled: nobody may be left to drain a full queue
+        await arrivals.put(done)
+
+    tasks = [
+        asyncio.create_task(pump(source, field))
+        for source in build_sources(
+            PAPER_SOURCES if sources is None else sources,
+            client,
+            limiter,
+            days,
+            max_per_field,
+        )
+        for field in FIELD_MAPPING.keys()
+        if source.covers(field)
+    ]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await arrivals.get()
+            if item is done:
+                remaining -= 1
+                continue
+            yield item
+        # Surface the first fetch error, if any
+        for task in tasks:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def stream_all_fields(
+    days: int = 7,
+    max_per_field: int = 50,
+    since: Optional[Dict[str, str]] = None,
+    sources: Optional[Iterable[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate papers from all STEM fields from synchronous code.
+    The async fetch runs on a background thread and hands papers over
+    through a bounded queue, so consumers (dedup, scoring) process each page
+    while the next one is still in flight. Closing the iterator early
+    cancels the fetch and waits for the thread to stop.
+    """
+    papers: queue.Queue = queue.Queue(maxsize=SEARCH_PAGE_SIZE)
+    done = object()
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    running: Dict[str, Any] = {}
+
+    def hand_off(item: Any) -> bool:
+        """Blocking put that gives up once the consumer has stopped."""
+        while not stop.is_set():
+            try:
+                papers.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    async def produce() -> None:
+        running["task"] = (asyncio.get_running_loop(), asyncio.current_task())
+        async with aclosing(
+            iter_all_fields(days, max_per_field, since=since, sources=sources)
+        ) as stream:
+            async for paper in stream:
+                try:
+                    papers.put_nowait(paper)
+                except queue.Full:
+                    # Wait for the consumer off the loop, so fetches continue
+                    if not await asyncio.to_thread(hand_off, paper):
+                        return
+
+    def run() -> None:
+        try:
+            asyncio.run(produce())
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            hand_off(done)
+
+    thread = threading.Thread(target=run, name="paper-fetcher", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = papers.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+        if "task" in running:
+            loop, task = running["task"]
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # The fetch already finished and closed its loop
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+async def fetch_all_fields_async(
+    days: int = 7,
+    limit_per_field: int = 50,
+    limiter: Optional[TokenBucket] = None,
+    client: Optional[HttpClient] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch papers from all STEM fields concurrently.
+    All fields share one token bucket so the combined request rate stays
+    within the Semantic Scholar limit, and one pooled HttpClient.
+    """
+    if limiter is None:
+        limiter = get_semantic_scholar_limiter()
+    if client is None:
+        async with HttpClient(backoff_base=5.0) as own_client:
+            return await fetch_all_fields_async(
+                days, limit_per_field, limiter, own_client
+            )
+
+    async def fetch_field(field: str) -> List[Dict[str, Any]]:
+        print(f"Fetching {field} papers...")
+        papers = await fetch_papers_by_field_async(
+            client, limiter, field, days, limit_per_field
+        )
         for paper in papers:
             paper["field"] = field
+        return papers
+
+    results = await asyncio.gather(
+        *(fetch_field(field) for field in FIELD_MAPPING.keys())
+    )
 
+    # Keep FIELD_MAPPING order regardless of which request finished first
+    all_papers = []
+    for papers in results:
         all_papers.extend(papers)
-        time.sleep(1)  # Rate limiting: 1 RPS
 
     return all_papers
 
 
-def save_papers_to_db(papers: List[Dict[str, Any]]) -> int:
+def fetch_all_fields(days: int = 7, limit_per_field: int = 50) -> List[Dict[str, Any]]:
     """
-    Save papers to Supabase (with duplicate check)
+    Fetch papers from all STEM fields (sync wrapper)
     """
-    supabase = get_supabase_client()
-    saved_count = 0
+    return asyncio.run(fetch_all_fields_async(days, limit_per_field))
+
 
+def fetch_incremental(
+    store: PaperStore,
+    days: int = 7,
+    max_per_field: int = PAPERS_PER_FIELD,
+    sources: Optional[Iterable[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch each source's fields from their watermarks in the paper store
+    instead of the whole window. Returns only the papers that are new or
+    changed; store.recent(days) gives the full window afterwards.
+    """
+    sources = list(PAPER_SOURCES if sources is None else sources)
+    since = store.fetch_since(
+        [watermark_key(name, field) for name in sources for field in FIELD_MAPPING],
+        days,
+    )
+    return store.add(stream_all_fields(days, max_per_field, since, sources))
+
+
+def paper_to_row(paper: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a fetched paper (any source) onto a `papers` row."""
+    return {
+        "source": paper.get("source", "semantic_scholar"),
+        "external_id": paper.get("sourceId") or paper.get("paperId"),
+        "title": paper.get("title"),
+        "authors": [a.get("name") for a in paper.get("authors") or []],
+        "abstract": paper.get("abstract"),
+        "url": paper.get("url"),
+        "published_at": paper.get("publicationDate"),
+        "citation_count": paper.get("citationCount") or 0,
+        "influential_citation_count": paper.get("influentialCitationCount") or 0,
+    }
+
+
+@timed("db.save_papers")
+def save_papers_to_db(
+    papers: List[Dict[str, Any]], chunk_size: int = DB_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Save papers to Supabase with chunked multi-row upserts on
+    (source, external_id) through bulk_upsert, which retries failed chunks
+    and isolates rejected rows. A paper fetched under several fields is
+    written once, since Postgres rejects a statement that upserts a row
+    twice. Returns the bulk_upsert report (written, failed, requests).
+    """
+    rows = {}
     for paper in papers:
-        paper_data = {
-            "source": "semantic_scholar",
-            "external_id": paper.get("paperId"),
-            "title": paper.get("title"),
-            "authors": [a.get("name") for a in paper.get("authors", [])],
-            "abstract": paper.get("abstract"),
-            "url": paper.get("url"),
-            "published_at": paper.get("publicationDate"),
+        if paper.get("paperId"):
+            rows[paper["paperId"]] = paper_to_row(paper)
+    if not rows:
+        return {
+            "written": 0,
+            "failed": 0,
+            "requests": 0,
+            "failed_rows": [],
+            "errors": [],
         }
 
-        # Upsert (중복이면 무시)
-        try:
-            supabase.table("papers").upsert(
-                paper_data, on_conflict="source,external_id"
-            ).execute()
-            saved_count += 1
-        except Exception as e:
-            print(f"Error saving paper: {e}")
-
-    return saved_count
+    supabase = get_supabase_client()
+    return bulk_upsert(
+        supabase,
+        "papers",
+        list(rows.values()),
+        on_conflict="source,external_id",
+        chunk_size=chunk_size,
+    )
 
 
 def main():
     """
     Main: Fetch papers and save to DB
     """
-    print("Fetching papers from Semantic Scholar...")
-    papers = fetch_all_fields(days=7, limit_per_field=50)
-    print(f"Fetched {len(papers)} papers total")
+    print(f"Fetching new papers from {', '.join(PAPER_SOURCES)}...")
+    store = get_paper_store()
+    papers = fetch_incremental(store, days=7)
+    print(f"Paper store: {store.stats()}")
 
     print("Saving to database...")
-    saved = save_papers_to_db(papers)
-    print(f"Saved {saved} papers to database")
+    report = save_papers_to_db(papers)
+    print(
+        f"Saved {report['written']} new or changed papers to database "
+        f"({report['failed']} failed, {report['requests']} requests)"
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import httpx
+
+from src.rate_limiter import TokenBucket
+from src.metrics import increment, timer
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a host has failed too often and is cooling down."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for a single host.
+    Opens after `failure_threshold` failures in a row, then lets one
+    trial request through once `reset_timeout` seconds have passed.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Half-open: allow a trial request, re-open on the next failure
+            self.opened_at = None
+            self.failures = self.failure_threshold - 1
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HttpClient:
+    """
+    Shared async HTTP client for external APIs.
+
+    - one keep-alive connection pool for every request made through it
+    - at most `per_host_limit` requests in flight per host
+    - retries on 429/5xx and transport errors with jittered exponential
+      backoff, waiting for the server's Retry-After when it sends one
+    - a circuit breaker per host so a dead API fails fast
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        per_host_limit: int = 4,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.per_host_limit = per_host_limit
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    async def __aenter__(self) -> "HttpClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._semaphores[host]
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(
+                self.failure_threshold, self.reset_timeout
+            )
+        return self._breakers[host]
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            # Small jitter so concurrent callers don't all retry at once
+            return min(self.backoff_max, retry_after) + random.uniform(0, 0.5)
+        ceiling = min(self.backoff_max, self.backoff_base * (2**attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        limiter: Optional[TokenBucket] = None,
+        max_retries: Optional[int] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request with retries.
+        Returns the last response if retries run out on a retryable status,
+        so callers decide how to degrade; raises on transport errors.
+        """
+        host = httpx.URL(url).host
+        breaker = self._breaker(host)
+        retries = self.max_retries if max_retries is None else max_retries
+
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                increment("http.circuit_open")
+                raise CircuitOpenError(f"Circuit open for {host}")
+
+            if limiter is not None:
+                await limiter.acquire()
+
+            try:
+                async with self._semaphore(host):
+                    increment("http.requests")
+                    with timer(f"http.{host}"):
+                        response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                increment("http.transport_errors")
+                if attempt >= retries:
+                    raise
+                increment("http.retries")
+                wait_time = self._backoff(attempt, None)
+                print(f"{type(e).__name__} from {host}, retrying in {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES:
+                breaker.record_success()
+                return response
+
+            increment(f"http.{response.status_code}")
+            if response.status_code != 429:
+                # Throttling means the host is alive; only 5xx trips the breaker
+                breaker.record_failure()
+            if attempt >= retries:
+                return response
+
+            increment("http.retries")
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            wait_time = self._backoff(attempt, retry_after)
+            print(
+                f"HTTP {response.status_code} from {host}, retrying in {wait_time:.1f}s"
+            )
+            await asyncio.sleep(wait_time)
+
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
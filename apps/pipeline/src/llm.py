@@ -0,0 +1,304 @@
+import os
+import re
+import time
+import json
+import random
+import asyncio
+import hashlib
+import argparse
+from abc import ABC, abstractmethod
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Type
+
+import httpx
+from groq import AsyncGroq, RateLimitError
+
+from src.http_client import parse_retry_after
+
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "groq")
+LLM_MODEL = os.environ.get("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_BASE_URL = os.environ.get("LLM_BASE_URL", "http://127.0.0.1:8901/v1")
+
+STUB_LLM_LATENCY = float(os.environ.get("STUB_LLM_LATENCY", "0.5"))
+STUB_LLM_429_RATE = float(os.environ.get("STUB_LLM_429_RATE", "0"))
+
+
+class LLMRateLimitError(Exception):
+    """Provider returned 429; `retry_after` is in seconds when known."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"Rate limited (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+class LLMBackend(ABC):
+    """
+    Chat-completion backend used by the summarizer.
+    Implementations raise LLMRateLimitError on 429 and leave retrying to
+    the caller, which owns the shared rate budget. `default_model` is the
+    model used when none is given, known without building the backend.
+    """
+
+    name = "base"
+    default_model = LLM_MODEL
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or self.default_model
+
+    @abstractmethod
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float = 0.3,
+        json_mode: bool = False,
+    ) -> Optional[str]:
+        """Completion text for `prompt`."""
+
+    async def aclose(self) -> None:
+        pass
+
+
+class GroqBackend(LLMBackend):
+    name = "groq"
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None):
+        super().__init__(model)
+        api_key = api_key or os.environ.get("GROQ_API_KEY")
+        if not api_key:
+            raise ValueError("GROQ_API_KEY must be set")
+        self.client = AsyncGroq(api_key=api_key, max_retries=0)
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float = 0.3,
+        json_mode: bool = False,
+    ) -> Optional[str]:
+        kwargs = {}
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **kwargs,
+            )
+        except RateLimitError as e:
+            raise LLMRateLimitError(
+                parse_retry_after(e.response.headers.get("retry-after"))
+            ) from e
+        return response.choices[0].message.content
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Any server implementing POST {base_url}/chat/completions
+    (OpenAI, Together, vLLM, Ollama, or the local stub server below).
+    """
+
+    name = "openai"
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        base_url: str = LLM_BASE_URL,
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+    ):
+        super().__init__(model)
+        api_key = api_key or os.environ.get("LLM_API_KEY")
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"), headers=headers, timeout=timeout
+        )
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float = 0.3,
+        json_mode: bool = False,
+    ) -> Optional[str]:
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}
+
+        response = await self.client.post("/chat/completions", json=body)
+        if response.status_code == 429:
+            raise LLMRateLimitError(
+                parse_retry_after(response.headers.get("retry-after"))
+            )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def stub_completion(prompt: str, json_mode: bool = False) -> str:
+    """
+    Deterministic fake completion: the same prompt always gives the same
+    3-bullet summary (or batched JSON when json_mode is set).
+    """
+    titles = re.findall(r"^Title: (.*)$", prompt, flags=re.MULTILINE)
+
+    def bullets(title: str) -> list:
+        digest = hashlib.sha256(title.encode("utf-8")).hexdigest()[:8]
+        short = title[:60]
+        return [
+            f"Stub method summary for {short}.",
+            f"Stub finding {digest}.",
+            "Stub impact statement.",
+        ]
+
+    if json_mode:
+        summaries = [
+            {"paper": i, "bullets": bullets(title)} for i, title in enumerate(titles, 1)
+        ]
+        return json.dumps({"summaries": summaries})
+
+    return "\n".join(f"• {b}" for b in bullets(titles[0] if titles else prompt))
+
+
+class StubBackend(LLMBackend):
+    """
+    Offline backend with configurable latency and a seeded 429 rate,
+    for benchmarks and runs without network access.
+    """
+
+    name = "stub"
+    default_model = "stub"
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        latency: float = STUB_LLM_LATENCY,
+        rate_limit_rate: float = STUB_LLM_429_RATE,
+        retry_after: float = 1.0,
+        seed: int = 0,
+    ):
+        super().__init__(model)
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float = 0.3,
+        json_mode: bool = False,
+    ) -> Optional[str]:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if self.random.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            raise LLMRateLimitError(self.retry_after)
+        return stub_completion(prompt, json_mode)
+
+
+LLM_BACKENDS = {
+    GroqBackend.name: GroqBackend,
+    OpenAICompatibleBackend.name: OpenAICompatibleBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def get_llm_backend_class(name: Optional[str] = None) -> Type[LLMBackend]:
+    name = (name or LLM_BACKEND).lower()
+    if name not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND: {name}")
+    return LLM_BACKENDS[name]
+
+
+def get_llm_backend(name: Optional[str] = None) -> LLMBackend:
+    """
+    Build the backend selected by LLM_BACKEND ('groq', 'openai' or 'stub').
+    """
+    return get_llm_backend_class(name)()
+
+
+def serve_stub(
+    port: int = 8901,
+    latency: float = STUB_LLM_LATENCY,
+    rate_limit_rate: float = STUB_LLM_429_RATE,
+    seed: int = 0,
+) -> ThreadingHTTPServer:
+    """
+    Local OpenAI-compatible stub server (POST /v1/chat/completions).
+    Point LLM_BACKEND=openai and LLM_BASE_URL at it to exercise the real
+    HTTP path offline.
+    """
+    rng = random.Random(seed)
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status: int, body: dict, headers: dict = None) -> None:
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._reply(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+            if rng.random() < rate_limit_rate:
+                self._reply(429, {"error": "rate limited"}, {"retry-after": "1"})
+                return
+            prompt = request["messages"][-1]["content"]
+            response_format = request.get("response_format") or {}
+            json_mode = response_format.get("type") == "json_object"
+            content = stub_completion(prompt, json_mode)
+            self._reply(
+                200,
+                {
+                    "model": request.get("model", "stub"),
+                    "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": content}}
+                    ],
+                },
+            )
+
+    return ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+
+def main():
+    """Run the local stub LLM server"""
+    parser = argparse.ArgumentParser(description="Local stub LLM server")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", type=float, default=STUB_LLM_LATENCY)
+    parser.add_argument("--rate-limit-rate", type=float, default=STUB_LLM_429_RATE)
+    args = parser.parse_args()
+
+    server = serve_stub(args.port, args.latency, args.rate_limit_rate)
+    print(f"Stub LLM listening on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,38 @@
 import sys
+import asyncio
 import argparse
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
-from src.fetcher import fetch_all_fields
-from src.scorer import score_papers, get_personalized_papers, generate_selection_reason
-from src.summarizer import summarize_papers
-from src.email_sender import send_digest_email
-from src.telegram_sender import send_telegram_digest
-from src.db import get_supabase_client, get_recently_sent_paper_ids, save_sent_papers
+from src.fetcher import (
+    fetch_incremental,
+    save_papers_to_db,
+    PAPERS_PER_FIELD,
+    PAPER_SOURCES,
+)
+from src.paper_store import get_paper_store
+from src.citations import refresh_papers
+from src.dedup import PaperDeduplicator
+from src.scorer import score_papers, PaperSelector, generate_selection_reason
+from src.summarizer import summarize_papers_async
+from src.summary_cache import get_summary_cache
+from src.email_sender import send_digest_emails_async, EmailRenderer
+from src.telegram_sender import send_telegram_digests_async
+from src.db import (
+    get_supabase_client,
+    check_supabase_health,
+    get_recently_sent_map,
+    iter_table_pages,
+    SentPapersWriter,
+)
+from src.stages import StageGraph
+from src.metrics import (
+    timed,
+    write_run_report,
+    RunProfiler,
+    RUN_REPORT_PATH,
+    PROFILE_DIR,
+)
 
 
 def log(message: str) -> None:
@@ -16,19 +40,19 @@ def log(message: str) -> None:
     print(f"[{timestamp}] {message}")
 
 
+@timed("db.get_subscribers")
 def get_subscribers() -> List[Dict[str, Any]]:
     try:
         supabase = get_supabase_client()
-        result = (
-            supabase.table("subscribers")
-            .select("email,telegram_chat_id,preferred_fields")
-            .eq("is_active", True)
-            .execute()
-        )
-
         subscribers = []
-        if result.data:
-            for row in result.data:
+        # Paged: a single select stops at PostgREST's max-rows (1000)
+        for rows in iter_table_pages(
+            supabase,
+            "subscribers",
+            "id,email,telegram_chat_id,preferred_fields",
+            apply_filters=lambda query: query.eq("is_active", True),
+        ):
+            for row in rows:
                 subscribers.append(
                     {
                         "email": row.get("email"),
@@ -46,6 +70,203 @@ def get_subscribers() -> List[Dict[str, Any]]:
         return []
 
 
+def build_pipeline(args) -> Tuple[StageGraph, PaperDeduplicator]:
+    """
+    The daily run as a stage graph:
+
+        fetch -> refresh -+-> papers --------+
+                          +-> store_papers   |
+        subscribers -> sent_map -------------+-> selections -> summaries -+-> email -> record_sent
+                                                                          +-> telegram
+
+    Only papers past each source's and field's watermark are fetched
+    (Semantic Scholar, arXiv and PubMed side by side); then the papers
+    from earlier runs in the local paper store get their citation counts
+    refreshed through the batch endpoint. Refreshing waits for the fetch
+    so its older snapshot never overwrites a copy the fetch just stored.
+    The scoring window is read back from the store, and new or changed
+    papers are written to the DB alongside.
+    Subscribers and sent history load while papers are fetched. Selections
+    are made from the whole scored pool, then only the papers somebody
+    will receive are summarized; email and Telegram deliveries run side
+    by side. A dry run writes nothing: no DB rows, and a throwaway in-memory
+    paper store so watermarks don't advance.
+    """
+    graph = StageGraph()
+    renderer = EmailRenderer()
+    dedup = PaperDeduplicator()
+    paper_store = get_paper_store("memory" if args.dry_run else None)
+
+    def fetch():
+        log(f"Fetching new papers from all STEM fields ({', '.join(PAPER_SOURCES)})")
+        fresh = fetch_incremental(paper_store, days=7, max_per_field=PAPERS_PER_FIELD)
+        log(f"Paper store: {paper_store.stats()}")
+        return fresh
+
+    def refresh(fetch):
+        # Papers from earlier runs aren't searched again, so their counts
+        # would stay frozen at fetch time; the ones just fetched are current
+        fetched = {(p["field"], p.get("paperId")) for p in fetch}
+        stored = [
+            p
+            for p in paper_store.recent(days=7)
+            if (p["field"], p.get("paperId")) not in fetched
+        ]
+        if not stored:
+            return []
+        changed = refresh_papers(stored)
+        paper_store.add(changed)
+        log(f"Refreshed citations: {len(changed)} of {len(stored)} stored papers")
+        return changed
+
+    def score(fetch, refresh):
+        log("Deduplicating and scoring papers from the last 7 days")
+        # Semantic Scholar copies go first so dedup keeps the one carrying
+        # citation counts when arXiv or PubMed return the same paper
+        pool = sorted(
+            paper_store.recent(days=7),
+            key=lambda p: p.get("source", "semantic_scholar") != "semantic_scholar",
+        )
+        scored_papers = score_papers(dedup.dedupe(pool))
+        log(f"Scored {len(scored_papers)} papers")
+        log(f"Cross-field dedup: {dedup.summary()}")
+        return scored_papers
+
+    def store_papers(fetch, refresh):
+        # Freshly fetched copies win over refreshed ones
+        report = save_papers_to_db(refresh + fetch)
+        log(
+            f"Saved {report['written']} new or changed papers to database "
+            f"({report['failed']} failed, {report['requests']} requests)"
+        )
+        return report["written"]
+
+    def load_sent_map(subscribers):
+        # One scan of recent sends for everyone instead of a query per subscriber
+        return get_recently_sent_map(
+            [s["email"] for s in subscribers if s.get("email")]
+        )
+
+    def select(papers, subscribers, sent_map):
+        if not subscribers:
+            log("No subscribers found, skipping sending")
+        selector = PaperSelector(papers)
+        email_deliveries = []
+        telegram_deliveries = []
+
+        for subscriber in subscribers:
+            # Get personalized papers, excluding already-sent ones
+            preferred = subscriber.get("preferred_fields") or []
+            sent_ids = (
+                sent_map.get(subscriber["email"], set())
+                if subscriber.get("email")
+                else set()
+            )
+            personalized = selector.select(preferred, sent_ids, n=3)
+
+            # Add selection reasons to each paper
+            for paper in personalized:
+                paper["selection_reason"] = generate_selection_reason(paper)
+
+            if not personalized:
+                log(f"No papers for subscriber with fields {preferred}, skipping")
+                continue
+
+            if args.dry_run:
+                # Dry run: print instead of send
+                email = subscriber.get("email") or "(no email)"
+                chat_id = subscriber.get("telegram_chat_id") or "(no telegram)"
+                fields_str = ", ".join(preferred) if preferred else "all fields"
+
+                print(f"\n{'=' * 60}")
+                print(f"SUBSCRIBER: {email} | Telegram: {chat_id}")
+                print(f"PREFERRED FIELDS: {fields_str}")
+                print(f"PAPERS ({len(personalized)}):")
+                for i, p in enumerate(personalized, 1):
+                    tags = ",".join(p.get("fields") or [p.get("field", "?")])
+                    print(f"  {i}. [{tags}] {p.get('title', 'Unknown')[:60]}...")
+                continue  # Skip actual sending
+
+            if subscriber.get("email"):
+                email_deliveries.append((subscriber["email"], personalized))
+            if subscriber.get("telegram_chat_id"):
+                telegram_deliveries.append(
+                    (subscriber["telegram_chat_id"], personalized)
+                )
+
+        log(f"Paper selection: {selector.stats()}")
+        return {"email": email_deliveries, "telegram": telegram_deliveries}
+
+    async def summarize(selections):
+        # Deliveries share the selector's paper dicts, so one summary per
+        # distinct paper reaches every digest that includes it
+        selected = {}
+        for _, personalized in selections["email"] + selections["telegram"]:
+            for paper in personalized:
+                selected.setdefault(paper.get("paperId") or id(paper), paper)
+        papers = list(selected.values())
+        if not papers:
+            return 0
+
+        log(f"Summarizing {len(papers)} selected papers")
+        summary_cache = get_summary_cache()
+        summarized_papers = await summarize_papers_async(
+            papers, max_papers=len(papers), cache=summary_cache
+        )
+        for paper, summarized in zip(papers, summarized_papers):
+            paper["summary"] = summarized["summary"]
+        log(f"Summarized {len(summarized_papers)} papers")
+        log(f"Summary cache: {summary_cache.stats()}")
+        return len(summarized_papers)
+
+    async def send_email(selections, summaries):
+        deliveries = selections["email"]
+        if not deliveries:
+            return {"sent": 0, "results": []}
+        try:
+            return await send_digest_emails_async(deliveries, renderer=renderer)
+        except Exception as e:
+            log(f"Error sending emails: {e}")
+            return {"sent": 0, "results": []}
+
+    async def send_telegram(selections, summaries):
+        deliveries = selections["telegram"]
+        if not deliveries:
+            return {"sent": 0, "results": []}
+        try:
+            return await send_telegram_digests_async(deliveries)
+        except Exception as e:
+            log(f"Error sending telegram: {e}")
+            return {"sent": 0, "results": []}
+
+    def record_sent(selections, email):
+        with SentPapersWriter() as sent_writer:
+            for (address, personalized), status in zip(
+                selections["email"], email["results"]
+            ):
+                if status["status"] != "sent":
+                    continue
+                sent_paper_ids = [
+                    p.get("paperId") for p in personalized if p.get("paperId")
+                ]
+                sent_writer.add(sent_paper_ids, address)
+        return sent_writer.written
+
+    graph.add("fetch", fetch)
+    graph.add("refresh", refresh, deps=["fetch"])
+    graph.add("papers", score, deps=["fetch", "refresh"])
+    if not args.dry_run:
+        graph.add("store_papers", store_papers, deps=["fetch", "refresh"])
+    graph.add("subscribers", get_subscribers)
+    graph.add("sent_map", load_sent_map, deps=["subscribers"])
+    graph.add("selections", select, deps=["papers", "subscribers", "sent_map"])
+    graph.add("summaries", summarize, deps=["selections"])
+    graph.add("email", send_email, deps=["selections", "summaries"])
+    graph.add("telegram", send_telegram, deps=["selections", "summaries"])
+    graph.add("record_sent", record_sent, deps=["selections", "email"])
+    return graph, dedup
+
+
 def main():
     parser = argparse.ArgumentParser(description="Daily STEM digest pipeline")
     parser.add_argument(
@@ -53,106 +274,62 @@ def main():
         action="store_true",
         help="Print what would be sent without actually sending",
     )
+    parser.add_argument(
+        "--report",
+        default=RUN_REPORT_PATH,
+        help="Where to write the JSON run report (timers, counters, stages)",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=PROFILE_DIR,
+        default=None,
+        metavar="DIR",
+        help="Profile the run with cProfile and tracemalloc, dumping to DIR",
+    )
     args = parser.parse_args()
 
     log("Starting daily digest pipeline")
+    # A broken shared client is dropped here, so the stages build a fresh one
+    if not check_supabase_health():
+        log("Supabase is unreachable; database stages may fail")
 
-    try:
-        log("Step 1: Fetching papers from all STEM fields")
-        papers = fetch_all_fields(days=7, limit_per_field=50)
-        log(f"Fetched {len(papers)} papers")
-    except Exception as e:
-        log(f"Error fetching papers: {e}")
-        return 1
+    graph, dedup = build_pipeline(args)
+    if args.profile:
+        with RunProfiler(args.profile) as profiler:
+            results = asyncio.run(graph.run())
+    else:
+        profiler = None
+        results = asyncio.run(graph.run())
 
-    try:
-        log("Step 2: Scoring papers")
-        scored_papers = score_papers(papers)
-    except Exception as e:
-        log(f"Error scoring papers: {e}")
-        return 1
+    if args.dry_run and "papers" in results:
+        print(f"\n{'=' * 60}")
+        print(f"DUPLICATES REMOVED: {dedup.summary()}")
 
-    try:
-        log("Step 3: Summarizing top 12 papers")
-        top_12 = scored_papers[:12]
-        summarized_papers = summarize_papers(top_12, max_papers=12)
-        log(f"Summarized {len(summarized_papers)} papers")
-    except Exception as e:
-        log(f"Error summarizing papers: {e}")
-        return 1
+    log("Stage timings:\n" + graph.report())
 
+    email_sent = results.get("email", {}).get("sent", 0)
+    telegram_sent = results.get("telegram", {}).get("sent", 0)
+    exit_code = 1 if graph.failed else 0
+    extra = {
+        "exit_code": exit_code,
+        "dry_run": args.dry_run,
+        "wall_time": round(graph.finished - graph.started, 3),
+        "stages": graph.timings(),
+        "sent": {"email": email_sent, "telegram": telegram_sent},
+    }
+    if profiler is not None:
+        extra["profile"] = profiler.summary()
+        log(f"Profile written to {args.profile}")
     try:
-        log("Step 4: Fetching subscribers")
-        subscribers = get_subscribers()
-    except Exception as e:
-        log(f"Error fetching subscribers: {e}")
-        return 1
+        write_run_report(args.report, extra)
+        log(f"Run report written to {args.report}")
+    except OSError as e:
+        log(f"Could not write run report: {e}")
 
-    if not subscribers:
-        log("No subscribers found, skipping sending")
-        return 0
-
-    # Step 5: Send personalized digests
-    email_sent = 0
-    telegram_sent = 0
-
-    for subscriber in subscribers:
-        # Get personalized papers, excluding already-sent ones
-        preferred = subscriber.get("preferred_fields") or []
-        if subscriber.get("email"):
-            sent_ids = get_recently_sent_paper_ids(subscriber["email"])
-            available = [
-                p for p in summarized_papers if p.get("paperId") not in sent_ids
-            ]
-        else:
-            available = summarized_papers
-        personalized = get_personalized_papers(available, preferred, n=3)
-
-        # Add selection reasons to each paper
-        for paper in personalized:
-            paper["selection_reason"] = generate_selection_reason(paper)
-
-        if not personalized:
-            log(f"No papers for subscriber with fields {preferred}, skipping")
-            continue
-
-        if args.dry_run:
-            # Dry run: print instead of send
-            email = subscriber.get("email") or "(no email)"
-            chat_id = subscriber.get("telegram_chat_id") or "(no telegram)"
-            fields_str = ", ".join(preferred) if preferred else "all fields"
-
-            print(f"\n{'=' * 60}")
-            print(f"SUBSCRIBER: {email} | Telegram: {chat_id}")
-            print(f"PREFERRED FIELDS: {fields_str}")
-            print(f"PAPERS ({len(personalized)}):")
-            for i, p in enumerate(personalized, 1):
-                print(
-                    f"  {i}. [{p.get('field', '?')}] {p.get('title', 'Unknown')[:60]}..."
-                )
-            continue  # Skip actual sending
-
-        # Send email if subscriber has email
-        if subscriber.get("email"):
-            try:
-                result = send_digest_email([subscriber["email"]], personalized)
-                email_sent += result.get("sent", 0)
-                sent_paper_ids = [
-                    p.get("paperId") for p in personalized if p.get("paperId")
-                ]
-                save_sent_papers(sent_paper_ids, subscriber["email"])
-            except Exception as e:
-                log(f"Error sending email: {e}")
-
-        # Send telegram if subscriber has chat_id
-        if subscriber.get("telegram_chat_id"):
-            try:
-                result = send_telegram_digest(
-                    [subscriber["telegram_chat_id"]], personalized
-                )
-                telegram_sent += result.get("sent", 0)
-            except Exception as e:
-                log(f"Error sending telegram: {e}")
+    if graph.failed:
+        log(f"Pipeline failed in stages: {', '.join(graph.failed)}")
+        return 1
 
     log(f"Sent {email_sent} emails and {telegram_sent} Telegram messages")
     log("Daily digest pipeline completed successfully")
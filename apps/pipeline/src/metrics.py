@@ -0,0 +1,181 @@
+import io
+import os
+import json
+import time
+import pstats
+import cProfile
+import inspect
+import tracemalloc
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+
+RUN_REPORT_PATH = os.environ.get("RUN_REPORT_PATH", ".cache/run_report.json")
+PROFILE_DIR = ".cache/profile"
+
+
+class Metrics:
+    """
+    Process-wide counters and timers, safe to update from threads and
+    coroutines. Timers keep count, total, min and max seconds per name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.timers: Dict[str, Dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.timers.get(name)
+            if stats is None:
+                self.timers[name] = {
+                    "count": 1,
+                    "total": seconds,
+                    "min": seconds,
+                    "max": seconds,
+                }
+                return
+            stats["count"] += 1
+            stats["total"] += seconds
+            stats["min"] = min(stats["min"], seconds)
+            stats["max"] = max(stats["max"], seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block; failures are counted as `<name>.errors`."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name: Optional[str] = None):
+        """Decorator form of timer() for sync and async functions."""
+
+        def decorate(fn):
+            label = name or f"{fn.__module__.split('.')[-1]}.{fn.__name__}"
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(label):
+                        return await fn(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(label):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorate
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            timers = {
+                name: {
+                    "count": int(stats["count"]),
+                    "total": round(stats["total"], 4),
+                    "mean": round(stats["total"] / stats["count"], 4),
+                    "min": round(stats["min"], 4),
+                    "max": round(stats["max"], 4),
+                }
+                for name, stats in sorted(self.timers.items())
+            }
+            return {"counters": dict(sorted(self.counters.items())), "timers": timers}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+
+
+metrics = Metrics()
+timer = metrics.timer
+timed = metrics.timed
+increment = metrics.increment
+
+
+def write_run_report(
+    path: str = RUN_REPORT_PATH, extra: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Write counters, timers and `extra` sections as one JSON report."""
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        **metrics.snapshot(),
+        **(extra or {}),
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    return report
+
+
+class RunProfiler:
+    """
+    cProfile + tracemalloc around a block. On exit writes `run.pstats`
+    (load with pstats/snakeviz) and `run.txt` (top functions by cumulative
+    time) to `directory`; summary() goes into the run report.
+    cProfile only sees the thread that entered the block, so stages run in
+    worker threads show up as time spent waiting on them.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, top: int = 30):
+        self.directory = directory
+        self.top = top
+        self.profile = cProfile.Profile()
+        self._summary: Dict[str, Any] = {}
+
+    def __enter__(self) -> "RunProfiler":
+        tracemalloc.start()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.profile.disable()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        pstats_path = os.path.join(self.directory, "run.pstats")
+        text_path = os.path.join(self.directory, "run.txt")
+        self.profile.dump_stats(pstats_path)
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(
+            self.top
+        )
+        with open(text_path, "w") as f:
+            f.write(out.getvalue())
+
+        self._summary = {
+            "pstats": pstats_path,
+            "text": text_path,
+            "memory_current_mb": round(current / 1e6, 2),
+            "memory_peak_mb": round(peak / 1e6, 2),
+            "top_allocations": [
+                {
+                    "location": str(stat.traceback),
+                    "size_kb": round(stat.size / 1e3, 1),
+                    "count": stat.count,
+                }
+                for stat in snapshot.statistics("lineno")[: self.top]
+            ],
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return self._summary
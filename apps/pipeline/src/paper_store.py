@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from src.metrics import increment
+
+PAPER_STORE_BACKEND = os.environ.get("PAPER_STORE_BACKEND", "sqlite")
+PAPER_STORE_PATH = os.environ.get("PAPER_STORE_PATH", ".cache/papers.sqlite3")
+
+# Fetches restart this many days before the watermark, since Semantic
+# Scholar indexes some papers days after their publication date
+WATERMARK_OVERLAP_DAYS = int(os.environ.get("WATERMARK_OVERLAP_DAYS", "2"))
+
+# (field, paperId) -> (publication day, signature, paper JSON)
+StoredPaper = Tuple[str, str, str]
+
+
+def paper_signature(paper: Dict[str, Any]) -> str:
+    """Hash of everything fetched for a paper; changes when S2 updates it."""
+    data = {k: v for k, v in paper.items() if k != "field"}
+    text = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def watermark_key(source: str, field: str) -> str:
+    """Watermark name of a source's field (Semantic Scholar's is the field)."""
+    return field if source == "semantic_scholar" else f"{source}:{field}"
+
+
+def publication_day(paper: Dict[str, Any]) -> str:
+    """YYYY-MM-DD the paper counts as published (today when unknown)."""
+    return (paper.get("publicationDate") or datetime.now().strftime("%Y-%m-%d"))[:10]
+
+
+class PaperStore:
+    """
+    Recently fetched papers by (field, paperId) plus a watermark per source
+    and field, the latest publication date seen. Fetches start from the
+    watermarks, and add() reports only papers that are new or changed, so
+    fetch volume and DB writes follow new papers rather than the window
+    size; recent() serves the scoring window locally.
+    This base class keeps everything in memory for one process.
+    """
+
+    def __init__(self):
+        self.new = 0
+        self.changed = 0
+        self.unchanged = 0
+        self._papers: Dict[Tuple[str, str], StoredPaper] = {}
+        self._watermarks: Dict[str, str] = {}
+
+    def _get_watermarks(self) -> Dict[str, str]:
+        return dict(self._watermarks)
+
+    def _set_watermarks(self, watermarks: Dict[str, str]) -> None:
+        self._watermarks.update(watermarks)
+
+    def _get_signatures(
+        self, keys: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], str]:
+        return {key: self._papers[key][1] for key in keys if key in self._papers}
+
+    def _put_many(self, rows: Dict[Tuple[str, str], StoredPaper]) -> None:
+        self._papers.update(rows)
+
+    def _iter_since(self, day: str) -> Iterable[Tuple[str, str]]:
+        """(field, paper JSON) published on or after `day`, in insertion order."""
+        for (field, _), (published, _, data) in self._papers.items():
+            if published >= day:
+                yield field, data
+
+    def _prune(self, day: str) -> None:
+        self._papers = {
+            key: row for key, row in self._papers.items() if row[0] >= day
+        }
+
+    def fetch_since(self, keys: Iterable[str], days: int = 7) -> Dict[str, str]:
+        """
+        Per watermark key, the publication date to fetch from: the watermark
+        minus WATERMARK_OVERLAP_DAYS, never earlier than the start of the
+        window nor later than today.
+        """
+        today = datetime.now()
+        window_start = today - timedelta(days=days)
+        watermarks = self._get_watermarks()
+        since = {}
+        for key in keys:
+            start = window_start
+            if key in watermarks:
+                resume = datetime.strptime(watermarks[key], "%Y-%m-%d") - timedelta(
+                    days=WATERMARK_OVERLAP_DAYS
+                )
+                start = min(max(start, resume), today)
+            since[key] = start.strftime("%Y-%m-%d")
+        return since
+
+    def add(
+        self, papers: Iterable[Dict[str, Any]], chunk_size: int = 500
+    ) -> List[Dict[str, Any]]:
+        """
+        Record fetched papers (each tagged with `field`, and `source` when
+        not from Semantic Scholar) and advance the watermarks. Watermarks
+        never pass today: searches are open-ended and return future-dated
+        papers (e.g. journal issue dates). Returns the papers that were new
+        or had changed.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        fresh = []
+        counts = {"new": 0, "changed": 0, "unchanged": 0}
+        watermarks: Dict[str, str] = {}
+        chunk: List[Dict[str, Any]] = []
+
+        def flush() -> None:
+            keys = [
+                (p["field"], p.get("paperId") or paper_signature(p)) for p in chunk
+            ]
+            known = self._get_signatures(keys)
+            rows = {}
+            for key, paper in zip(keys, chunk):
+                signature = paper_signature(paper)
+                previous = known.get(key)
+                if previous == signature:
+                    counts["unchanged"] += 1
+                    continue
+                counts["new" if previous is None else "changed"] += 1
+                data = {k: v for k, v in paper.items() if k != "field"}
+                rows[key] = (publication_day(paper), signature, json.dumps(data))
+                fresh.append(paper)
+            if rows:
+                self._put_many(rows)
+            chunk.clear()
+
+        for paper in papers:
+            key = watermark_key(paper.get("source", "semantic_scholar"), paper["field"])
+            day = min(publication_day(paper), today)
+            if day > watermarks.get(key, ""):
+                watermarks[key] = day
+            chunk.append(paper)
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+
+        current = self._get_watermarks()
+        self._set_watermarks(
+            {
+                field: day
+                for field, day in watermarks.items()
+                if day > current.get(field, "")
+            }
+        )
+        self.new += counts["new"]
+        self.changed += counts["changed"]
+        self.unchanged += counts["unchanged"]
+        for name, count in counts.items():
+            increment(f"paper_store.{name}", count)
+        return fresh
+
+    def recent(self, days: int = 7) -> List[Dict[str, Any]]:
+        """Papers published in the last `days` days, each tagged with `field`."""
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+        self._prune(cutoff)
+        papers = []
+        for field, data in self._iter_since(cutoff):
+            paper = json.loads(data)
+            paper["field"] = field
+            papers.append(paper)
+        return papers
+
+    def stats(self) -> str:
+        return f"{self.new} new, {self.changed} changed, {self.unchanged} unchanged"
+
+
+class SQLitePaperStore(PaperStore):
+    """
+    Paper store mirrored to a local SQLite file, so watermarks and the
+    window survive between runs (CI restores it with actions/cache).
+    """
+
+    def __init__(self, path: str = PAPER_STORE_PATH):
+        super().__init__()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS papers (
+                field TEXT NOT NULL,
+                paper_id TEXT NOT NULL,
+                published_at TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                data TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (field, paper_id)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS papers_published ON papers (published_at)"
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS watermarks (
+                field TEXT PRIMARY KEY,
+                published_at TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def _get_watermarks(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(
+                self._conn.execute("SELECT field, published_at FROM watermarks")
+            )
+
+    def _set_watermarks(self, watermarks: Dict[str, str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+                [(field, day, now) for field, day in watermarks.items()],
+            )
+            self._conn.commit()
+
+    def _get_signatures(
+        self, keys: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], str]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 400):
+                chunk = keys[start : start + 400]
+                placeholders = ",".join("(?, ?)" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT field, paper_id, signature FROM papers "
+                    f"WHERE (field, paper_id) IN (VALUES {placeholders})",
+                    [value for key in chunk for value in key],
+                ).fetchall()
+                found.update({(field, pid): sig for field, pid, sig in rows})
+        return found
+
+    def _put_many(self, rows: Dict[Tuple[str, str], StoredPaper]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO papers VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (field, paper_id, published, signature, data, now)
+                    for (field, paper_id), (published, signature, data) in rows.items()
+                ],
+            )
+            self._conn.commit()
+
+    def _iter_since(self, day: str) -> Iterable[Tuple[str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT field, data FROM papers WHERE published_at >= ? ORDER BY rowid",
+                (day,),
+            ).fetchall()
+
+    def _prune(self, day: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM papers WHERE published_at < ?", (day,))
+            self._conn.commit()
+
+
+def get_paper_store(backend: Optional[str] = None) -> PaperStore:
+    """
+    Build the paper store selected by PAPER_STORE_BACKEND ('sqlite' or
+    'memory'). Falls back to the in-memory store on errors, which fetches
+    the whole window like a first run.
+    """
+    backend = (backend or PAPER_STORE_BACKEND).lower()
+    if backend == "sqlite":
+        try:
+            return SQLitePaperStore()
+        except Exception as e:
+            print(f"Paper store unavailable ({backend}): {e}")
+    return PaperStore()
@@ -1,9 +1,42 @@
-from datetime import datetime
-from typing import List, Dict, Any
-from src.db import get_supabase_client
+import os
+import math
+import heapq
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Optional, Set
 
+import numpy as np
 
-def calculate_score(paper: Dict[str, Any]) -> float:
+from src.db import (
+    get_supabase_client,
+    iter_table_pages,
+    upsert_in_chunks,
+    DB_PAGE_SIZE,
+    DB_CHUNK_SIZE,
+)
+
+# Papers scored per vectorized batch when consuming a stream
+SCORE_CHUNK_SIZE = 10000
+
+# `papers` columns rescore_rows needs
+SCORE_COLUMNS = (
+    "id,source,external_id,title,published_at,citation_count,"
+    "influential_citation_count,score,score_signature"
+)
+
+# Nightly rescoring skips papers published before this window
+SCORE_MAX_AGE_DAYS = int(os.environ.get("SCORE_MAX_AGE_DAYS", "365"))
+
+# After the first 30 days the recency bucket rolls over each time a paper's
+# age grows by this factor
+RECENCY_BUCKET_GROWTH = 1.1
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROS_PER_DAY = 86_400_000_000
+
+
+def calculate_score(paper: Dict[str, Any], now: Optional[datetime] = None) -> float:
     """
     Calculate paper score
 
@@ -13,6 +46,8 @@ def calculate_score(paper: Dict[str, Any]) -> float:
             author_score * 0.10 +
             category_boost * 0.10
     """
+    now = now or datetime.now()
+
     # Citation velocity (citations per month)
     citations = paper.get("citationCount", 0) or 0
     pub_date = paper.get("publicationDate") or paper.get("published_at")
@@ -22,10 +57,8 @@ def calculate_score(paper: Dict[str, Any]) -> float:
             try:
                 pub_date = datetime.fromisoformat(pub_date.replace("Z", "+00:00"))
             except:
-                pub_date = datetime.now()
-        months_since_pub = max(
-            1, (datetime.now() - pub_date.replace(tzinfo=None)).days / 30
-        )
+                pub_date = now
+        months_since_pub = max(1, (now - pub_date.replace(tzinfo=None)).days / 30)
     else:
         months_since_pub = 1
 
@@ -56,14 +89,152 @@ def calculate_score(paper: Dict[str, Any]) -> float:
     return round(score, 4)
 
 
-def score_papers(papers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _datetime_micros(value: datetime) -> int:
+    """Naive microseconds since epoch (timezone dropped, as calculate_score does)."""
+    delta = value.replace(tzinfo=None) - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+@lru_cache(maxsize=4096)
+def _parse_pub_date(value: str) -> Optional[int]:
+    try:
+        return _datetime_micros(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    except ValueError:
+        return None
+
+
+def _pub_date_micros(paper: Dict[str, Any]) -> Optional[int]:
+    pub_date = paper.get("publicationDate") or paper.get("published_at")
+    if isinstance(pub_date, str) and pub_date:
+        return _parse_pub_date(pub_date)
+    if isinstance(pub_date, datetime):
+        return _datetime_micros(pub_date)
+    return None
+
+
+def calculate_scores(
+    papers: List[Dict[str, Any]], now: Optional[datetime] = None
+) -> np.ndarray:
     """
-    Calculate scores for all papers and sort
+    Vectorized calculate_score for a batch of papers.
+
+    The batch is turned into columns once (citations, influential citations,
+    days since publication) and every component is computed on whole arrays
+    against a single reference timestamp. Returns the rounded scores, equal
+    to calculate_score(paper, now) for each paper.
     """
-    for paper in papers:
-        paper["score"] = calculate_score(paper)
+    now = now or datetime.now()
+    n = len(papers)
+    now_micros = _datetime_micros(now)
+
+    citations = np.fromiter(
+        (p.get("citationCount", 0) or 0 for p in papers), dtype=np.float64, count=n
+    )
+    influential = np.fromiter(
+        (p.get("influentialCitationCount", 0) or 0 for p in papers),
+        dtype=np.float64,
+        count=n,
+    )
+    # Missing or unparseable dates count as published now (months = 1)
+    pub_micros = np.fromiter(
+        (
+            now_micros if (micros := _pub_date_micros(p)) is None else micros
+            for p in papers
+        ),
+        dtype=np.int64,
+        count=n,
+    )
+    days = (now_micros - pub_micros) // _MICROS_PER_DAY
 
-    return sorted(papers, key=lambda x: x["score"], reverse=True)
+    months_since_pub = np.maximum(1, days / 30)
+    citation_velocity = citations / months_since_pub
+    influential_ratio = influential / np.maximum(1, citations)
+    recency = 1 / (1 + months_since_pub / 6)
+    author_score = np.minimum(1.0, citations / 100)
+    category_boost = 0.5
+
+    scores = (
+        citation_velocity * 0.35
+        + influential_ratio * 0.25
+        + recency * 0.20
+        + author_score * 0.10
+        + category_boost * 0.10
+    )
+
+    return _round4(scores)
+
+
+def _round4(values: np.ndarray) -> np.ndarray:
+    """
+    Same result as Python's round(x, 4) for every element.
+    np.round can differ when x * 10**4 lands within float error of a .5
+    boundary, so only those few values go through round().
+    """
+    scaled = values * 10000
+    rounded = np.rint(scaled) / 10000
+    ambiguous = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    for i in ambiguous.tolist():
+        rounded[i] = round(float(values[i]), 4)
+    return rounded
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, earlier index winning ties
+    (same order as a stable descending sort) in O(n + k log k).
+    """
+    n = len(scores)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    threshold = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > threshold)
+    at = np.flatnonzero(scores == threshold)[: k - len(above)]
+    candidates = np.concatenate([above, at])
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def score_papers(
+    papers: Iterable[Dict[str, Any]],
+    keep: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Calculate scores for all papers and sort
+    Papers are consumed in vectorized batches as the iterable yields them,
+    so a streaming fetch can be fed in directly. With `keep`, only the best
+    `keep` papers survive each batch. Ties keep their input order.
+    """
+    now = now or datetime.now()
+    iterator = iter(papers)
+    kept: List[Dict[str, Any]] = []
+    score_chunks: List[np.ndarray] = []
+
+    while True:
+        chunk = list(islice(iterator, SCORE_CHUNK_SIZE))
+        if not chunk:
+            break
+        chunk_scores = calculate_scores(chunk, now)
+        for paper, score in zip(chunk, chunk_scores.tolist()):
+            paper["score"] = score
+
+        # Earlier survivors come first so they keep winning ties
+        kept.extend(chunk)
+        score_chunks.append(chunk_scores)
+        if keep is not None and len(kept) > keep:
+            kept_scores = np.concatenate(score_chunks)
+            order = top_k_indices(kept_scores, keep)
+            kept = [kept[i] for i in order]
+            score_chunks = [kept_scores[order]]
+
+    if not kept:
+        return []
+    kept_scores = np.concatenate(score_chunks)
+    order = top_k_indices(kept_scores, len(kept) if keep is None else keep)
+    return [kept[i] for i in order.tolist()]
 
 
 def get_top_papers(papers: List[Dict[str, Any]], n: int = 3) -> List[Dict[str, Any]]:
@@ -98,27 +269,122 @@ def get_top_papers_by_field(
     return sorted(top_papers, key=lambda x: x["score"], reverse=True)
 
 
-def update_paper_scores_in_db():
+def db_row_to_score_input(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a `papers` row onto the keys calculate_score reads."""
+    return {
+        "citationCount": row.get("citation_count"),
+        "influentialCitationCount": row.get("influential_citation_count"),
+        "published_at": row.get("published_at"),
+    }
+
+
+def recency_bucket(days: int) -> int:
     """
-    Update scores for papers in DB
+    0 for the first 30 days, when age doesn't affect the score; after that
+    a new bucket each time the age grows by RECENCY_BUCKET_GROWTH.
     """
-    supabase = get_supabase_client()
+    if days <= 30:
+        return 0
+    return 1 + int(math.log(days / 30) / math.log(RECENCY_BUCKET_GROWTH))
 
-    # Get all papers
-    result = supabase.table("papers").select("*").execute()
-    papers = result.data if result.data else []
 
-    # Calculate and update scores
-    for paper in papers:
-        if isinstance(paper, dict):
-            score = calculate_score(paper)
-            paper_id = paper.get("id")
-            if paper_id:
-                supabase.table("papers").update({"score": score}).eq(
-                    "id", paper_id
-                ).execute()
+def score_signature(paper: Dict[str, Any], now: Optional[datetime] = None) -> str:
+    """
+    Everything the score depends on: citations, influential citations and
+    the recency bucket. Scores are exact when written but are only
+    recomputed when the bucket rolls over, so a stored score can run ahead
+    of the exact one by up to 1 - 1/1.1 (about 9%) of its citation-velocity
+    term plus 0.005 of recency. In exchange, a paper older than 30 days is
+    rewritten about every 10% of its age rather than every night.
+    """
+    now = now or datetime.now()
+    citations = paper.get("citationCount", 0) or 0
+    influential = paper.get("influentialCitationCount", 0) or 0
+    pub_micros = _pub_date_micros(paper)
+    days = 0
+    if pub_micros is not None:
+        days = (_datetime_micros(now) - pub_micros) // _MICROS_PER_DAY
+    return f"{citations}:{influential}:{recency_bucket(days)}"
 
-    print(f"Updated scores for {len(papers)} papers")
+
+def rescore_rows(
+    rows: List[Dict[str, Any]], now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Upsert payloads for the `papers` rows whose score signature is stale
+    (new citation counts or a rolled-over recency bucket) or unscored.
+    Rows need id, source, external_id, title, published_at, the citation
+    columns, score and score_signature.
+    """
+    now = now or datetime.now()
+    inputs = [db_row_to_score_input(row) for row in rows]
+    signatures = [score_signature(paper, now) for paper in inputs]
+    stale = [
+        i
+        for i, (row, signature) in enumerate(zip(rows, signatures))
+        if row.get("score_signature") != signature or row.get("score") is None
+    ]
+    if not stale:
+        return []
+
+    scores = calculate_scores([inputs[i] for i in stale], now)
+    changed = []
+    for i, score in zip(stale, scores.tolist()):
+        row = rows[i]
+        # NOT NULL columns ride along so the upsert's insert path is valid
+        changed.append(
+            {
+                "id": row["id"],
+                "source": row["source"],
+                "external_id": row["external_id"],
+                "title": row["title"],
+                "score": score,
+                "score_signature": signatures[i],
+            }
+        )
+    return changed
+
+
+def update_paper_scores_in_db(
+    max_age_days: Optional[int] = SCORE_MAX_AGE_DAYS,
+    page_size: int = DB_PAGE_SIZE,
+    chunk_size: int = DB_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """
+    Update scores for papers in DB
+    Incremental: reads only the columns the score needs, page by page, and
+    rewrites only rows whose score signature changed (new citation counts or
+    a rolled-over recency bucket), in chunked bulk upserts.
+    `max_age_days` (SCORE_MAX_AGE_DAYS by default, None for every paper)
+    skips papers published before that window.
+    """
+    supabase = get_supabase_client()
+    now = datetime.now()
+
+    def apply_filters(query):
+        if max_age_days is None:
+            return query
+        cutoff = (now - timedelta(days=max_age_days)).date().isoformat()
+        return query.gte("published_at", cutoff)
+
+    scanned = 0
+    changed = []
+    for rows in iter_table_pages(
+        supabase,
+        "papers",
+        SCORE_COLUMNS,
+        page_size=page_size,
+        apply_filters=apply_filters,
+    ):
+        scanned += len(rows)
+        changed.extend(rescore_rows(rows, now))
+
+    written = upsert_in_chunks(
+        supabase, "papers", changed, on_conflict="id", chunk_size=chunk_size
+    )
+
+    print(f"Updated scores for {written} of {scanned} papers")
+    return {"scanned": scanned, "changed": len(changed), "written": written}
 
 
 def main():
@@ -211,11 +477,16 @@ def filter_papers_by_fields(
     """
     Filter papers by preferred fields.
     If fields is empty or None, return all papers.
+    A paper matches if any of its merged `fields` tags is preferred.
     """
     if not fields:
         return papers
 
-    return [p for p in papers if p.get("field") in fields]
+    return [
+        p
+        for p in papers
+        if any(f in fields for f in (p.get("fields") or [p.get("field")]))
+    ]
 
 
 def get_personalized_papers(
@@ -231,3 +502,80 @@ def get_personalized_papers(
     # Sort by score (already calculated) and take top N
     sorted_papers = sorted(filtered, key=lambda x: x.get("score", 0), reverse=True)
     return sorted_papers[:n]
+
+
+class PaperSelector:
+    """
+    Personalized top-N selection over one fixed, scored paper pool.
+    Papers are ranked once (score descending, input order on ties, same as
+    get_personalized_papers) and split into per-field rank lists. A query
+    merges the lists for the subscriber's fields and skips excluded ids, so
+    it stops after about n papers instead of filtering and sorting the pool.
+    Results are memoized by (fields, excluded ids present in the pool), since
+    most subscribers share a few field combinations and sent histories.
+    """
+
+    def __init__(self, papers: List[Dict[str, Any]]):
+        self.ranked = sorted(papers, key=lambda x: x.get("score", 0), reverse=True)
+        self.by_field: Dict[str, List[int]] = {}
+        for rank, paper in enumerate(self.ranked):
+            for field in paper.get("fields") or [paper.get("field")]:
+                ranks = self.by_field.setdefault(field, [])
+                # A paper listing the same tag twice still appears once
+                if not ranks or ranks[-1] != rank:
+                    ranks.append(rank)
+        self.candidate_ids = {p.get("paperId") for p in self.ranked}
+        self._memo: Dict[tuple, List[Dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _ranks(self, fields: frozenset) -> Iterable[int]:
+        if not fields:
+            return range(len(self.ranked))
+        lists = [self.by_field[f] for f in fields if f in self.by_field]
+        if len(lists) == 1:
+            return lists[0]
+        return heapq.merge(*lists)
+
+    def select(
+        self,
+        preferred_fields: Optional[List[str]] = None,
+        exclude_ids: Optional[Set[str]] = None,
+        n: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """
+        Top N papers for the preferred fields (all fields when empty),
+        skipping papers whose paperId is in exclude_ids.
+        """
+        fields = frozenset(preferred_fields or ())
+        excluded = frozenset(
+            self.candidate_ids.intersection(exclude_ids) if exclude_ids else ()
+        )
+        key = (fields, excluded, n)
+        cached = self._memo.get(key)
+        if cached is not None:
+            self.hits += 1
+            return list(cached)
+        self.misses += 1
+
+        selected = []
+        last_rank = -1
+        if n > 0:
+            for rank in self._ranks(fields):
+                # Papers tagged with several chosen fields come out of the
+                # merge once per tag
+                if rank == last_rank:
+                    continue
+                last_rank = rank
+                paper = self.ranked[rank]
+                if excluded and paper.get("paperId") in excluded:
+                    continue
+                selected.append(paper)
+                if len(selected) >= n:
+                    break
+
+        self._memo[key] = selected
+        return list(selected)
+
+    def stats(self) -> str:
+        return f"{self.hits} memo hits, {self.misses} selections computed"
@@ -0,0 +1,337 @@
+import os
+import re
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterator
+
+from src.http_client import HttpClient
+from src.rate_limiter import TokenBucket
+from src.metrics import increment
+
+ARXIV_API = os.environ.get("ARXIV_API_URL", "http://export.arxiv.org/api/query")
+
+# arXiv asks API clients for at most one request every three seconds
+ARXIV_RPS = float(os.environ.get("ARXIV_RPS", "0.33"))
+ARXIV_PAGE_SIZE = 100
+
+PUBMED_API = os.environ.get(
+    "PUBMED_API_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+)
+NCBI_API_KEY = os.environ.get("NCBI_API_KEY")
+
+# E-utilities allow 3 requests per second, 10 with an API key
+PUBMED_RPS = float(os.environ.get("PUBMED_RPS", "10" if NCBI_API_KEY else "3"))
+PUBMED_FETCH_SIZE = 200
+
+# Our fields -> arXiv categories
+ARXIV_CATEGORIES = {
+    "cs": ["cs.AI", "cs.LG", "cs.CL", "cs.CV", "cs.CR", "cs.DS", "cs.SE"],
+    "physics": ["quant-ph", "cond-mat.mtrl-sci", "hep-th", "gr-qc", "physics.optics"],
+    "bio": ["q-bio.BM", "q-bio.GN", "q-bio.NC", "q-bio.PE", "q-bio.QM"],
+    "math": ["math.CO", "math.PR", "math.AP", "math.NT", "math.OC", "math.ST"],
+}
+
+# Our fields -> PubMed search terms (PubMed only covers the life sciences)
+PUBMED_QUERIES = {
+    "bio": "(molecular biology[MeSH Terms] OR genomics[MeSH Terms] "
+    "OR cell biology[MeSH Terms] OR neurosciences[MeSH Terms])",
+}
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+OPENSEARCH = "{http://a9.com/-/spec/opensearch/1.1/}"
+
+MONTHS = {
+    name: index
+    for index, name in enumerate(
+        "jan feb mar apr may jun jul aug sep oct nov dec".split(), 1
+    )
+}
+
+
+def normalized_paper(
+    source: str,
+    source_id: str,
+    title: str,
+    abstract: Optional[str],
+    authors: List[str],
+    published: Optional[str],
+    url: str,
+    external_ids: Dict[str, str],
+    fields_of_study: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    A paper in the Semantic Scholar shape the scorer, dedup and senders
+    read. paperId is prefixed with the source so ids never collide; these
+    sources have no citation data, so counts start at zero until the
+    citation refresh finds the paper on Semantic Scholar. A missing
+    publication date is None, never "", which the DB's DATE column rejects.
+    """
+    return {
+        "paperId": f"{source}:{source_id}",
+        "source": source,
+        "sourceId": source_id,
+        "externalIds": {k: v for k, v in external_ids.items() if v},
+        "title": title,
+        "abstract": abstract,
+        "authors": [{"name": name} for name in authors],
+        "citationCount": 0,
+        "influentialCitationCount": 0,
+        "publicationDate": published or None,
+        "url": url,
+        "fieldsOfStudy": fields_of_study or [],
+    }
+
+
+def _text(element: Optional[ET.Element]) -> str:
+    """All text under an element (inline markup dropped), whitespace collapsed."""
+    if element is None:
+        return ""
+    return " ".join("".join(element.itertext()).split())
+
+
+class PaperSource(ABC):
+    """
+    A paper provider the fetcher runs next to Semantic Scholar.
+
+    fetch(field, since) is an async generator of normalized papers
+    published on or after `since` (YYYY-MM-DD; the last `days` days when
+    None), at most `max_results` per field. `fields` maps the fields the
+    source covers to its own query terms; other fields are skipped.
+    Errors from a source that isn't `required` are logged and skipped.
+    """
+
+    name = ""
+    required = False
+    fields: Dict[str, Any] = {}
+    rate = 1.0
+
+    def __init__(
+        self,
+        client: HttpClient,
+        max_results: int = 50,
+        days: int = 7,
+        limiter: Optional[TokenBucket] = None,
+    ):
+        self.client = client
+        self.max_results = max_results
+        self.days = days
+        self.limiter = limiter or TokenBucket(self.rate)
+
+    def covers(self, field: str) -> bool:
+        return field in self.fields
+
+    def start_date(self, since: Optional[str]) -> str:
+        if since:
+            return since
+        return (datetime.now() - timedelta(days=self.days)).strftime("%Y-%m-%d")
+
+    @abstractmethod
+    def fetch(
+        self, field: str, since: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Papers for `field` published on or after `since`."""
+
+
+def parse_arxiv_feed(text: str) -> Tuple[List[Dict[str, Any]], int]:
+    """Papers in an arXiv API Atom feed, plus the feed's totalResults."""
+    root = ET.fromstring(text)
+    total = int(root.findtext(f"{OPENSEARCH}totalResults") or 0)
+    papers = []
+    for entry in root.iter(f"{ATOM}entry"):
+        # http://arxiv.org/abs/2410.01234v2 -> 2410.01234
+        abs_url = entry.findtext(f"{ATOM}id", "")
+        arxiv_id = re.sub(r"v\d+$", "", abs_url.split("/abs/")[-1])
+        if not arxiv_id:
+            continue
+        category = entry.find(f"{ARXIV}primary_category")
+        papers.append(
+            normalized_paper(
+                "arxiv",
+                arxiv_id,
+                _text(entry.find(f"{ATOM}title")),
+                _text(entry.find(f"{ATOM}summary")) or None,
+                [_text(a.find(f"{ATOM}name")) for a in entry.iter(f"{ATOM}author")],
+                entry.findtext(f"{ATOM}published", "")[:10] or None,
+                f"https://arxiv.org/abs/{arxiv_id}",
+                {"ArXiv": arxiv_id, "DOI": entry.findtext(f"{ARXIV}doi")},
+                [category.get("term")] if category is not None else None,
+            )
+        )
+    return papers, total
+
+
+class ArxivSource(PaperSource):
+    """arXiv API (Atom): newest submissions in the field's categories."""
+
+    name = "arxiv"
+    fields = ARXIV_CATEGORIES
+    rate = ARXIV_RPS
+
+    async def fetch(
+        self, field: str, since: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        start_date = self.start_date(since)
+        categories = " OR ".join(f"cat:{c}" for c in self.fields[field])
+        params = {
+            "search_query": f"({categories}) AND submittedDate:"
+            f"[{start_date.replace('-', '')}0000 TO "
+            f"{datetime.now().strftime('%Y%m%d')}2359]",
+            "sortBy": "submittedDate",
+            "sortOrder": "descending",
+            "start": 0,
+            "max_results": min(ARXIV_PAGE_SIZE, self.max_results),
+        }
+
+        yielded = 0
+        while yielded < self.max_results:
+            response = await self.client.get(
+                ARXIV_API, params=params, limiter=self.limiter
+            )
+            response.raise_for_status()
+            papers, total = parse_arxiv_feed(response.text)
+            increment("fetch.pages")
+            if not papers:
+                return
+
+            for paper in papers:
+                # Newest first, so the first older paper ends the window
+                published = paper["publicationDate"]
+                if published and published < start_date:
+                    return
+                increment("fetch.papers")
+                increment(f"fetch.{self.name}.papers")
+                yield paper
+                yielded += 1
+                if yielded >= self.max_results:
+                    return
+
+            params["start"] += len(papers)
+            if params["start"] >= total:
+                return
+
+
+def _pubmed_date(article: ET.Element) -> Optional[str]:
+    """
+    YYYY-MM-DD from the electronic publication date, else the journal
+    issue date (month names and missing days allowed); None when the
+    record has neither.
+    """
+    date = article.find("ArticleDate")
+    if date is None:
+        date = article.find("Journal/JournalIssue/PubDate")
+    if date is None or not date.findtext("Year"):
+        return None
+    month = (date.findtext("Month") or "1").strip()
+    month = MONTHS.get(month[:3].lower(), month)
+    day = date.findtext("Day") or "1"
+    try:
+        return f"{int(date.findtext('Year')):04d}-{int(month):02d}-{int(day):02d}"
+    except ValueError:
+        return f"{date.findtext('Year')}-01-01"
+
+
+def parse_pubmed_articles(text: str) -> List[Dict[str, Any]]:
+    """Papers in an E-utilities efetch PubmedArticleSet (XML)."""
+    root = ET.fromstring(text)
+    papers = []
+    for record in root.iter("PubmedArticle"):
+        pmid = record.findtext("MedlineCitation/PMID")
+        article = record.find("MedlineCitation/Article")
+        if not pmid or article is None:
+            continue
+
+        sections = []
+        for part in article.iterfind("Abstract/AbstractText"):
+            label = part.get("Label")
+            body = _text(part)
+            sections.append(f"{label}: {body}" if label else body)
+
+        authors = []
+        for author in article.iterfind("AuthorList/Author"):
+            parts = [author.findtext("ForeName"), author.findtext("LastName")]
+            name = " ".join(p for p in parts if p)
+            authors.append(name or _text(author.find("CollectiveName")))
+
+        ids = {
+            item.get("IdType"): item.text
+            for item in record.iterfind("PubmedData/ArticleIdList/ArticleId")
+        }
+        journal = _text(article.find("Journal/Title"))
+        papers.append(
+            normalized_paper(
+                "pubmed",
+                pmid,
+                _text(article.find("ArticleTitle")),
+                " ".join(sections) or None,
+                [a for a in authors if a],
+                _pubmed_date(article),
+                f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+                {
+                    "PubMed": pmid,
+                    "DOI": ids.get("doi"),
+                    "PubMedCentral": ids.get("pmc"),
+                },
+                [journal] if journal else None,
+            )
+        )
+    return papers
+
+
+class PubMedSource(PaperSource):
+    """PubMed E-utilities: esearch for the window's ids, efetch for records."""
+
+    name = "pubmed"
+    fields = PUBMED_QUERIES
+    rate = PUBMED_RPS
+
+    def _params(self, **params) -> Dict[str, Any]:
+        if NCBI_API_KEY:
+            params["api_key"] = NCBI_API_KEY
+        return params
+
+    async def fetch(
+        self, field: str, since: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        start_date = self.start_date(since)
+        response = await self.client.get(
+            f"{PUBMED_API}/esearch.fcgi",
+            params=self._params(
+                db="pubmed",
+                term=self.fields[field],
+                datetype="pdat",
+                mindate=start_date.replace("-", "/"),
+                maxdate=datetime.now().strftime("%Y/%m/%d"),
+                retmax=self.max_results,
+                sort="pub_date",
+                retmode="json",
+            ),
+            limiter=self.limiter,
+        )
+        response.raise_for_status()
+        ids = response.json()["esearchresult"]["idlist"][: self.max_results]
+
+        for start in range(0, len(ids), PUBMED_FETCH_SIZE):
+            response = await self.client.get(
+                f"{PUBMED_API}/efetch.fcgi",
+                params=self._params(
+                    db="pubmed",
+                    id=",".join(ids[start : start + PUBMED_FETCH_SIZE]),
+                    retmode="xml",
+                ),
+                limiter=self.limiter,
+            )
+            response.raise_for_status()
+            increment("fetch.pages")
+            for paper in parse_pubmed_articles(response.text):
+                increment("fetch.papers")
+                increment(f"fetch.{self.name}.papers")
+                yield paper
+
+
+# Sources besides Semantic Scholar, by PAPER_SOURCES name
+SOURCES = {
+    ArxivSource.name: ArxivSource,
+    PubMedSource.name: PubMedSource,
+}
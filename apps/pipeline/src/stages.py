@@ -0,0 +1,125 @@
+import time
+import asyncio
+import inspect
+from typing import List, Dict, Any, Callable, Optional, Sequence
+
+
+class Stage:
+    """
+    One step of the pipeline. `fn` receives the results of its `deps` as
+    keyword arguments (by stage name). Coroutine functions run on the event
+    loop; plain functions run in a worker thread so they don't block
+    other stages.
+    """
+
+    def __init__(self, name: str, fn: Callable, deps: Sequence[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.status = "pending"
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+
+class StageGraph:
+    """
+    DAG of stages run with as much overlap as the dependencies allow.
+    A stage starts as soon as everything it depends on has finished; if a
+    dependency failed or was skipped, the stage is skipped.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def add(self, name: str, fn: Callable, deps: Sequence[str] = ()) -> Stage:
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        stage = self.stages[name] = Stage(name, fn, deps)
+        return stage
+
+    async def _run_stage(self, stage: Stage, tasks: Dict[str, asyncio.Task]) -> None:
+        if stage.deps:
+            await asyncio.wait([tasks[dep] for dep in stage.deps])
+        if any(self.stages[dep].status != "done" for dep in stage.deps):
+            stage.status = "skipped"
+            return
+
+        kwargs = {dep: self.results[dep] for dep in stage.deps}
+        stage.status = "running"
+        stage.started = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(stage.fn):
+                result = await stage.fn(**kwargs)
+            else:
+                result = await asyncio.to_thread(stage.fn, **kwargs)
+        except Exception as e:
+            stage.error = e
+            stage.status = "failed"
+            print(f"Stage {stage.name} failed: {type(e).__name__}: {e}")
+        else:
+            self.results[stage.name] = result
+            stage.status = "done"
+        finally:
+            stage.finished = time.perf_counter()
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every stage; returns results of the stages that finished."""
+        self.started = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        # Stages are added after their deps, so creation order is topological
+        for name, stage in self.stages.items():
+            tasks[name] = asyncio.create_task(self._run_stage(stage, tasks))
+        await asyncio.gather(*tasks.values())
+        self.finished = time.perf_counter()
+        return self.results
+
+    @property
+    def failed(self) -> List[str]:
+        return [name for name, s in self.stages.items() if s.status == "failed"]
+
+    def timings(self) -> List[Dict[str, Any]]:
+        """Per-stage status, start offset and duration in seconds."""
+        rows = []
+        for name, stage in self.stages.items():
+            rows.append(
+                {
+                    "stage": name,
+                    "status": stage.status,
+                    "deps": stage.deps,
+                    "start": round(stage.started - self.started, 3)
+                    if stage.started is not None
+                    else None,
+                    "duration": round(stage.duration, 3)
+                    if stage.duration is not None
+                    else None,
+                }
+            )
+        return rows
+
+    def report(self) -> str:
+        """Timing table, one line per stage plus total wall time."""
+        lines = [f"{'stage':<16} {'status':<8} {'start':>8} {'duration':>9}"]
+        for row in self.timings():
+            start = f"{row['start']:.2f}s" if row["start"] is not None else "-"
+            duration = (
+                f"{row['duration']:.2f}s" if row["duration"] is not None else "-"
+            )
+            lines.append(
+                f"{row['stage']:<16} {row['status']:<8} {start:>8} {duration:>9}"
+            )
+        if self.started is not None and self.finished is not None:
+            lines.append(f"{'total':<16} {'':<8} {'':>8} {self.finished - self.started:>8.2f}s")
+        return "\n".join(lines)
@@ -1,17 +1,40 @@
 import os
-from typing import List, Dict, Any
-from groq import Groq
+import json
+import asyncio
+from typing import List, Dict, Any, Optional
+from src.llm import (
+    LLMBackend,
+    LLMRateLimitError,
+    get_llm_backend,
+    get_llm_backend_class,
+)
+from src.rate_limiter import TokenBucket
+from src.metrics import timed, timer, increment
+from src.summary_cache import SummaryCache, get_summary_cache, make_cache_key
 
 # Input length limits to prevent prompt injection
 MAX_TITLE_LENGTH = 300
 MAX_ABSTRACT_LENGTH = 3000
 
+MAX_SUMMARY_TOKENS = 150
 
-def get_groq_client() -> Groq:
-    api_key = os.environ.get("GROQ_API_KEY")
-    if not api_key:
-        raise ValueError("GROQ_API_KEY must be set")
-    return Groq(api_key=api_key)
+# Groq free-tier limits for the summary model; override for paid plans
+GROQ_RPM = float(os.environ.get("GROQ_RPM", "30"))
+GROQ_TPM = float(os.environ.get("GROQ_TPM", "12000"))
+
+# Summarization requests in flight at once
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", "8"))
+
+# Papers packed into one request (1 = one request per paper)
+SUMMARY_BATCH_SIZE = int(os.environ.get("SUMMARY_BATCH_SIZE", "1"))
+
+# Bump whenever the prompt changes so cached summaries are regenerated
+PROMPT_VERSION = "1"
+
+FALLBACK_SUMMARY = (
+    "• Summary unavailable\n• Please check paper directly\n• Error generating summary"
+)
+ERROR_SUMMARY = "Summary temporarily unavailable"
 
 
 def sanitize_input(text: str, max_length: int) -> str:
@@ -23,20 +46,14 @@ def sanitize_input(text: str, max_length: int) -> str:
     return cleaned[:max_length]
 
 
-def summarize_paper(paper: Dict[str, Any]) -> str:
-    """
-    Generate a concise 3-point bullet summary using Groq.
-    Returns bullet points for better readability.
-    """
-    client = get_groq_client()
-
+def build_prompt(paper: Dict[str, Any]) -> str:
     # Sanitize inputs to prevent prompt injection
     title = sanitize_input(paper.get("title", "Unknown"), MAX_TITLE_LENGTH)
     abstract = sanitize_input(
         paper.get("abstract", "No abstract available"), MAX_ABSTRACT_LENGTH
     )
 
-    prompt = f"""Summarize this paper in exactly 3 short bullet points.
+    return f"""Summarize this paper in exactly 3 short bullet points.
 Each point should be ONE sentence maximum.
 Use this format:
 • [What they did/key method]
@@ -50,42 +67,296 @@ Abstract: {abstract}
 
 Write ONLY the 3 bullet points, nothing else."""
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=150,
-        temperature=0.3,
-    )
 
-    return (
-        response.choices[0].message.content
-        or "• Summary unavailable\n• Please check paper directly\n• Error generating summary"
-    )
+def estimate_tokens(prompt: str, max_tokens: int = MAX_SUMMARY_TOKENS) -> int:
+    """Rough token cost of a request (~4 chars per token plus the completion)."""
+    return len(prompt) // 4 + max_tokens
 
 
-def summarize_papers(
-    papers: List[Dict[str, Any]], max_papers: int = 3
-) -> List[Dict[str, Any]]:
+class RateBudget:
+    """
+    Requests-per-minute and tokens-per-minute budget shared by every
+    in-flight summarization request.
+    """
+
+    def __init__(self, rpm: float = GROQ_RPM, tpm: float = GROQ_TPM):
+        self.requests = TokenBucket(rpm / 60, capacity=rpm)
+        self.tokens = TokenBucket(tpm / 60, capacity=tpm)
+
+    async def acquire(self, tokens: int) -> None:
+        await self.requests.acquire()
+        await self.tokens.acquire(tokens)
+
+
+async def complete_async(
+    backend: LLMBackend,
+    prompt: str,
+    budget: RateBudget,
+    max_tokens: int = MAX_SUMMARY_TOKENS,
+    json_mode: bool = False,
+    max_retries: int = 3,
+) -> Optional[str]:
+    """
+    Run one chat completion: waits for the shared RPM/TPM budget before each
+    attempt and backs off on 429, honoring the retry-after header.
+    """
+    for attempt in range(max_retries + 1):
+        await budget.acquire(estimate_tokens(prompt, max_tokens))
+        try:
+            with timer("llm.complete"):
+                return await backend.complete(
+                    prompt, max_tokens=max_tokens, temperature=0.3, json_mode=json_mode
+                )
+        except LLMRateLimitError as e:
+            increment("llm.429")
+            if attempt >= max_retries:
+                raise
+            wait_time = e.retry_after
+            if wait_time is None:
+                wait_time = 2 ** (attempt + 1)
+            print(f"Rate limited (429), waiting {wait_time:.1f}s before retry...")
+            await asyncio.sleep(wait_time)
+
+    return None
+
+
+@timed("summarize.paper")
+async def summarize_paper_async(
+    backend: LLMBackend, paper: Dict[str, Any], budget: RateBudget
+) -> str:
+    """
+    Generate a concise 3-point bullet summary.
+    Returns bullet points for better readability.
+    """
+    summary = await complete_async(backend, build_prompt(paper), budget)
+    return summary or FALLBACK_SUMMARY
+
+
+@timed("summarize.paper_sync")
+def summarize_paper(paper: Dict[str, Any]) -> str:
+    """
+    Summarize a single paper with the configured backend (sync wrapper)
+    """
+
+    async def run() -> str:
+        backend = get_llm_backend()
+        try:
+            return await summarize_paper_async(backend, paper, RateBudget())
+        finally:
+            await backend.aclose()
+
+    return asyncio.run(run())
+
+
+def build_batch_prompt(papers: List[Dict[str, Any]]) -> str:
+    entries = []
+    for i, paper in enumerate(papers, 1):
+        # Sanitize inputs to prevent prompt injection
+        title = sanitize_input(paper.get("title", "Unknown"), MAX_TITLE_LENGTH)
+        abstract = sanitize_input(
+            paper.get("abstract", "No abstract available"), MAX_ABSTRACT_LENGTH
+        )
+        entries.append(f"Paper {i}\nTitle: {title}\nAbstract: {abstract}")
+    papers_text = "\n\n".join(entries)
+
+    return f"""Summarize each of the {len(papers)} papers below in exactly 3 short bullet points.
+Each point should be ONE sentence maximum:
+1. What they did/key method
+2. Main finding/result
+3. Why it matters/impact
+
+Target audience: researchers scanning papers over morning coffee.
+
+{papers_text}
+
+Respond with ONLY a JSON object in this shape, one entry per paper, in order:
+{{"summaries": [{{"paper": 1, "bullets": ["...", "...", "..."]}}]}}"""
+
+
+def parse_batch_response(text: Optional[str], count: int) -> List[Optional[str]]:
     """
-    Summarize multiple papers (default: top 3)
+    Parse a batched JSON response into one summary per paper.
+    Entries that are missing or malformed come back as None so the caller
+    can retry just those papers one by one.
     """
-    summaries = []
+    summaries: List[Optional[str]] = [None] * count
+    if not text:
+        return summaries
+
+    # Tolerate code fences or chatter around the JSON object
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return summaries
+    try:
+        data = json.loads(text[start : end + 1])
+    except json.JSONDecodeError:
+        return summaries
 
-    for paper in papers[:max_papers]:
+    items = data.get("summaries") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return summaries
+
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        index = item.get("paper", position + 1)
         try:
-            summary = summarize_paper(paper)
-            summaries.append({**paper, "summary": summary})
-            # Don't log full title for privacy
-            print(f"Summarized paper {len(summaries)}/{max_papers}")
-        except Exception as e:
-            print(
-                f"Error summarizing paper {len(summaries) + 1}: {type(e).__name__}: {e}"
-            )
-            summaries.append({**paper, "summary": "Summary temporarily unavailable"})
+            index = int(index) - 1
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= index < count or summaries[index] is not None:
+            continue
+
+        bullets = item.get("bullets")
+        if isinstance(bullets, str):
+            bullets = bullets.split("\n")
+        if not isinstance(bullets, list):
+            continue
+        bullets = [
+            str(b).strip().lstrip("•-*").strip() for b in bullets if str(b).strip()
+        ]
+        if len(bullets) != 3:
+            continue
+        summaries[index] = "\n".join(f"• {b}" for b in bullets)
+
+    return summaries
+
+
+@timed("summarize.batch")
+async def summarize_batch_async(
+    backend: LLMBackend, papers: List[Dict[str, Any]], budget: RateBudget
+) -> List[str]:
+    """
+    Summarize several papers in one request with a JSON response.
+    Papers whose entry doesn't parse fall back to single-paper calls; a
+    paper whose single call fails too gets FALLBACK_SUMMARY.
+    """
+    try:
+        text = await complete_async(
+            backend,
+            build_batch_prompt(papers),
+            budget,
+            max_tokens=MAX_SUMMARY_TOKENS * len(papers) + 50,
+            json_mode=True,
+        )
+    except Exception as e:
+        print(f"Batch summary failed ({type(e).__name__}), retrying one by one")
+        text = None
+
+    summaries = parse_batch_response(text, len(papers))
+    failed = [i for i, summary in enumerate(summaries) if summary is None]
+    if failed:
+        print(f"Falling back to single calls for {len(failed)}/{len(papers)} papers")
+        fallbacks = await asyncio.gather(
+            *(summarize_paper_async(backend, papers[i], budget) for i in failed),
+            return_exceptions=True,
+        )
+        for i, summary in zip(failed, fallbacks):
+            if isinstance(summary, Exception):
+                print(f"Single summary failed ({type(summary).__name__})")
+                summary = FALLBACK_SUMMARY
+            summaries[i] = summary
 
     return summaries
 
 
+async def summarize_papers_async(
+    papers: List[Dict[str, Any]],
+    max_papers: int = 3,
+    cache: Optional[SummaryCache] = None,
+    concurrency: int = SUMMARY_CONCURRENCY,
+    batch_size: int = SUMMARY_BATCH_SIZE,
+    backend: Optional[LLMBackend] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Summarize multiple papers concurrently (default: top 3)
+    Summaries are looked up in the summary cache first; only misses call
+    the LLM backend (LLM_BACKEND by default), with at most `concurrency`
+    requests in flight. With batch_size > 1, misses are packed `batch_size`
+    to a request. Results come back in input order. The backend is only
+    built when there are misses, so fully cached runs need no API key.
+    """
+    if cache is None:
+        cache = get_summary_cache()
+    owns_backend = backend is None
+    model = backend.model if backend else get_llm_backend_class().default_model
+
+    papers = papers[:max_papers]
+    keys = [make_cache_key(p, model, PROMPT_VERSION) for p in papers]
+    cached = cache.get_many(keys)
+    misses = [i for i, key in enumerate(keys) if key not in cached]
+    increment("summary_cache.hits", len(papers) - len(misses))
+    increment("summary_cache.misses", len(misses))
+
+    summaries: List[Optional[str]] = [cached.get(key) for key in keys]
+    new_entries = {}
+
+    try:
+        if misses:
+            if backend is None:
+                backend = get_llm_backend()
+            budget = RateBudget()
+            semaphore = asyncio.Semaphore(concurrency)
+            batch_size = max(1, batch_size)
+            batches = [
+                misses[start : start + batch_size]
+                for start in range(0, len(misses), batch_size)
+            ]
+            done = 0
+
+            async def run(batch: List[int]) -> None:
+                nonlocal done
+                async with semaphore:
+                    try:
+                        if len(batch) == 1:
+                            results = [
+                                await summarize_paper_async(
+                                    backend, papers[batch[0]], budget
+                                )
+                            ]
+                        else:
+                            results = await summarize_batch_async(
+                                backend, [papers[i] for i in batch], budget
+                            )
+                    except Exception as e:
+                        print(f"Error summarizing papers: {type(e).__name__}: {e}")
+                        for i in batch:
+                            summaries[i] = ERROR_SUMMARY
+                        return
+                for i, summary in zip(batch, results):
+                    summaries[i] = summary
+                    if summary != FALLBACK_SUMMARY:
+                        new_entries[keys[i]] = summary
+                done += len(batch)
+                # Don't log full title for privacy
+                print(f"Summarized paper {done}/{len(misses)}")
+
+            await asyncio.gather(*(run(batch) for batch in batches))
+    finally:
+        if owns_backend and backend is not None:
+            await backend.aclose()
+
+    cache.set_many(new_entries)
+
+    return [
+        {**paper, "summary": summary} for paper, summary in zip(papers, summaries)
+    ]
+
+
+def summarize_papers(
+    papers: List[Dict[str, Any]],
+    max_papers: int = 3,
+    cache: Optional[SummaryCache] = None,
+    backend: Optional[LLMBackend] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Summarize multiple papers (sync wrapper)
+    """
+    return asyncio.run(
+        summarize_papers_async(papers, max_papers, cache, backend=backend)
+    )
+
+
 def format_digest(papers: List[Dict[str, Any]]) -> str:
     """
     Format into digest for email/telegram
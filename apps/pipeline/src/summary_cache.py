@@ -0,0 +1,228 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Iterable, Optional
+
+SUMMARY_CACHE_BACKEND = os.environ.get("SUMMARY_CACHE_BACKEND", "sqlite")
+SUMMARY_CACHE_PATH = os.environ.get("SUMMARY_CACHE_PATH", ".cache/summaries.sqlite3")
+SUMMARY_CACHE_TTL_DAYS = float(os.environ.get("SUMMARY_CACHE_TTL_DAYS", "14"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+
+
+def content_hash(paper: Dict[str, Any]) -> str:
+    """Hash of the text the summary is generated from."""
+    text = f"{paper.get('title') or ''}\n{paper.get('abstract') or ''}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def make_cache_key(paper: Dict[str, Any], model: str, prompt_version: str) -> str:
+    """
+    Cache key: (paperId, content hash, model, prompt version).
+    A changed abstract, model or prompt invalidates the entry.
+    """
+    return ":".join(
+        [paper.get("paperId") or "", content_hash(paper), model, prompt_version]
+    )
+
+
+class SummaryCache:
+    """No-op cache; base class for the real backends."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def _get_many(self, keys: List[str]) -> Dict[str, str]:
+        return {}
+
+    def _set_many(self, entries: Dict[str, str]) -> None:
+        pass
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(dict.fromkeys(keys))
+        found = self._get_many(keys) if keys else {}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, entries: Dict[str, str]) -> None:
+        if entries:
+            self._set_many(entries)
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+
+class SQLiteSummaryCache(SummaryCache):
+    """
+    Local SQLite cache with TTL expiry and LRU eviction.
+    Persisted between runs (CI restores the file with actions/cache).
+    """
+
+    def __init__(
+        self,
+        path: str = SUMMARY_CACHE_PATH,
+        ttl_days: float = SUMMARY_CACHE_TTL_DAYS,
+        max_entries: int = SUMMARY_CACHE_MAX_ENTRIES,
+    ):
+        super().__init__()
+        self.ttl_seconds = ttl_days * 86400
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                cache_key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed_at)"
+        )
+        self._conn.commit()
+
+    def _get_many(self, keys: List[str]) -> Dict[str, str]:
+        now = time.time()
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT cache_key, summary FROM summaries "
+                    f"WHERE cache_key IN ({placeholders}) AND created_at >= ?",
+                    [*chunk, now - self.ttl_seconds],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE summaries SET accessed_at = ? WHERE cache_key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def _set_many(self, entries: Dict[str, str]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)",
+                [(key, summary, now, now) for key, summary in entries.items()],
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute(
+            "DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        # Least recently used entries beyond the size cap
+        self._conn.execute(
+            """DELETE FROM summaries WHERE cache_key IN (
+                SELECT cache_key FROM summaries
+                ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,),
+        )
+
+
+class SupabaseSummaryCache(SummaryCache):
+    """
+    Cache stored in the Supabase `summary_cache` table, shared by every
+    runner. Same TTL and LRU policy as the SQLite backend.
+    """
+
+    def __init__(
+        self,
+        ttl_days: float = SUMMARY_CACHE_TTL_DAYS,
+        max_entries: int = SUMMARY_CACHE_MAX_ENTRIES,
+    ):
+        from src.db import get_supabase_client
+
+        super().__init__()
+        self.ttl = timedelta(days=ttl_days)
+        self.max_entries = max_entries
+        self.supabase = get_supabase_client()
+
+    def _get_many(self, keys: List[str]) -> Dict[str, str]:
+        now = datetime.now(timezone.utc)
+        cutoff = (now - self.ttl).isoformat()
+        found = {}
+        try:
+            for start in range(0, len(keys), 100):
+                result = (
+                    self.supabase.table("summary_cache")
+                    .select("cache_key,summary")
+                    .in_("cache_key", keys[start : start + 100])
+                    .gte("created_at", cutoff)
+                    .execute()
+                )
+                for row in result.data or []:
+                    found[row["cache_key"]] = row["summary"]
+            if found:
+                self.supabase.table("summary_cache").update(
+                    {"accessed_at": now.isoformat()}
+                ).in_("cache_key", list(found)).execute()
+        except Exception as e:
+            print(f"Error reading summary cache: {e}")
+        return found
+
+    def _set_many(self, entries: Dict[str, str]) -> None:
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "cache_key": key,
+                "summary": summary,
+                "created_at": now.isoformat(),
+                "accessed_at": now.isoformat(),
+            }
+            for key, summary in entries.items()
+        ]
+        try:
+            self.supabase.table("summary_cache").upsert(
+                rows, on_conflict="cache_key"
+            ).execute()
+            self._evict(now)
+        except Exception as e:
+            print(f"Error writing summary cache: {e}")
+
+    def _evict(self, now: datetime) -> None:
+        self.supabase.table("summary_cache").delete().lt(
+            "created_at", (now - self.ttl).isoformat()
+        ).execute()
+        stale = (
+            self.supabase.table("summary_cache")
+            .select("cache_key")
+            .order("accessed_at", desc=True)
+            .range(self.max_entries, self.max_entries + 999)
+            .execute()
+        )
+        stale_keys = [row["cache_key"] for row in stale.data or []]
+        if stale_keys:
+            self.supabase.table("summary_cache").delete().in_(
+                "cache_key", stale_keys
+            ).execute()
+
+
+def get_summary_cache(backend: Optional[str] = None) -> SummaryCache:
+    """
+    Build the summary cache selected by SUMMARY_CACHE_BACKEND
+    ('sqlite', 'supabase' or 'none'). Falls back to no caching on errors.
+    """
+    backend = (backend or SUMMARY_CACHE_BACKEND).lower()
+    try:
+        if backend == "sqlite":
+            return SQLiteSummaryCache()
+        if backend == "supabase":
+            return SupabaseSummaryCache()
+    except Exception as e:
+        print(f"Summary cache unavailable ({backend}): {e}")
+    return SummaryCache()
@@ -1,7 +1,7 @@
 import os
 from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
-from src.db import get_supabase_client
+from src.db import get_async_supabase_client
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -16,25 +16,25 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = str(update.effective_chat.id)
-    supabase = get_supabase_client()
+    supabase = await get_async_supabase_client()
     
     # Check if already subscribed
-    result = supabase.table("subscribers").select("*").eq("telegram_chat_id", chat_id).execute()
+    result = await supabase.table("subscribers").select("*").eq("telegram_chat_id", chat_id).execute()
     
     if result.data:
         await update.message.reply_text("You're already subscribed!")
         return
     
     # Subscribe
-    supabase.table("subscribers").insert({"telegram_chat_id": chat_id}).execute()
+    await supabase.table("subscribers").insert({"telegram_chat_id": chat_id}).execute()
     await update.message.reply_text("Subscribed! You'll receive daily STEM paper digests.")
 
 
 async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = str(update.effective_chat.id)
-    supabase = get_supabase_client()
+    supabase = await get_async_supabase_client()
     
-    supabase.table("subscribers").update({"is_active": False}).eq("telegram_chat_id", chat_id).execute()
+    await supabase.table("subscribers").update({"is_active": False}).eq("telegram_chat_id", chat_id).execute()
     await update.message.reply_text("Unsubscribed. You won't receive digests anymore.")
 
 
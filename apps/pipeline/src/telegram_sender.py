@@ -1,9 +1,29 @@
 import os
+import re
 import html
+import time
 import asyncio
-from typing import List, Dict, Any
+from datetime import timedelta
+from typing import List, Dict, Any, Optional, Tuple
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import (
+    TelegramError,
+    RetryAfter,
+    NetworkError,
+    BadRequest,
+    Forbidden,
+    TimedOut,
+)
+from telegram.request import HTTPXRequest
+
+from src.rate_limiter import TokenBucket
+from src.metrics import timer, increment
+
+# Telegram allows about 30 messages per second per bot, 1 per second per chat
+TELEGRAM_GLOBAL_RPS = float(os.environ.get("TELEGRAM_GLOBAL_RPS", "30"))
+TELEGRAM_PER_CHAT_RPS = float(os.environ.get("TELEGRAM_PER_CHAT_RPS", "1"))
+TELEGRAM_CONCURRENCY = int(os.environ.get("TELEGRAM_CONCURRENCY", "32"))
+TELEGRAM_BASE_URL = os.environ.get("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
 
 
 FIELD_MAPPING = {
@@ -30,12 +50,16 @@ Analyze key findings, how they connect to my research in [YOUR TOPIC], and sugge
     return prompt
 
 
-def get_bot() -> Bot:
+def get_bot(connection_pool_size: int = TELEGRAM_CONCURRENCY) -> Bot:
     """Initialize Telegram Bot."""
     token = os.environ.get("TELEGRAM_BOT_TOKEN")
     if not token:
         raise ValueError("TELEGRAM_BOT_TOKEN must be set")
-    return Bot(token=token)
+    return Bot(
+        token=token,
+        base_url=TELEGRAM_BASE_URL,
+        request=HTTPXRequest(connection_pool_size=connection_pool_size),
+    )
 
 
 def mask_id(chat_id: str) -> str:
@@ -45,82 +69,307 @@ def mask_id(chat_id: str) -> str:
     return "***"
 
 
-def format_digest_text(papers: List[Dict[str, Any]]) -> str:
-    text = "<b>everymorning - Daily STEM Paper Digest</b>\n\n"
+# Telegram rejects message texts longer than this
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+DIGEST_HEADER = "<b>everymorning - Daily STEM Paper Digest</b>\n\n"
+PAPER_SEPARATOR = "---\n\n"
+
+# Cut points in order of preference when a digest has to be split
+_SPLIT_SEPARATORS = (PAPER_SEPARATOR, "\n\n", "\n", " ")
+_MARKUP = re.compile(r"<(/?)([a-zA-Z]+)[^>]*>|&#?\w+;")
+
+
+def format_paper_block(paper: Dict[str, Any], i: int) -> str:
+    title = html.escape(paper.get("title", "Unknown"))
+    raw_summary = paper.get("summary", "No summary available")
+
+    summary_lines = []
+    for line in raw_summary.split("\n"):
+        line = line.strip()
+        if line:
+            summary_lines.append(html.escape(line))
+    summary = "\n".join(summary_lines)
+
+    url = html.escape(paper.get("url", ""))
+    selection_reason = html.escape(paper.get("selection_reason", ""))
+    field = paper.get("field", "")
+
+    parts = [f"<b>#{i} {title}</b>\n"]
+    if selection_reason:
+        parts.append(f"<i>{selection_reason}</i>\n")
+    parts.append("\n")
+    parts.append(f"{summary}\n\n")
 
+    if url:
+        parts.append(f"<a href='{url}'>Read paper</a>\n")
+
+    ai_prompt = generate_ai_prompt(
+        paper.get("title", ""),
+        field,
+        paper.get("summary", ""),
+        paper.get("url", ""),
+    )
+    escaped_prompt = html.escape(ai_prompt)
+    parts.append(f"\n<pre>{escaped_prompt}</pre>\n\n")
+    return "".join(parts)
+
+
+def format_digest_text(papers: List[Dict[str, Any]]) -> str:
+    parts = [DIGEST_HEADER]
     for i, paper in enumerate(papers, 1):
-        title = html.escape(paper.get("title", "Unknown"))
-        raw_summary = paper.get("summary", "No summary available")
-
-        summary_lines = []
-        for line in raw_summary.split("\n"):
-            line = line.strip()
-            if line:
-                summary_lines.append(html.escape(line))
-        summary = "\n".join(summary_lines)
-
-        url = html.escape(paper.get("url", ""))
-        selection_reason = html.escape(paper.get("selection_reason", ""))
-        field = paper.get("field", "")
-
-        text += f"<b>#{i} {title}</b>\n"
-        if selection_reason:
-            text += f"<i>{selection_reason}</i>\n"
-        text += "\n"
-        text += f"{summary}\n\n"
-
-        if url:
-            text += f"<a href='{url}'>Read paper</a>\n"
-
-        ai_prompt = generate_ai_prompt(
-            paper.get("title", ""),
-            field,
-            paper.get("summary", ""),
-            paper.get("url", ""),
+        parts.append(format_paper_block(paper, i))
+        if i < len(papers):
+            parts.append(PAPER_SEPARATOR)
+    return "".join(parts)
+
+
+def message_length(text: str) -> int:
+    """Length as Telegram counts it (UTF-16 code units)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def split_message(
+    text: str, limit: int = TELEGRAM_MAX_MESSAGE_LENGTH
+) -> List[str]:
+    """
+    Split HTML message text into chunks of at most `limit` characters.
+    Cuts prefer paper boundaries, then blank lines, lines and spaces (as
+    long as the chunk stays at least half full), and never land inside a
+    tag or entity. Tags open at a cut are closed at the
+    end of the chunk and reopened at the start of the next one, so every
+    chunk is valid on its own. Text that fits is returned unchanged.
+    """
+    if message_length(text) <= limit:
+        return [text]
+
+    chunks = []
+    start = 0
+    stack: List[Tuple[str, str]] = []  # (tag name, opening tag) at `start`
+    while start < len(text):
+        reopen = "".join(tag for _, tag in stack)
+        budget = limit - message_length(reopen)
+        open_tags = list(stack)
+        used = 0
+        best = {sep: None for sep in _SPLIT_SEPARATORS}
+        hard = None  # (cut, open tags) furthest valid position
+        pos = start
+        while pos < len(text):
+            match = _MARKUP.match(text, pos) if text[pos] in "<&" else None
+            atom_end = match.end() if match else pos + 1
+            used += message_length(text[pos:atom_end])
+            if match and match.group(2):
+                name = match.group(2).lower()
+                if match.group(1):
+                    if open_tags and open_tags[-1][0] == name:
+                        open_tags.pop()
+                else:
+                    open_tags.append((name, match.group(0)))
+            closing = sum(len(name) + 3 for name, _ in open_tags)
+            if used + closing > budget:
+                break
+            pos = atom_end
+            hard = (pos, list(open_tags))
+            for sep in _SPLIT_SEPARATORS:
+                if text.endswith(sep, start, pos):
+                    best[sep] = hard
+                    break
+
+        if hard is None:
+            raise ValueError(f"Cannot split message into {limit}-character chunks")
+        cut, open_tags = hard
+        if pos < len(text):
+            # Best-ranked separator that still fills at least half the chunk
+            for sep in _SPLIT_SEPARATORS:
+                if best[sep] and best[sep][0] - start >= (cut - start) // 2:
+                    cut, open_tags = best[sep]
+                    break
+        closing = "".join(f"</{name}>" for name, _ in reversed(open_tags))
+        chunks.append(reopen + text[start:cut] + closing)
+        start, stack = cut, open_tags
+    return chunks
+
+
+class TelegramDigestRenderer:
+    """
+    Digest text split into sendable chunks, rendered once per paper set
+    (keyed by the paper-id tuple) and reused for every chat receiving it.
+    Papers are assumed not to change during the run.
+    """
+
+    def __init__(self, limit: int = TELEGRAM_MAX_MESSAGE_LENGTH):
+        self.limit = limit
+        self._chunks: Dict[tuple, List[str]] = {}
+
+    def render(self, papers: List[Dict[str, Any]]) -> List[str]:
+        key = tuple(p.get("paperId") or id(p) for p in papers)
+        chunks = self._chunks.get(key)
+        if chunks is None:
+            chunks = self._chunks[key] = split_message(
+                format_digest_text(papers), self.limit
+            )
+        return chunks
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class TelegramDispatcher:
+    """
+    Long-lived async sender holding one Bot (and its HTTP connection pool)
+    for a whole run. Chats are sent to concurrently, within a global
+    messages-per-second budget and a per-chat budget. A RetryAfter (flood
+    control) pauses every send until it expires, then the message is retried.
+    """
+
+    def __init__(
+        self,
+        bot: Optional[Bot] = None,
+        global_rps: float = TELEGRAM_GLOBAL_RPS,
+        per_chat_rps: float = TELEGRAM_PER_CHAT_RPS,
+        concurrency: int = TELEGRAM_CONCURRENCY,
+        max_retries: int = 3,
+        renderer: Optional[TelegramDigestRenderer] = None,
+    ):
+        self.bot = bot or get_bot(concurrency)
+        self.renderer = renderer or TelegramDigestRenderer()
+        # Evenly paced rather than bursty, so short windows stay under the cap
+        self.global_limiter = TokenBucket(global_rps, 1)
+        self.per_chat_rps = per_chat_rps
+        self.max_retries = max_retries
+        self._chat_limiters: Dict[str, TokenBucket] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._paused_until = 0.0
+        self.flood_waits = 0
+
+    async def __aenter__(self) -> "TelegramDispatcher":
+        await self.bot.initialize()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.bot.shutdown()
+
+    def _chat_limiter(self, chat_id: str) -> TokenBucket:
+        if chat_id not in self._chat_limiters:
+            self._chat_limiters[chat_id] = TokenBucket(self.per_chat_rps, 1)
+        return self._chat_limiters[chat_id]
+
+    async def _wait_for_flood_control(self) -> None:
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def send_message(self, chat_id: str, text: str):
+        """
+        Send one message, retrying on flood control and connection errors.
+        Bad requests and blocked chats fail at once. A timeout is not retried
+        either: the message may already have been delivered, and a retry
+        would send it twice.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._chat_limiter(chat_id).acquire()
+            await self._wait_for_flood_control()
+            await self.global_limiter.acquire()
+            try:
+                with timer("telegram.send_message"):
+                    return await self.bot.send_message(
+                        chat_id=chat_id, text=text, parse_mode="HTML"
+                    )
+            except RetryAfter as e:
+                increment("telegram.429")
+                if attempt >= self.max_retries:
+                    raise
+                wait_time = retry_after_seconds(e)
+                self.flood_waits += 1
+                self._paused_until = max(
+                    self._paused_until, time.monotonic() + wait_time
+                )
+                print(f"Telegram flood control, pausing sends for {wait_time:.1f}s")
+            except (BadRequest, Forbidden):
+                raise
+            except TimedOut:
+                increment("telegram.timeouts")
+                raise
+            except NetworkError:
+                increment("telegram.network_errors")
+                if attempt >= self.max_retries:
+                    raise
+                await asyncio.sleep(2**attempt)
+
+    async def send_digest(self, chat_id: str, chunks: List[str]) -> Dict[str, Any]:
+        """Send a digest's chunks to one chat, in order."""
+        masked_id = mask_id(chat_id)
+        async with self._semaphore:
+            try:
+                message_ids = []
+                for chunk in chunks:
+                    message = await self.send_message(chat_id, chunk)
+                    message_ids.append(message.message_id)
+                print(f"Message sent to {masked_id}")
+                increment("telegram.sent")
+                return {
+                    "chat_id": chat_id,
+                    "status": "sent",
+                    "message_id": message_ids[0],
+                    "message_ids": message_ids,
+                }
+            except TelegramError as e:
+                print(f"Failed to send to {masked_id}")
+                increment("telegram.failed")
+                return {"chat_id": chat_id, "status": "failed", "error": "Telegram error"}
+            except Exception as e:
+                print(f"Unexpected error for {masked_id}")
+                increment("telegram.failed")
+                return {"chat_id": chat_id, "status": "failed", "error": "Send error"}
+
+    async def send_digests(
+        self, deliveries: List[Tuple[str, List[Dict[str, Any]]]]
+    ) -> Dict[str, Any]:
+        """Send one digest per (chat_id, papers) pair, all chats concurrently."""
+        results = await asyncio.gather(
+            *(
+                self.send_digest(chat_id, self.renderer.render(papers))
+                for chat_id, papers in deliveries
+            )
         )
-        escaped_prompt = html.escape(ai_prompt)
-        text += f"\n<pre>{escaped_prompt}</pre>\n\n"
+        return {
+            "results": results,
+            "total": len(deliveries),
+            "sent": sum(1 for r in results if r["status"] == "sent"),
+        }
 
-        if i < len(papers):
-            text += "---\n\n"
 
-    return text
+async def send_telegram_digests_async(
+    deliveries: List[Tuple[str, List[Dict[str, Any]]]],
+    dispatcher: Optional[TelegramDispatcher] = None,
+) -> Dict[str, Any]:
+    """Send personalized digests, one (chat_id, papers) pair per subscriber."""
+    if dispatcher is not None:
+        return await dispatcher.send_digests(deliveries)
+    async with TelegramDispatcher() as dispatcher:
+        return await dispatcher.send_digests(deliveries)
+
+
+def send_telegram_digests(
+    deliveries: List[Tuple[str, List[Dict[str, Any]]]],
+) -> Dict[str, Any]:
+    """Send personalized digests (sync wrapper)."""
+    return asyncio.run(send_telegram_digests_async(deliveries))
 
 
 async def send_telegram_digest_async(
     chat_ids: List[str], papers: List[Dict[str, Any]]
 ) -> Dict[str, Any]:
     """Send digest to Telegram subscribers (async version)."""
-    bot = get_bot()
-    text = format_digest_text(papers)
-
-    results = []
-    for chat_id in chat_ids:
-        masked_id = mask_id(chat_id)
-        try:
-            message = await bot.send_message(
-                chat_id=chat_id, text=text, parse_mode="HTML"
-            )
-            results.append(
-                {"chat_id": chat_id, "status": "sent", "message_id": message.message_id}
-            )
-            print(f"Message sent to {masked_id}")
-        except TelegramError as e:
-            results.append(
-                {"chat_id": chat_id, "status": "failed", "error": "Telegram error"}
-            )
-            print(f"Failed to send to {masked_id}")
-        except Exception as e:
-            results.append(
-                {"chat_id": chat_id, "status": "failed", "error": "Send error"}
-            )
-            print(f"Unexpected error for {masked_id}")
-
-    return {
-        "results": results,
-        "total": len(chat_ids),
-        "sent": sum(1 for r in results if r["status"] == "sent"),
-    }
+    return await send_telegram_digests_async(
+        [(chat_id, papers) for chat_id in chat_ids]
+    )
 
 
 def send_telegram_digest(
@@ -142,11 +391,12 @@ def main():
     ]
 
     text = format_digest_text(test_papers)
+    chunks = split_message(text)
     print("Telegram Digest Preview:")
     print("=" * 60)
     print(text)
     print("=" * 60)
-    print(f"Message length: {len(text)} characters")
+    print(f"Message length: {len(text)} characters in {len(chunks)} message(s)")
 
 
 if __name__ == "__main__":
@@ -18,10 +18,29 @@ CREATE TABLE papers (
   abstract TEXT,
   url TEXT,
   score FLOAT,
+  score_signature TEXT,  -- 점수 입력값 (citations:influential:recency_bucket), 변경 시에만 재계산
+  citation_count INT DEFAULT 0,
+  influential_citation_count INT DEFAULT 0,
   published_at DATE,
   fetched_at TIMESTAMPTZ DEFAULT NOW(),
   UNIQUE(source, external_id)
 );
+CREATE INDEX papers_published_at ON papers (published_at);
+
+-- 기존 DB 마이그레이션:
+-- ALTER TABLE papers ADD COLUMN IF NOT EXISTS score_signature TEXT;
+-- ALTER TABLE papers ADD COLUMN IF NOT EXISTS citation_count INT DEFAULT 0;
+-- ALTER TABLE papers ADD COLUMN IF NOT EXISTS influential_citation_count INT DEFAULT 0;
+-- CREATE INDEX IF NOT EXISTS papers_published_at ON papers (published_at);
+
+-- sent_papers (구독자별 발송 이력, 7일 내 중복 발송 방지)
+CREATE TABLE sent_papers (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  subscriber_email TEXT NOT NULL,
+  paper_id TEXT NOT NULL,
+  sent_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE INDEX sent_papers_sent_at ON sent_papers (sent_at);
 
 -- digests (발송된 다이제스트)
 CREATE TABLE digests (
@@ -31,3 +50,12 @@ CREATE TABLE digests (
   summary_html TEXT,
   sent_at TIMESTAMPTZ
 );
+
+-- summary_cache (LLM 요약 캐시, SUMMARY_CACHE_BACKEND=supabase)
+CREATE TABLE summary_cache (
+  cache_key TEXT PRIMARY KEY,  -- paperId:content_hash:model:prompt_version
+  summary TEXT NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  accessed_at TIMESTAMPTZ DEFAULT NOW()
+);
+CREATE INDEX summary_cache_accessed_at ON summary_cache (accessed_at);
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The pipeline is run from apps/pipeline and imported as `src`
+PIPELINE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "apps", "pipeline")
+sys.path.insert(0, PIPELINE)
@@ -0,0 +1,106 @@
+from postgrest.exceptions import APIError
+
+import src.db as db
+from src.db import bulk_upsert
+
+
+class FakeClient:
+    """Records upserts; `reject(rows)` returns the error to raise, if any."""
+
+    def __init__(self, reject):
+        self.reject = reject
+        self.requests = []
+        self.written = []
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.requests.append(list(rows))
+        self.pending = rows
+        return self
+
+    def execute(self):
+        error = self.reject(self.pending)
+        if error:
+            raise error
+        self.written.extend(self.pending)
+
+
+def api_error(code):
+    return APIError({"message": f"error {code}", "code": code})
+
+
+ROWS = [{"id": i} for i in range(8)]
+
+
+def test_row_errors_are_bisected_not_retried():
+    client = FakeClient(
+        lambda rows: api_error("23502") if {"id": 5} in rows else None
+    )
+    report = bulk_upsert(client, "papers", ROWS, "id", chunk_size=8, backoff=0)
+
+    assert report["written"] == 7
+    assert report["failed_rows"] == [{"id": 5}]
+    # 8 -> 4 + 4 -> 2 + 2 -> 1 + 1
+    assert report["requests"] == 7
+
+
+def test_schema_errors_are_not_retried():
+    client = FakeClient(lambda rows: api_error("42703"))
+    report = bulk_upsert(
+        client, "papers", ROWS, "id", chunk_size=4, retries=2, backoff=0
+    )
+
+    assert report["failed"] == 8
+    assert report["requests"] == 2
+
+
+def test_transient_errors_are_retried():
+    failures = iter([api_error("57014"), RuntimeError("connection reset")])
+    client = FakeClient(lambda rows: next(failures, None))
+    report = bulk_upsert(
+        client, "papers", ROWS, "id", chunk_size=8, retries=2, backoff=0
+    )
+
+    assert report["written"] == 8
+    assert report["requests"] == 3
+
+
+class HealthClient:
+    def __init__(self, healthy):
+        self.healthy = healthy
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        if not self.healthy:
+            raise ConnectionError("connection reset")
+
+
+def test_health_check_replaces_a_broken_client(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "http://db.test")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "key")
+    created = [HealthClient(healthy=False), HealthClient(healthy=True)]
+    monkeypatch.setattr(db, "create_client", lambda url, key: created.pop(0))
+    db.reset_supabase_clients()
+
+    broken = db.get_supabase_client()
+    assert not db.check_supabase_health()
+    fresh = db.get_supabase_client()
+    assert fresh is not broken
+    assert db.check_supabase_health()
+    assert db.get_supabase_client() is fresh
+    db.reset_supabase_clients()
+
+
+def test_health_check_without_credentials(monkeypatch):
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    assert not db.check_supabase_health()
@@ -0,0 +1,66 @@
+from src.dedup import PaperDeduplicator, dedupe_papers
+
+
+def test_same_title_different_paper_ids_are_kept():
+    papers = [
+        {"paperId": "a", "title": "Editorial", "field": "cs"},
+        {"paperId": "b", "title": "Editorial.", "field": "bio"},
+    ]
+    assert [p["paperId"] for p in dedupe_papers(papers)] == ["a", "b"]
+
+
+def test_same_title_conflicting_dois_are_kept():
+    papers = [
+        {"paperId": "s2", "title": "Editorial", "externalIds": {"DOI": "10.1/a"}},
+        {
+            "paperId": "arxiv:1",
+            "source": "arxiv",
+            "title": "Editorial",
+            "externalIds": {"DOI": "10.1/b"},
+        },
+    ]
+    assert len(dedupe_papers(papers)) == 2
+
+
+def test_same_paper_id_collapses_and_merges_fields():
+    papers = [
+        {"paperId": "a", "title": "Graph Neural Networks", "field": "cs"},
+        {"paperId": "a", "title": "Graph Neural Networks", "field": "math"},
+    ]
+    unique = dedupe_papers(papers)
+    assert len(unique) == 1
+    assert unique[0]["fields"] == ["cs", "math"]
+
+
+def test_cross_source_copies_collapse():
+    s2 = {
+        "paperId": "cs0000000",
+        "title": "Sparse Attention at Scale",
+        "externalIds": {"DOI": "10.5555/cs0000000", "ArXiv": "2610.13502"},
+        "field": "cs",
+    }
+    by_arxiv_id = {
+        "paperId": "arxiv:2610.13502",
+        "source": "arxiv",
+        "title": "Sparse attention at scale",
+        "externalIds": {"ArXiv": "2610.13502"},
+        "field": "cs",
+    }
+    by_doi = {
+        "paperId": "pubmed:41279126",
+        "source": "pubmed",
+        "title": "Something else entirely",
+        "externalIds": {"PubMed": "41279126", "DOI": "10.5555/CS0000000"},
+        "field": "bio",
+    }
+    by_title = {
+        "paperId": "arxiv:2610.99999",
+        "source": "arxiv",
+        "title": "Sparse Attention at Scale!",
+        "field": "cs",
+    }
+    dedup = PaperDeduplicator()
+    unique = list(dedup.dedupe([s2, by_arxiv_id, by_doi, by_title]))
+    assert unique == [s2]
+    assert s2["fields"] == ["cs", "bio"]
+    assert dict(dedup.removed) == {"arxiv": 1, "doi": 1, "title": 1}
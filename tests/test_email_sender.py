@@ -0,0 +1,101 @@
+import os
+import asyncio
+import threading
+
+import pytest
+import resend
+
+import src.email_sender as email_sender
+from src.email_sender import format_email_html, EmailRenderer
+from benchmarks.bench_email_render import FIXTURES, load_fixture_papers
+from benchmarks.mock_resend import serve_mock_resend
+
+GOLDEN_RECIPIENT = "jane.doe+digest@example.com"
+
+
+@pytest.fixture
+def golden():
+    """The document the original format_email_html produced for the fixtures."""
+    path = os.path.join(FIXTURES, "email_golden.html")
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def test_format_email_html_matches_golden(golden):
+    assert format_email_html(load_fixture_papers(), GOLDEN_RECIPIENT) == golden
+
+
+def test_renderer_matches_golden_when_cached(golden):
+    papers = load_fixture_papers()
+    renderer = EmailRenderer()
+    assert renderer.render(papers, GOLDEN_RECIPIENT) == golden
+    # Second render comes from the document cache
+    assert renderer.render(papers, GOLDEN_RECIPIENT) == golden
+
+
+def test_renderer_matches_format_email_html_without_recipient():
+    papers = load_fixture_papers()
+    assert EmailRenderer().render(papers) == format_email_html(papers)
+
+
+def test_batches_are_rendered_when_sent(monkeypatch):
+    monkeypatch.setenv("RESEND_API_KEY", "re_test")
+    rendered = []
+    sent = []
+
+    class CountingRenderer(EmailRenderer):
+        def render(self, papers, recipient_email=None):
+            rendered.append(recipient_email)
+            return super().render(papers, recipient_email)
+
+    async def fake_send(client, limiter, messages):
+        sent.append((len(rendered), [m["to"] for m in messages]))
+        await asyncio.sleep(0)
+        return [{"email": m["to"], "status": "sent"} for m in messages]
+
+    monkeypatch.setattr(email_sender, "send_email_batch_async", fake_send)
+    papers = load_fixture_papers()
+    deliveries = [(f"user{i}@example.com", papers) for i in range(7)]
+
+    report = asyncio.run(
+        email_sender.send_digest_emails_async(
+            deliveries, renderer=CountingRenderer(), batch_size=3, concurrency=1
+        )
+    )
+
+    # Only the batch being sent has been rendered
+    assert [count for count, _ in sent] == [3, 6, 7]
+    assert [email for _, batch in sent for email in batch] == [
+        email for email, _ in deliveries
+    ]
+    assert [r["email"] for r in report["results"]] == [e for e, _ in deliveries]
+    assert report["sent"] == 7
+
+
+def test_invalid_address_only_fails_itself(monkeypatch):
+    server = serve_mock_resend(port=0, latency=0, keep_html=False)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("RESEND_API_KEY", "re_test")
+    monkeypatch.setattr(
+        resend, "api_url", f"http://127.0.0.1:{server.server_address[1]}"
+    )
+    papers = load_fixture_papers()
+    emails = ["a@example.com", "not-an-address", "b@example.com", "c@example.com"]
+
+    report = email_sender.send_digest_emails([(email, papers) for email in emails])
+    server.shutdown()
+
+    assert [r["status"] for r in report["results"]] == [
+        "sent",
+        "failed",
+        "sent",
+        "sent",
+    ]
+    assert report["sent"] == 3
+    assert [m["to"] for m in server.messages] == [
+        "a@example.com",
+        "b@example.com",
+        "c@example.com",
+    ]
+    # The ids of accepted messages line up with their recipients
+    assert len({r["id"] for r in report["results"] if r["status"] == "sent"}) == 3
@@ -0,0 +1,121 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+import src.fetcher as fetcher
+
+PAPERS_PER_QUERY = 250
+
+
+@pytest.fixture
+def search_stub(monkeypatch):
+    """Local /paper/search serving PAPERS_PER_QUERY papers per query."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            requests.append(query)
+            if not url.path.endswith("/paper/search"):
+                self.send_error(404)
+                return
+            offset = int(query.get("offset", 0))
+            end = min(offset + int(query["limit"]), PAPERS_PER_QUERY)
+            body = {
+                "total": PAPERS_PER_QUERY,
+                "offset": offset,
+                "data": [
+                    {"paperId": f"{query['query']}-{i}", "title": f"Paper {i}"}
+                    for i in range(offset, end)
+                ],
+            }
+            if end < PAPERS_PER_QUERY:
+                body["next"] = end
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        fetcher,
+        "SEMANTIC_SCHOLAR_API",
+        f"http://127.0.0.1:{server.server_address[1]}/graph/v1",
+    )
+    monkeypatch.setattr(fetcher, "SEMANTIC_SCHOLAR_RPS", 1000)
+    monkeypatch.setattr(fetcher, "_limiter", None)
+    yield requests
+    server.shutdown()
+
+
+def test_fetch_papers_by_field_follows_next_offsets(search_stub):
+    papers = fetcher.fetch_papers_by_field("cs", limit=230)
+
+    assert [p["paperId"] for p in papers] == [
+        f"Computer Science-{i}" for i in range(230)
+    ]
+    pages = [(r.get("offset"), r["limit"]) for r in search_stub]
+    assert pages == [(None, "100"), ("100", "100"), ("200", "30")]
+    assert all(r["query"] == "Computer Science" for r in search_stub)
+
+
+def test_fetch_papers_by_field_stops_at_last_page(search_stub):
+    papers = fetcher.fetch_papers_by_field("math", limit=400)
+
+    assert len(papers) == PAPERS_PER_QUERY
+    assert len(search_stub) == 3
+
+
+def test_fetch_all_fields_tags_papers_with_field(search_stub):
+    papers = fetcher.fetch_all_fields(days=7, limit_per_field=120)
+
+    assert len(papers) == 120 * len(fetcher.FIELD_MAPPING)
+    for field, query in fetcher.FIELD_MAPPING.items():
+        tagged = [p for p in papers if p["field"] == field]
+        assert len(tagged) == 120
+        assert all(p["paperId"].startswith(f"{query}-") for p in tagged)
+
+
+def test_stream_all_fields_tags_papers_with_field(search_stub):
+    papers = list(
+        fetcher.stream_all_fields(7, PAPERS_PER_QUERY, sources=["semantic_scholar"])
+    )
+
+    assert len(papers) == PAPERS_PER_QUERY * len(fetcher.FIELD_MAPPING)
+    for field, query in fetcher.FIELD_MAPPING.items():
+        tagged = [p for p in papers if p["field"] == field]
+        assert len(tagged) == PAPERS_PER_QUERY
+        assert all(p["paperId"].startswith(f"{query}-") for p in tagged)
+
+
+def test_stream_all_fields_stops_fetching_when_closed(search_stub):
+    stream = fetcher.stream_all_fields(
+        7, PAPERS_PER_QUERY, sources=["semantic_scholar"]
+    )
+    first = [next(stream) for _ in range(5)]
+    stream.close()
+
+    assert len(first) == 5
+    assert not any(t.name == "paper-fetcher" for t in threading.enumerate())
+    requests = len(search_stub)
+    assert requests < 3 * len(fetcher.FIELD_MAPPING)
+
+
+def test_save_papers_to_db_skips_the_client_when_empty(monkeypatch):
+    def no_client():
+        raise AssertionError("no client needed for an empty save")
+
+    monkeypatch.setattr(fetcher, "get_supabase_client", no_client)
+    report = fetcher.save_papers_to_db([{"title": "No paperId"}])
+
+    assert report["written"] == 0 and report["requests"] == 0
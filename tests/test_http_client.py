@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from src.http_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HttpClient,
+    parse_retry_after,
+)
+
+
+@pytest.fixture
+def stub():
+    """
+    Local server answering each request with the next scripted
+    (status, headers) pair, then 200 once the script runs out.
+    """
+    script = []
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            requests.append(time.monotonic())
+            status, headers = script.pop(0) if script else (200, {})
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield url, script, requests
+    server.shutdown()
+
+
+def get(client, url, **kwargs):
+    async def run():
+        async with client:
+            return await client.get(url, **kwargs)
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(None, None), ("", None), ("3", 3.0), (" 1.5 ", 1.5), ("-4", 0.0), ("soon", None)],
+)
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    later = datetime.now(timezone.utc) + timedelta(seconds=120)
+    assert 110 < parse_retry_after(format_datetime(later, usegmt=True)) <= 120
+
+    earlier = datetime.now(timezone.utc) - timedelta(seconds=120)
+    assert parse_retry_after(format_datetime(earlier, usegmt=True)) == 0.0
+
+
+def test_retries_429_after_retry_after(stub):
+    url, script, requests = stub
+    script.append((429, {"Retry-After": "0.2"}))
+    client = HttpClient(max_retries=3, backoff_base=60.0)
+
+    response = get(client, url)
+
+    assert response.status_code == 200
+    assert len(requests) == 2
+    # Waited for Retry-After (plus jitter) rather than the 60s backoff
+    assert 0.2 <= requests[1] - requests[0] < 5
+
+
+def test_429_does_not_trip_the_breaker(stub):
+    url, script, requests = stub
+    script.extend([(429, {"Retry-After": "0"})] * 3)
+    client = HttpClient(max_retries=3, failure_threshold=2)
+
+    assert get(client, url).status_code == 200
+    assert len(requests) == 4
+
+
+def test_returns_last_response_when_retries_run_out(stub):
+    url, script, requests = stub
+    script.extend([(503, {})] * 3)
+    client = HttpClient(max_retries=2, backoff_base=0.001, failure_threshold=10)
+
+    assert get(client, url).status_code == 503
+    assert len(requests) == 3
+
+
+def test_5xx_opens_the_breaker_then_half_opens(stub):
+    url, script, requests = stub
+    client = HttpClient(
+        max_retries=10, backoff_base=0.001, failure_threshold=3, reset_timeout=0.3
+    )
+
+    async def run():
+        async with client:
+            # Opens after three failures in a row, before retries run out
+            script.extend([(500, {})] * 10)
+            with pytest.raises(CircuitOpenError):
+                await client.get(url)
+            assert len(requests) == 3
+
+            # Still open: fails fast without a request
+            with pytest.raises(CircuitOpenError):
+                await client.get(url)
+            assert len(requests) == 3
+
+            # Half-open: one trial request, and its failure re-opens
+            await asyncio.sleep(0.3)
+            with pytest.raises(CircuitOpenError):
+                await client.get(url)
+            assert len(requests) == 4
+
+            # A successful trial closes it again
+            await asyncio.sleep(0.3)
+            script.clear()
+            response = await client.get(url)
+            assert response.status_code == 200
+            assert len(requests) == 5
+            script.extend([(500, {})] * 2)
+            response = await client.get(url)
+            assert response.status_code == 200
+            assert len(requests) == 8
+
+    asyncio.run(run())
+
+
+def test_breaker_counts_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
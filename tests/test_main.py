@@ -0,0 +1,61 @@
+from argparse import Namespace
+
+import pytest
+
+import src.main as main
+from src.paper_store import PaperStore
+
+
+@pytest.fixture
+def store_backends(monkeypatch):
+    """Paper store backends build_pipeline asked for; always in memory here."""
+    backends = []
+
+    def get_paper_store(backend=None):
+        backends.append(backend)
+        return PaperStore()
+
+    monkeypatch.setattr(main, "get_paper_store", get_paper_store)
+    return backends
+
+
+def test_dry_run_writes_nothing(store_backends):
+    graph, _ = main.build_pipeline(Namespace(dry_run=True))
+
+    assert "store_papers" not in graph.stages
+    assert store_backends == ["memory"]
+
+
+def test_real_run_stores_papers(store_backends):
+    graph, _ = main.build_pipeline(Namespace(dry_run=False))
+
+    assert "store_papers" in graph.stages
+    assert store_backends == [None]
+
+
+def test_refresh_runs_after_fetch_on_older_papers(monkeypatch):
+    store = PaperStore()
+    monkeypatch.setattr(main, "get_paper_store", lambda backend=None: store)
+    today = main.datetime.now().strftime("%Y-%m-%d")
+    store.add(
+        [
+            {"paperId": "old", "field": "cs", "publicationDate": today},
+            {"paperId": "new", "field": "cs", "publicationDate": today},
+        ]
+    )
+    fetched = store.add(
+        [{"paperId": "new", "field": "cs", "publicationDate": today, "title": "v2"}]
+    )
+    refreshed = []
+
+    def refresh_papers(papers):
+        refreshed.extend(p["paperId"] for p in papers)
+        return []
+
+    monkeypatch.setattr(main, "refresh_papers", refresh_papers)
+    graph, _ = main.build_pipeline(Namespace(dry_run=False))
+    graph.stages["refresh"].fn(fetch=fetched)
+
+    assert graph.stages["refresh"].deps == ["fetch"]
+    # The copy the fetch just stored is current; only older ones are refreshed
+    assert refreshed == ["old"]
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.paper_store import (
+    WATERMARK_OVERLAP_DAYS,
+    PaperStore,
+    SQLitePaperStore,
+)
+
+
+def day(offset: int) -> str:
+    return (datetime.now() + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+
+def paper(paper_id, published, field="cs", **extra):
+    return {"paperId": paper_id, "field": field, "publicationDate": published, **extra}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLitePaperStore(str(tmp_path / "papers.sqlite3"))
+    return PaperStore()
+
+
+def test_first_fetch_covers_the_window(store):
+    assert store.fetch_since(["cs"], days=7) == {"cs": day(-7)}
+
+
+def test_watermark_advances_with_overlap(store):
+    store.add([paper("a", day(-5)), paper("b", day(-3))])
+    assert store.fetch_since(["cs"], days=7) == {"cs": day(-3 - WATERMARK_OVERLAP_DAYS)}
+
+    # An older paper doesn't move the watermark back
+    store.add([paper("c", day(-6))])
+    assert store.fetch_since(["cs"], days=7) == {"cs": day(-3 - WATERMARK_OVERLAP_DAYS)}
+
+
+def test_resume_never_starts_before_the_window(store):
+    store.add([paper("a", day(-30))])
+    assert store.fetch_since(["cs"], days=7) == {"cs": day(-7)}
+
+
+def test_future_dated_paper_caps_watermark_at_today(store):
+    store.add([paper("a", day(-1)), paper("issue", day(30))])
+    assert store.fetch_since(["cs"], days=7) == {"cs": day(-WATERMARK_OVERLAP_DAYS)}
+    assert "issue" in [p["paperId"] for p in store.recent(days=7)]
+
+
+def test_watermarks_are_kept_per_source(store):
+    store.add(
+        [
+            paper("s2", day(-1)),
+            paper("arxiv:1", day(-4), source="arxiv"),
+        ]
+    )
+    since = store.fetch_since(["cs", "arxiv:cs", "bio"], days=7)
+    assert since == {
+        "cs": day(-1 - WATERMARK_OVERLAP_DAYS),
+        "arxiv:cs": day(-4 - WATERMARK_OVERLAP_DAYS),
+        "bio": day(-7),
+    }
+
+
+def test_counts_new_changed_and_unchanged(store):
+    papers = [paper("a", day(-1), citationCount=1), paper("b", day(-2))]
+    assert store.add(papers) == papers
+    assert (store.new, store.changed, store.unchanged) == (2, 0, 0)
+
+    updated = paper("a", day(-1), citationCount=5)
+    fresh = store.add([updated, paper("b", day(-2))])
+    assert fresh == [updated]
+    assert (store.new, store.changed, store.unchanged) == (2, 1, 1)
+    assert store.stats() == "2 new, 1 changed, 1 unchanged"
+
+
+def test_repeat_add_of_unchanged_papers_returns_nothing(store):
+    papers = [paper(str(i), day(-1)) for i in range(5)]
+    store.add(papers, chunk_size=2)
+    watermarks = store.fetch_since(["cs"], days=7)
+
+    assert store.add(papers, chunk_size=2) == []
+    assert store.unchanged == 5
+    assert store.fetch_since(["cs"], days=7) == watermarks
+
+
+def test_same_paper_in_two_fields_is_stored_twice(store):
+    store.add([paper("a", day(-1), field="cs"), paper("a", day(-1), field="math")])
+    assert sorted(p["field"] for p in store.recent(days=7)) == ["cs", "math"]
+
+
+def test_recent_prunes_papers_outside_the_window(store):
+    store.add([paper("old", day(-10)), paper("new", day(-1))])
+    assert [p["paperId"] for p in store.recent(days=7)] == ["new"]
+    assert store.recent(days=7)[0]["field"] == "cs"
+
+    # Pruned papers count as new when they're seen again
+    assert store.add([paper("old", day(-10))]) == [paper("old", day(-10))]
+    assert store.new == 3
+
+
+def test_sqlite_store_survives_reopening(tmp_path):
+    path = str(tmp_path / "papers.sqlite3")
+    SQLitePaperStore(path).add([paper("a", day(-1))])
+
+    store = SQLitePaperStore(path)
+    assert store.fetch_since(["cs"], days=7) == {"cs": day(-1 - WATERMARK_OVERLAP_DAYS)}
+    assert store.add([paper("a", day(-1))]) == []
+    assert [p["paperId"] for p in store.recent(days=7)] == ["a"]
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+from itertools import combinations
+
+import pytest
+
+from src.scorer import (
+    PaperSelector,
+    calculate_score,
+    get_personalized_papers,
+    recency_bucket,
+    score_signature,
+)
+
+NOW = datetime(2026, 10, 18)
+
+
+def paper(days: int, citations: int = 0, influential: int = 0):
+    published = (NOW - timedelta(days=days)).date().isoformat()
+    return {
+        "citationCount": citations,
+        "influentialCitationCount": influential,
+        "publicationDate": published,
+    }
+
+
+def test_signature_is_flat_for_first_30_days():
+    signatures = {score_signature(paper(days, 5, 1), NOW) for days in range(31)}
+    assert signatures == {"5:1:0"}
+
+
+def test_signature_changes_with_citations():
+    assert score_signature(paper(10, 5), NOW) != score_signature(paper(10, 6), NOW)
+    assert score_signature(paper(10, 5, 1), NOW) != score_signature(
+        paper(10, 5, 2), NOW
+    )
+
+
+def test_old_papers_roll_over_every_tenth_of_their_age():
+    rollovers = [
+        days
+        for days in range(31, 731)
+        if recency_bucket(days) != recency_bucket(days - 1)
+    ]
+    # Instead of every night, a two-year-old paper is rewritten every ~2 months
+    assert len(rollovers) < 35
+    for earlier, later in zip([30] + rollovers, rollovers):
+        assert later - earlier <= 0.1 * earlier + 1
+
+
+@pytest.mark.parametrize("citations", [0, 3, 50, 1000])
+def test_stored_score_stays_within_documented_tolerance(citations):
+    # Score written on the first day of each bucket vs the exact score later
+    written = {}
+    for days in range(2000):
+        exact = calculate_score(paper(days, citations), NOW)
+        start, stored = written.setdefault(recency_bucket(days), (days, exact))
+        velocity = 0.35 * citations / max(1, start / 30)
+        assert 0 <= stored - exact <= 0.091 * velocity + 0.005 + 1e-4
+
+
+# Ties on score, papers merged from several fields (one listing a tag twice)
+# and papers with only the single `field` tag
+POOL = [
+    {"paperId": "a", "score": 9.0, "field": "cs"},
+    {"paperId": "b", "score": 7.5, "field": "bio", "fields": ["bio", "cs"]},
+    {"paperId": "c", "score": 7.5, "field": "math"},
+    {"paperId": "d", "score": 7.5, "field": "cs", "fields": ["cs", "math", "cs"]},
+    {"paperId": "e", "score": 5.0, "field": "physics"},
+    {"paperId": "f", "score": 9.0, "field": "bio", "fields": ["bio", "physics"]},
+    {"paperId": "g", "score": 1.0, "field": "cs"},
+    {"paperId": "h", "field": "math"},
+]
+
+
+def subsets(items):
+    return [
+        list(c) for size in range(len(items) + 1) for c in combinations(items, size)
+    ]
+
+
+def test_selector_matches_get_personalized_papers():
+    selector = PaperSelector(POOL)
+    fields = ["cs", "bio", "math", "physics", "chemistry"]
+    exclusions = [
+        set(),
+        {"a"},
+        {"b", "d"},
+        {"a", "f", "zzz"},
+        {p["paperId"] for p in POOL},
+    ]
+    for preferred in subsets(fields):
+        for excluded in exclusions:
+            available = [p for p in POOL if p["paperId"] not in excluded]
+            for n in [0, 1, 3, 10]:
+                expected = get_personalized_papers(available, preferred, n=n)
+                actual = selector.select(preferred, excluded, n=n)
+                assert [p["paperId"] for p in actual] == [
+                    p["paperId"] for p in expected
+                ], (preferred, excluded, n)
+
+
+def test_selector_memo_ignores_exclusions_outside_the_pool():
+    selector = PaperSelector(POOL)
+    first = selector.select(["cs"], {"a", "old-1"})
+    assert selector.stats() == "0 memo hits, 1 selections computed"
+
+    # Same overlap with the pool, different sent history otherwise
+    second = selector.select(["cs"], {"a", "old-2", "old-3"})
+    assert selector.stats() == "1 memo hits, 1 selections computed"
+    assert second == first
+    assert [p["paperId"] for p in second] == ["b", "d", "g"]
+
+    # Callers get their own list, so changing it doesn't touch the memo
+    second.clear()
+    assert selector.select(["cs"], {"a"}) == first
+
+    selector.select(["cs"], {"b"})
+    assert selector.stats() == "2 memo hits, 2 selections computed"
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+
+import pytest
+
+import src.sources as sources
+from src.http_client import HttpClient
+from src.rate_limiter import TokenBucket
+from src.sources import (
+    ArxivSource,
+    PaperSource,
+    PubMedSource,
+    parse_arxiv_feed,
+    parse_pubmed_articles,
+)
+from benchmarks.mock_sources import (
+    FIXTURE_WINDOW_START,
+    read_fixture,
+    serve_mock_sources,
+)
+
+UNDATED_ENTRY = """<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <id>http://arxiv.org/abs/2610.00001v1</id>
+    <title>Undated</title>
+  </entry>
+</feed>
+"""
+
+UNDATED_ARTICLE = """<PubmedArticleSet><PubmedArticle>
+  <MedlineCitation>
+    <PMID>1</PMID>
+    <Article><ArticleTitle>Undated</ArticleTitle></Article>
+  </MedlineCitation>
+</PubmedArticle></PubmedArticleSet>
+"""
+
+
+@pytest.fixture
+def mock_sources(monkeypatch):
+    server = serve_mock_sources(port=0, latency=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(sources, "ARXIV_API", f"{base}/api/query")
+    monkeypatch.setattr(sources, "PUBMED_API", f"{base}/eutils")
+    yield server
+    server.shutdown()
+
+
+def fetch(source_class, field):
+    async def run():
+        async with HttpClient() as client:
+            source = source_class(client, max_results=50, limiter=TokenBucket(1000))
+            return [p async for p in source.fetch(field, since=FIXTURE_WINDOW_START)]
+
+    return asyncio.run(run())
+
+
+def test_paper_source_is_abstract():
+    with pytest.raises(TypeError):
+        PaperSource(client=None)
+
+
+def test_parse_arxiv_feed():
+    papers, total = parse_arxiv_feed(read_fixture("arxiv_cs.xml").decode("utf-8"))
+
+    assert total == 4
+    assert [p["paperId"] for p in papers] == [
+        "arxiv:2610.14127",
+        "arxiv:2610.13502",
+        "arxiv:2610.12988",
+        "arxiv:2610.01733",
+    ]
+    first = papers[0]
+    assert first["source"] == "arxiv"
+    assert first["sourceId"] == "2610.14127"
+    assert first["title"] == (
+        "Speculative Decoding with Adaptive Draft Trees for Long-Context "
+        "Language Models"
+    )
+    assert first["abstract"].startswith("Speculative decoding accelerates")
+    assert len(first["authors"]) == 3
+    assert first["publicationDate"] == "2026-10-16"
+    assert first["url"] == "https://arxiv.org/abs/2610.14127"
+    assert first["fieldsOfStudy"] == ["cs.CL"]
+    assert first["citationCount"] == 0
+    # The version suffix is dropped and the DOI kept
+    assert papers[1]["externalIds"] == {
+        "ArXiv": "2610.13502",
+        "DOI": "10.5555/cs0000000",
+    }
+    assert papers[1]["publicationDate"] == "2026-10-15"
+
+
+def test_parse_arxiv_feed_missing_date_is_none():
+    papers, _ = parse_arxiv_feed(UNDATED_ENTRY)
+    assert papers[0]["publicationDate"] is None
+
+
+def test_parse_pubmed_articles():
+    papers = parse_pubmed_articles(read_fixture("pubmed_efetch.xml").decode("utf-8"))
+
+    assert [p["paperId"] for p in papers] == [
+        "pubmed:41288417",
+        "pubmed:41287903",
+        "pubmed:41279126",
+    ]
+    first = papers[0]
+    assert first["title"] == (
+        "Base editing corrects a recurrent SCN1A variant in patient-derived neurons."
+    )
+    assert first["abstract"].startswith("BACKGROUND: Loss-of-function variants")
+    assert "RESULTS: Adenine base editing" in first["abstract"]
+    assert [a["name"] for a in first["authors"]] == [
+        "Rana Haddad",
+        "Jonas Schmidt",
+        "Epilepsy Genetics Consortium",
+    ]
+    assert first["externalIds"] == {
+        "PubMed": "41288417",
+        "DOI": "10.1038/s41467-026-61234-x",
+        "PubMedCentral": "PMC12650311",
+    }
+    assert first["fieldsOfStudy"] == ["Nature communications"]
+    assert first["url"] == "https://pubmed.ncbi.nlm.nih.gov/41288417/"
+    assert [p["publicationDate"] for p in papers] == [
+        "2026-10-16",
+        "2026-10-15",
+        # No ArticleDate: the journal issue's "2026 Oct 14"
+        "2026-10-14",
+    ]
+
+
+def test_parse_pubmed_articles_missing_date_is_none():
+    papers = parse_pubmed_articles(UNDATED_ARTICLE)
+    assert papers[0]["publicationDate"] is None
+
+
+def test_arxiv_source_fetch_stops_at_window(mock_sources):
+    papers = fetch(ArxivSource, "cs")
+
+    # The fourth entry predates the window and ends the fetch
+    assert [p["sourceId"] for p in papers] == [
+        "2610.14127",
+        "2610.13502",
+        "2610.12988",
+    ]
+    assert mock_sources.requests == {"arxiv": 1}
+    assert [p["sourceId"] for p in fetch(ArxivSource, "bio")] == [
+        "2610.13877",
+        "2610.12251",
+    ]
+
+
+def test_pubmed_source_fetch(mock_sources):
+    papers = fetch(PubMedSource, "bio")
+
+    assert [p["sourceId"] for p in papers] == ["41288417", "41287903", "41279126"]
+    assert all(p["source"] == "pubmed" for p in papers)
+    # One esearch for the ids, one efetch for the records
+    assert mock_sources.requests == {"pubmed": 2}
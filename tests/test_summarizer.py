@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+import src.llm as llm
+from src.llm import LLMBackend, LLMRateLimitError, StubBackend, stub_completion
+from src.summarizer import (
+    FALLBACK_SUMMARY,
+    PROMPT_VERSION,
+    RateBudget,
+    summarize_batch_async,
+    summarize_papers,
+)
+from src.summary_cache import SummaryCache, make_cache_key
+
+PAPERS = [
+    {"paperId": f"p{i}", "title": f"Paper {i}", "abstract": f"Abstract {i}."}
+    for i in range(3)
+]
+
+
+class DictCache(SummaryCache):
+    def __init__(self, entries=None):
+        super().__init__()
+        self.entries = dict(entries or {})
+
+    def _get_many(self, keys):
+        return {key: self.entries[key] for key in keys if key in self.entries}
+
+    def _set_many(self, entries):
+        self.entries.update(entries)
+
+
+def test_llm_backend_is_abstract():
+    with pytest.raises(TypeError):
+        LLMBackend()
+
+
+def test_cached_run_does_not_build_backend(monkeypatch):
+    monkeypatch.setattr(llm, "LLM_BACKEND", "groq")
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    model = llm.GroqBackend.default_model
+    cache = DictCache(
+        {
+            make_cache_key(p, model, PROMPT_VERSION): f"cached {p['paperId']}"
+            for p in PAPERS
+        }
+    )
+
+    papers = summarize_papers(PAPERS, cache=cache)
+
+    assert [p["summary"] for p in papers] == ["cached p0", "cached p1", "cached p2"]
+
+
+def test_misses_build_the_configured_backend(monkeypatch):
+    monkeypatch.setattr(llm, "LLM_BACKEND", "stub")
+    built = []
+
+    def build(*args, **kwargs):
+        backend = StubBackend(latency=0)
+        built.append(backend)
+        return backend
+
+    monkeypatch.setattr("src.summarizer.get_llm_backend", build)
+    cache = DictCache()
+
+    papers = summarize_papers(PAPERS, cache=cache)
+
+    assert len(built) == 1 and built[0].requests == 3
+    assert all(p["summary"].startswith("• Stub method summary") for p in papers)
+    assert len(cache.entries) == 3
+    # Keys carry the stub's model, so a second run is all hits
+    assert summarize_papers(PAPERS, cache=cache) == papers
+    assert len(built) == 1
+
+
+class PartlyLimitedBackend(LLMBackend):
+    """Batched responses don't parse; single calls for `limited` always 429."""
+
+    def __init__(self, limited):
+        super().__init__("test")
+        self.limited = limited
+
+    async def complete(self, prompt, max_tokens, temperature=0.3, json_mode=False):
+        if json_mode:
+            return "not json"
+        if self.limited in prompt:
+            raise LLMRateLimitError(retry_after=0)
+        return stub_completion(prompt)
+
+
+def test_batch_fallback_failures_only_affect_their_paper():
+    backend = PartlyLimitedBackend(limited="Paper 1")
+    summaries = asyncio.run(summarize_batch_async(backend, PAPERS, RateBudget()))
+
+    assert summaries[1] == FALLBACK_SUMMARY
+    assert summaries[0] == stub_completion("Title: Paper 0")
+    assert summaries[2] == stub_completion("Title: Paper 2")
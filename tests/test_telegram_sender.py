@@ -0,0 +1,155 @@
+import re
+import asyncio
+from html.parser import HTMLParser
+
+import pytest
+from telegram.error import BadRequest, Forbidden, NetworkError, TimedOut
+
+from src.telegram_sender import (
+    TELEGRAM_MAX_MESSAGE_LENGTH as LIMIT,
+    TelegramDispatcher,
+    format_digest_text,
+    message_length,
+    split_message,
+)
+
+
+class FlakyBot:
+    """Bot whose send_message raises the queued errors, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def send_message(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return kwargs
+
+
+def send(bot, max_retries=3):
+    dispatcher = TelegramDispatcher(
+        bot=bot, global_rps=1000, per_chat_rps=1000, max_retries=max_retries
+    )
+    return asyncio.run(dispatcher.send_message("42", "hello"))
+
+
+@pytest.mark.parametrize(
+    "error", [BadRequest("Can't parse entities"), Forbidden("blocked"), TimedOut()]
+)
+def test_send_message_does_not_retry(error):
+    bot = FlakyBot(error)
+    with pytest.raises(type(error)):
+        send(bot)
+    assert bot.calls == 1
+
+
+def test_send_message_retries_connection_errors(monkeypatch):
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda _: real_sleep(0))
+    bot = FlakyBot(NetworkError("connection reset"))
+    assert send(bot)["text"] == "hello"
+    assert bot.calls == 2
+
+
+class TagBalance(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.stack = []
+        self.ok = True
+
+    def handle_starttag(self, tag, attrs):
+        self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if not self.stack or self.stack.pop() != tag:
+            self.ok = False
+
+
+def is_balanced(chunk: str) -> bool:
+    parser = TagBalance()
+    parser.feed(chunk)
+    parser.close()
+    return parser.ok and not parser.stack
+
+
+def rejoin(chunks):
+    """
+    Undo the closing/reopening tags split_message adds at each cut,
+    which must give back the original text.
+    """
+    text = chunks[0]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        closing = re.search(r"(</[a-z]+>)*$", previous).group(0)
+        reopen = ""
+        for _ in range(closing.count("</")):
+            reopen += re.match(r"<[a-z][^>]*>", chunk[len(reopen) :]).group(0)
+        text = text[: len(text) - len(closing)] + chunk[len(reopen) :]
+    return text
+
+
+def boundary_papers(summary_length: int, title_extra: str = ""):
+    """Three papers whose digest length is driven by summary_length."""
+    return [
+        {
+            "paperId": f"b{i}",
+            "title": f"Boundary paper {i} <&> {title_extra}",
+            "summary": "\n".join(
+                "• " + ("word & " * (summary_length // 21)) for _ in range(3)
+            ),
+            "url": f"https://example.com/{i}?a=1&b=2",
+            "field": "cs",
+            "selection_reason": "Selected for: testing",
+        }
+        for i in range(3)
+    ]
+
+
+def padded_digest(delta: int) -> str:
+    """Digest exactly `delta` UTF-16 units longer than the limit."""
+    papers = boundary_papers(0)
+    pad = LIMIT - message_length(format_digest_text(papers))
+    # Shows up once in the digest, unlike the title
+    papers[0]["selection_reason"] += "x" * (pad + delta)
+    return format_digest_text(papers)
+
+
+def assert_valid_split(text: str, limit: int = LIMIT) -> None:
+    chunks = split_message(text, limit)
+    if message_length(text) <= limit:
+        assert chunks == [text]
+    else:
+        assert len(chunks) > 1
+    assert all(message_length(c) <= limit for c in chunks)
+    assert all(is_balanced(c) for c in chunks)
+    assert rejoin(chunks) == text
+
+
+@pytest.mark.parametrize("delta", [-1, 0, 1])
+def test_split_message_around_limit(delta):
+    text = padded_digest(delta)
+    assert message_length(text) == LIMIT + delta
+    assert_valid_split(text)
+
+
+def test_split_message_growing_digests():
+    base = message_length(format_digest_text(boundary_papers(0)))
+    step = message_length(format_digest_text(boundary_papers(21))) - base
+    for n in range(0, 3 * LIMIT // step + 3):
+        assert_valid_split(format_digest_text(boundary_papers(21 * n)))
+
+
+def test_split_message_one_huge_digest():
+    assert_valid_split(format_digest_text(boundary_papers(40000)))
+
+
+def test_split_message_counts_non_bmp_as_two_units():
+    text = format_digest_text(boundary_papers(3000, "\U0001f9ec" * 50))
+    assert message_length(text) > len(text)
+    assert_valid_split(text)
+
+
+def test_split_message_cuts_inside_tags():
+    # Small enough that cuts land inside <pre>/<b> blocks
+    assert_valid_split(format_digest_text(boundary_papers(300)), limit=200)